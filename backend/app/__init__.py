@@ -39,6 +39,9 @@ def create_app():
         # Handle subdirectories in the filename path
         return send_from_directory(upload_folder, filename)
 
+    # Product write hooks (catalog version bumps, market rollup refreshes)
+    from app.utils import catalog, market_rollups, product_ratings, reviews, recommendations, purchases, order_rollups, stock  # noqa: F401
+
     # Register blueprints
     from app.routes.image_analysis import image_analysis_bp
     from app.routes.growth_classification import growth_bp
@@ -54,6 +57,7 @@ def create_app():
     from app.routes.orders import orders_bp
     from app.routes.reviews import reviews_bp
     from app.routes.admin import admin_bp
+    from app.routes.products import products_bp
 
     app.register_blueprint(image_analysis_bp, url_prefix='/api/image')
     app.register_blueprint(growth_bp, url_prefix='/api/growth')
@@ -69,6 +73,14 @@ def create_app():
     app.register_blueprint(orders_bp, url_prefix='/api/orders')
     app.register_blueprint(reviews_bp, url_prefix='/api/reviews')
     app.register_blueprint(admin_bp)
+    app.register_blueprint(products_bp)
+
+    # Start the order ingestion queue, which flushes orders a previous
+    # process acknowledged but had not yet written to Mongo
+    if app.config.get('ORDER_INGEST_MODE') == 'queue':
+        from app.utils.order_queue import get_order_queue
+        with app.app_context():
+            get_order_queue()
 
     @app.route("/")
     def home():
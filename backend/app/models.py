@@ -6,71 +6,81 @@ Used by Flask routes to interact with MongoDB.
 from datetime import datetime
 from mongoengine import Document, EmbeddedDocument, fields
 from config import Config
+from app.utils.images import normalize_image_keys, precompute_image_urls, stored_image_urls
+from app.utils.serializers import (
+    PRODUCT_SERIALIZER, ORDER_SERIALIZER, USER_SERIALIZER, FORUM_THREAD_SERIALIZER,
+    REVIEW_SERIALIZER
+)
 
 # Connection will be established in the app initialization
 # from mongoengine import connect
 # connect(db='nutrilea_db', host=Config.MONGODB_URI)
 
 class Product(Document):
-    meta = {'collection': 'products'}
+    meta = {
+        'collection': 'products',
+        'indexes': [
+            # Every filter/sort offered by the product listings is index-backed
+            ('category', 'price'),
+            'price',
+            '-created_at',
+            ('category', '-created_at'),
+            '-rating_average',
+            ('category', '-rating_average'),
+            '-popularity',
+            ('category', '-popularity'),
+        ]
+    }
     
     name = fields.StringField(required=True, unique=True, max_length=255)
     category = fields.StringField(required=True, max_length=100)
     price = fields.FloatField(required=True)
     original_price = fields.FloatField()
     description = fields.StringField()
-    image = fields.ListField(fields.StringField())  # Array of image URLs
+    image = fields.ListField(fields.StringField())  # Canonical image keys (uploads/..., URL or emoji)
+    image_urls = fields.ListField(fields.DictField())  # [{'base': host, 'urls': [...]}], set on write
     quantity = fields.StringField(max_length=100)
     benefits = fields.ListField(fields.StringField())
     uses = fields.ListField(fields.StringField())
     how_to_use = fields.ListField(fields.StringField())
     reviews = fields.ListField(fields.DictField())
+    region = fields.StringField(max_length=100)  # None = sold nationwide
+    # Denormalised from active reviews, maintained with $inc on review writes
+    rating_count = fields.IntField(default=0)
+    rating_sum = fields.IntField(default=0)
+    rating_histogram = fields.DictField()  # {'1'..'5': count}
+    rating_average = fields.FloatField(default=0)
+    popularity = fields.IntField(default=0)  # Units ordered
+    stock = fields.IntField(min_value=0)  # Units available; None = not tracked
     created_at = fields.DateTimeField(default=datetime.utcnow)
 
+    def clean(self):
+        """Normalise image references once, at write time."""
+        self.image = normalize_image_keys(self.image)
+        self.image_urls = precompute_image_urls(self.image)
+
     def get_image_urls(self, base_url='https://nutrilea-backend.onrender.com'):
-        """Convert relative image paths to full URLs."""
-        if not self.image:
-            return ['🌿']  # Default emoji
-        
-        urls = []
-        for img in self.image:
-            if not img:
-                continue
-            # If it's already a full URL, use as-is
-            if img.startswith('http') or img.startswith('https'):
-                urls.append(img)
-            # If it's an emoji, keep as-is
-            elif len(img) <= 2:
-                urls.append(img)
-            # If it's already an uploads path, prefix base URL
-            elif img.startswith('/uploads/'):
-                urls.append(f"{base_url}{img}")
-            elif img.startswith('uploads/'):
-                urls.append(f"{base_url}/{img}")
-            # Otherwise, construct full URL
-            else:
-                urls.append(f"{base_url}/uploads/{img.lstrip('/')}")
-        
-        return urls if urls else ['🌿']
+        """Full image URLs for a host, read from the precomputed values."""
+        return stored_image_urls(self.image, self.image_urls, base_url)
     
     def to_dict(self, base_url='https://nutrilea-backend.onrender.com'):
-        return {
-            'id': str(self.id),
-            'name': self.name,
-            'category': self.category,
-            'price': self.price,
-            'originalPrice': self.original_price,
-            'description': self.description,
-            'image': self.get_image_urls(base_url),
-            'quantity': self.quantity,
-            'benefits': self.benefits,
-            'uses': self.uses,
-            'howToUse': self.how_to_use,
-            'reviews': self.reviews
-        }
+        return PRODUCT_SERIALIZER.serialize(self.to_mongo(), base_url=base_url)
+
+# Both spellings are in use for a fulfilled order
+COMPLETED_ORDER_STATUSES = ('completed', 'delivered')
+# Orders in these statuses no longer change and may be archived
+TERMINAL_ORDER_STATUSES = COMPLETED_ORDER_STATUSES + ('cancelled',)
 
 class Order(Document):
-    meta = {'collection': 'orders'}
+    meta = {
+        'collection': 'orders',
+        'indexes': [
+            ('user_id', '-created_at', '-_id'),  # My orders (keyset pages)
+            ('user_id', 'status', '-created_at', '-_id'),  # My orders by status
+            ('status', '-created_at', '-_id'),  # Status counts, completed scans, status listing
+            ('-created_at', '-_id')  # Admin/all-orders listing
+        ]
+    }
     
     user_id = fields.StringField()  # Store authenticated user ID for linking orders to users
     user_name = fields.StringField(required=True)
@@ -83,18 +93,23 @@ class Order(Document):
     created_at = fields.DateTimeField(default=datetime.utcnow)
 
     def to_dict(self):
-        return {
-            'id': str(self.id),
-            'userId': self.user_id,
-            'userName': self.user_name,
-            'userPhone': self.user_phone,
-            'deliveryAddress': self.delivery_address,
-            'paymentMethod': self.payment_method,
-            'totalAmount': self.total_amount,
-            'items': self.items,
-            'status': self.status,
-            'createdAt': self.created_at.isoformat() if self.created_at else None
-        }
+        return ORDER_SERIALIZER.serialize(self.to_mongo())
+
+class ArchivedOrder(Document):
+    """Terminal orders moved out of ``orders``, stored whole under their original _id."""
+    meta = {
+        'collection': 'orders_archive',
+        'strict': False,  # Documents keep every Order field as written
+        'auto_create_index': False,  # Created compressed by order_archive first
+        'indexes': [
+            ('user_id', '-created_at', '-_id')  # A user's order history (keyset pages)
+        ]
+    }
+    
+    user_id = fields.StringField()
+    status = fields.StringField()
+    created_at = fields.DateTimeField()
+    archived_at = fields.DateTimeField(default=datetime.utcnow)
 
 class User(Document):
     meta = {
@@ -102,7 +117,8 @@ class User(Document):
         'indexes': [
             'email',  # Index for fast email lookup during login
             'status',  # Index for status filtering
-            ('email', 'status')  # Compound index for active user lookups
+            ('email', 'status'),  # Compound index for active user lookups
+            'created_at'  # User growth ranges on the dashboard
         ]
     }
     
@@ -118,21 +134,17 @@ class User(Document):
     updated_at = fields.DateTimeField(default=datetime.utcnow)
 
     def to_dict(self):
-        return {
-            'id': str(self.id),
-            'email': self.email,
-            'name': self.name,
-            'phone': self.phone,
-            'address': self.address,
-            'image': self.image,
-            'role': self.role,
-            'status': self.status,
-            'createdAt': self.created_at.isoformat() if self.created_at else None,
-            'updatedAt': self.updated_at.isoformat() if self.updated_at else None
-        }
+        return USER_SERIALIZER.serialize(self.to_mongo())
 
 class ForumThread(Document):
-    meta = {'collection': 'forum_threads'}
+    meta = {
+        'collection': 'forum_threads',
+        'indexes': [
+            '-created_at',  # Thread listing
+            '-updated_at',  # Conditional GET version
+            'status'
+        ]
+    }
     
     title = fields.StringField(required=True)
     content = fields.StringField(required=True)
@@ -145,23 +157,20 @@ class ForumThread(Document):
     created_at = fields.DateTimeField(default=datetime.utcnow)
     updated_at = fields.DateTimeField(default=datetime.utcnow)
 
+    def clean(self):
+        # View counts are incremented atomically and do not touch updated_at
+        self.updated_at = datetime.utcnow()
+
     def to_dict(self):
-        return {
-            'id': str(self.id),
-            'title': self.title,
-            'content': self.content,
-            'userName': self.user_name,
-            'viewsCount': self.views_count,
-            'repliesCount': self.replies_count,
-            'likeCount': self.likes_count,
-            'status': self.status,
-            'attachments': self.attachments or [],
-            'createdAt': self.created_at.isoformat() if self.created_at else None,
-            'updatedAt': self.updated_at.isoformat() if self.updated_at else None
-        }
+        return FORUM_THREAD_SERIALIZER.serialize(self.to_mongo())
 
 class ForumReply(Document):
-    meta = {'collection': 'forum_replies'}
+    meta = {
+        'collection': 'forum_replies',
+        'indexes': [
+            ('thread_id', 'created_at')  # Replies of a thread, oldest first
+        ]
+    }
     
     thread_id = fields.ReferenceField(ForumThread, required=True)
     content = fields.StringField(required=True)
@@ -169,6 +178,9 @@ class ForumReply(Document):
     created_at = fields.DateTimeField(default=datetime.utcnow)
     updated_at = fields.DateTimeField(default=datetime.utcnow)
 
+    def clean(self):
+        self.updated_at = datetime.utcnow()
+
     def to_dict(self):
         return {
             'id': str(self.id),
@@ -180,7 +192,10 @@ class ForumReply(Document):
         }
 
 class ProductCategory(Document):
-    meta = {'collection': 'product_categories'}
+    meta = {
+        'collection': 'product_categories',
+        'indexes': ['status']
+    }
     
     name = fields.StringField(required=True, unique=True)
     description = fields.StringField()
@@ -201,7 +216,15 @@ class ProductCategory(Document):
         }
 
 class Review(Document):
-    meta = {'collection': 'reviews'}
+    meta = {
+        'collection': 'reviews',
+        'indexes': [
+            ('product_id', 'status', '-created_at'),  # Review pages and summaries
+            ('product_id', 'user_id'),  # One review per user and product
+            'user_id',  # Name snapshot updates on user rename
+            '-created_at'  # Admin listing
+        ]
+    }
     
     product_id = fields.ReferenceField(Product, required=True)
     user_id = fields.ReferenceField(User, required=True)
@@ -210,21 +233,202 @@ class Review(Document):
     content = fields.StringField(required=True)
     verified_purchase = fields.BooleanField(default=False)  # True if user completed order with this product
     status = fields.StringField(default='active')  # active, hidden, reported
+    product_name = fields.StringField()  # Snapshots kept in sync on rename,
+    user_name = fields.StringField()     # so reads need no dereferencing
     created_at = fields.DateTimeField(default=datetime.utcnow)
     updated_at = fields.DateTimeField(default=datetime.utcnow)
 
+    def clean(self):
+        self.updated_at = datetime.utcnow()
+        if not self.product_name:
+            self.product_name = getattr(self.product_id, 'name', None)
+        if not self.user_name:
+            self.user_name = getattr(self.user_id, 'name', None)
+
     def to_dict(self):
-        return {
-            'id': str(self.id),
-            'productId': str(self.product_id.id) if self.product_id else None,
-            'userId': str(self.user_id.id) if self.user_id else None,
-            'rating': self.rating,
-            'title': self.title,
-            'content': self.content,
-            'verifiedPurchase': self.verified_purchase,
-            'status': self.status,
-            'createdAt': self.created_at.isoformat() if self.created_at else None,
-            'updatedAt': self.updated_at.isoformat() if self.updated_at else None,
-            'productName': self.product_id.name if self.product_id else None,
-            'userName': self.user_id.name if self.user_id else None
-        }
+        data = REVIEW_SERIALIZER.serialize(self.to_mongo())
+        # Reviews written before the name snapshots existed
+        if data['productName'] is None and self.product_id:
+            data['productName'] = self.product_id.name
+        if data['userName'] is None and self.user_id:
+            data['userName'] = self.user_id.name
+        return data
+
+class DataVersion(Document):
+    """Monotonic version counters for cacheable data sets (e.g. the catalog)."""
+    meta = {'collection': 'data_versions'}
+    
+    key = fields.StringField(primary_key=True)
+    version = fields.IntField(default=0)
+    updated_at = fields.DateTimeField(default=datetime.utcnow)
+
+class MarketRollup(Document):
+    """Precomputed price statistics per (category, region); 'all' = no filter."""
+    meta = {
+        'collection': 'market_rollups',
+        'indexes': [
+            {'fields': ['category', 'region'], 'unique': True},
+            'region'
+        ]
+    }
+    
+    category = fields.StringField(required=True)
+    region = fields.StringField(required=True)
+    count = fields.IntField(default=0)
+    price_sum = fields.FloatField(default=0)
+    min_price = fields.FloatField()
+    max_price = fields.FloatField()
+    category_breakdown = fields.DictField()  # only on category='all' rows
+    updated_at = fields.DateTimeField(default=datetime.utcnow)
+
+class PriceHistory(Document):
+    """Append-only price observations, one per admin price change."""
+    meta = {
+        'collection': 'price_history',
+        'indexes': [
+            ('product_id', 'recorded_at'),
+            'recorded_at'
+        ]
+    }
+    
+    product_id = fields.ObjectIdField(required=True)
+    category = fields.StringField()
+    price = fields.FloatField(required=True)
+    original_price = fields.FloatField()
+    recorded_at = fields.DateTimeField(default=datetime.utcnow)
+
+class PriceTrend(Document):
+    """Precomputed rolling-window price analytics per product or category."""
+    meta = {
+        'collection': 'price_trends',
+        'indexes': [
+            {'fields': ['scope', 'key'], 'unique': True}
+        ]
+    }
+    
+    scope = fields.StringField(required=True)  # product, category, overall
+    key = fields.StringField(required=True)
+    category = fields.StringField()
+    windows = fields.DictField()  # {'7d': {...}, '30d': {...}, '90d': {...}}
+    source_version = fields.IntField(default=0)
+    computed_at = fields.DateTimeField(default=datetime.utcnow)
+
+class ProductCooccurrence(Document):
+    """Completed-order counts per product and per co-purchased product."""
+    meta = {'collection': 'product_cooccurrence'}
+    
+    product_id = fields.StringField(primary_key=True)
+    orders = fields.IntField(default=0)  # completed orders containing the product
+    pairs = fields.DictField()  # {other_product_id: orders containing both}
+    updated_at = fields.DateTimeField(default=datetime.utcnow)
+
+class ProductRecommendation(Document):
+    """Precomputed top-k co-purchase neighbours for one product."""
+    meta = {'collection': 'product_recommendations'}
+    
+    product_id = fields.StringField(primary_key=True)
+    neighbours = fields.ListField(fields.DictField())  # [{'productId', 'score', 'count'}]
+    computed_at = fields.DateTimeField(default=datetime.utcnow)
+
+class UserPurchase(Document):
+    """Materialised (user, product) pairs from completed orders."""
+    meta = {
+        'collection': 'user_purchases',
+        'indexes': [
+            {'fields': ['user_id', 'product_id'], 'unique': True},
+            'product_id'
+        ]
+    }
+    
+    user_id = fields.StringField(required=True)
+    product_id = fields.StringField(required=True)
+    orders = fields.IntField(default=0)  # completed orders containing the product
+    first_purchased_at = fields.DateTimeField()
+    last_purchased_at = fields.DateTimeField()
+    updated_at = fields.DateTimeField(default=datetime.utcnow)
+
+class IdempotencyRecord(Document):
+    """Claim and stored response for one Idempotency-Key."""
+    meta = {
+        'collection': 'idempotency_keys',
+        'indexes': [
+            {'fields': ['created_at'], 'expireAfterSeconds': Config.IDEMPOTENCY_TTL_SECONDS}
+        ]
+    }
+    
+    key = fields.StringField(primary_key=True)  # scope:client:key
+    fingerprint = fields.StringField(required=True)  # hash of the request body
+    status = fields.StringField(default='pending')  # pending, complete
+    status_code = fields.IntField()
+    body = fields.StringField()
+    mimetype = fields.StringField()
+    created_at = fields.DateTimeField(default=datetime.utcnow)
+
+class StockReservation(Document):
+    """Stock held for a checkout until it is committed to an order or released."""
+    meta = {
+        'collection': 'stock_reservations',
+        'indexes': [
+            ('status', 'expires_at'),  # Expiry sweep of held reservations
+            ('order_id', 'status'),  # An order's committed stock, released on cancel/delete
+            {'fields': ['closed_at'], 'expireAfterSeconds': 7 * 24 * 3600}
+        ]
+    }
+    
+    items = fields.ListField(fields.DictField())  # [{'product_id', 'quantity'}] actually decremented
+    cart = fields.DictField()  # {product_id: quantity} as requested, to match at checkout
+    status = fields.StringField(default='held')  # held, committed, released
+    order_id = fields.StringField()
+    expires_at = fields.DateTimeField(required=True)
+    created_at = fields.DateTimeField(default=datetime.utcnow)
+    committed_at = fields.DateTimeField()  # Kept while the order may still be cancelled
+    closed_at = fields.DateTimeField()  # Set on release; purged a week later
+
+class OrderEvent(Document):
+    """Append-only log of order lifecycle transitions."""
+    meta = {
+        'collection': 'order_events',
+        'indexes': [
+            ('order_id', 'at'),  # History of one order
+            'at'
+        ]
+    }
+    
+    order_id = fields.StringField(required=True)
+    type = fields.StringField(required=True)  # created, status_changed, deleted
+    from_status = fields.StringField()  # None for created
+    to_status = fields.StringField()  # None for deleted
+    # Snapshot of the order so derived state can be rebuilt from the log alone
+    user_id = fields.StringField()
+    total_amount = fields.FloatField()
+    items = fields.ListField(fields.DictField())  # [{'id', 'cartQuantity', 'price'}]
+    order_created_at = fields.DateTimeField()
+    at = fields.DateTimeField(default=datetime.utcnow)
+
+class OrderDailyStats(Document):
+    """Orders placed, completed and revenue per order creation day."""
+    meta = {'collection': 'order_daily_stats'}
+    
+    day = fields.StringField(primary_key=True)  # YYYY-MM-DD
+    orders = fields.IntField(default=0)
+    completed_orders = fields.IntField(default=0)
+    revenue = fields.FloatField(default=0)
+
+class OrderStatusCount(Document):
+    """Current number of orders in each status."""
+    meta = {'collection': 'order_status_counts'}
+    
+    status = fields.StringField(primary_key=True)
+    count = fields.IntField(default=0)
+
+class ProductSales(Document):
+    """Units, completed orders and revenue per product."""
+    meta = {
+        'collection': 'product_sales',
+        'indexes': ['-units']  # Top products
+    }
+    
+    product_id = fields.StringField(primary_key=True)
+    units = fields.IntField(default=0)
+    orders = fields.IntField(default=0)
+    revenue = fields.FloatField(default=0)
@@ -3,11 +3,30 @@ Admin CRUD routes for managing products, users, orders, and forum.
 Requires admin role to access.
 """
 
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from functools import wraps
+from datetime import datetime
 from werkzeug.security import generate_password_hash
+from bson import ObjectId
 from app.models import Product, User, Order, ForumThread, ForumReply, ProductCategory, Review
 from app.utils.helpers import upload_to_cloudinary
+from app.utils.response_cache import get_response_cache
+from app.utils.conditional import conditional_get_stats
+from app.utils.idempotency import get_idempotency_store
+from app.utils.order_queue import find_queued_order, flush_order, get_order_queue
+from app.utils.order_archive import find_archived_order, delete_archived_order
+from app.utils.order_export import parse_export_args, stream_order_export, EXPORT_FORMATS
+from app.utils.order_events import make_event, record_order_events
+from app.utils.order_rollups import get_status_counts, get_daily_stats, get_total_revenue, get_top_products
+from app.utils.stock import parse_stock, reopens_cancelled
+from app.utils.price_analytics import record_price
+from app.utils.reviews import serialize_reviews
+from app.utils.catalog_io import export_products_ndjson, import_products_ndjson, DEFAULT_CHUNK_SIZE
+from app.utils.counts import resolve_total, pagination_meta
+from app.utils.serializers import (
+    PRODUCT_ADMIN_SERIALIZER, USER_ADMIN_SERIALIZER, ORDER_SERIALIZER,
+    FORUM_THREAD_SERIALIZER, parse_fields
+)
 import json
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
@@ -35,36 +54,19 @@ def get_all_products():
     
     # Use MongoEngine syntax
     products = Product.objects.skip((page - 1) * per_page).limit(per_page)
-    total = Product.objects.count()
+    total, exact = resolve_total(Product.objects)
 
     # Construct base URL for image URLs
     base_url = request.url_root.rstrip('/') if request.url_root else 'https://nutrilea-backend.onrender.com'
     
-    # Convert to dict and handle ObjectId serialization
-    products_list = []
-    for product in products:
-        product_dict = {
-            'id': str(product.id),
-            'name': product.name,
-            'category': product.category,
-            'price': product.price,
-            'original_price': product.original_price,
-            'description': product.description,
-            'image': product.get_image_urls(base_url),
-            'quantity': product.quantity,
-            'benefits': product.benefits,
-            'uses': product.uses,
-            'how_to_use': product.how_to_use,
-            'reviews': product.reviews
-        }
-        products_list.append(product_dict)
+    products_list = PRODUCT_ADMIN_SERIALIZER.serialize_queryset(
+        products, parse_fields(), base_url=base_url
+    )
     
     return jsonify({
         'success': True,
         'products': products_list,
-        'total': total,
-        'pages': (total + per_page - 1) // per_page,
-        'current_page': page
+        **pagination_meta(total, exact, page, per_page)
     }), 200
 
 @admin_bp.route('/users', methods=['POST'])
@@ -109,16 +111,7 @@ def create_user():
             'success': True,
             'message': 'User created',
             'userId': str(user.id),  # Convert ObjectId to string
-            'user': {
-                'id': str(user.id),
-                'name': user.name,
-                'email': user.email,
-                'phone': user.phone,
-                'address': user.address,
-                'image': user.image,
-                'role': user.role,
-                'status': user.status
-            }
+            'user': USER_ADMIN_SERIALIZER.serialize(user.to_mongo())
         }), 201
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -180,6 +173,11 @@ def create_product():
             except json.JSONDecodeError:
                 reviews = []
 
+        try:
+            stock = parse_stock(data.get('stock'))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
         product = Product(
             name=data.get('name'),
             category=data.get('category'),
@@ -191,32 +189,51 @@ def create_product():
             benefits=benefits,
             uses=uses,
             how_to_use=how_to_use,
-            reviews=reviews
+            reviews=reviews,
+            region=data.get('region') or None,
+            stock=stock
         )
         product.save()  # Use MongoEngine save()
+        record_price(product)  # Baseline for price history
         
         return jsonify({
             'success': True,
             'message': 'Product created',
             'productId': str(product.id),  # Convert ObjectId to string
-            'product': {
-                'id': str(product.id),
-                'name': product.name,
-                'category': product.category,
-                'price': product.price,
-                'original_price': product.original_price,
-                'description': product.description,
-                'image': product.get_image_urls(request.url_root.rstrip('/')),
-                'quantity': product.quantity,
-                'benefits': product.benefits,
-                'uses': product.uses,
-                'how_to_use': product.how_to_use,
-                'reviews': product.reviews
-            }
+            'product': PRODUCT_ADMIN_SERIALIZER.serialize(
+                product.to_mongo(), base_url=request.url_root.rstrip('/')
+            )
         }), 201
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@admin_bp.route('/products/export', methods=['GET'])
+@admin_required
+def export_products():
+    """Stream the product catalog as NDJSON."""
+    category = request.args.get('category')
+    return Response(
+        stream_with_context(export_products_ndjson(category)),
+        mimetype='application/x-ndjson',
+        headers={'Content-Disposition': 'attachment; filename=products.ndjson'}
+    )
+
+@admin_bp.route('/products/import', methods=['POST'])
+@admin_required
+def import_products():
+    """Bulk upsert products (by name) from an NDJSON request body."""
+    try:
+        chunk_size = min(max(request.args.get('chunk_size', DEFAULT_CHUNK_SIZE, type=int), 1), 5000)
+        dry_run = request.args.get('dry_run', '').lower() in ('1', 'true', 'yes')
+        report = import_products_ndjson(request.stream, chunk_size, dry_run)
+        return jsonify({
+            'success': report['errorCount'] == 0,
+            'dryRun': dry_run,
+            'report': report
+        }), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @admin_bp.route('/products/<string:product_id>', methods=['PUT'])
 @admin_required
 def update_product(product_id):
@@ -228,6 +245,8 @@ def update_product(product_id):
         return jsonify({'success': False, 'error': 'Product not found'}), 404
     
     try:
+        previous_prices = (product.price, product.original_price)
+        
         # Handle image upload
         image_urls = product.image or []
         
@@ -278,12 +297,19 @@ def update_product(product_id):
             product.original_price = float(data['original_price']) if data['original_price'] else None
         if 'description' in data:
             product.description = data['description']
+        if 'region' in data:
+            product.region = data['region'] or None
         
         # Always update image field
         product.image = image_urls
         
         if 'quantity' in data:
             product.quantity = data['quantity']
+        if 'stock' in data:
+            try:
+                product.stock = parse_stock(data['stock'])
+            except ValueError as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
         if 'benefits' in data:
             benefits = data['benefits']
             if isinstance(benefits, str):
@@ -318,23 +344,14 @@ def update_product(product_id):
             product.reviews = reviews
         
         product.save()  # Use MongoEngine save()
+        if (product.price, product.original_price) != previous_prices:
+            record_price(product)
         return jsonify({
             'success': True,
             'message': 'Product updated successfully',
-            'product': {
-                'id': str(product.id),
-                'name': product.name,
-                'category': product.category,
-                'price': product.price,
-                'original_price': product.original_price,
-                'description': product.description,
-                'image': product.get_image_urls(request.url_root.rstrip('/')),
-                'quantity': product.quantity,
-                'benefits': product.benefits,
-                'uses': product.uses,
-                'how_to_use': product.how_to_use,
-                'reviews': product.reviews
-            }
+            'product': PRODUCT_ADMIN_SERIALIZER.serialize(
+                product.to_mongo(), base_url=request.url_root.rstrip('/')
+            )
         }), 200
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -365,29 +382,14 @@ def get_all_users():
     
     # Use MongoEngine syntax
     users = User.objects.skip((page - 1) * per_page).limit(per_page)
-    total = User.objects.count()
+    total, exact = resolve_total(User.objects)
     
-    # Convert to dict and handle ObjectId serialization
-    users_list = []
-    for user in users:
-        user_dict = {
-            'id': str(user.id),
-            'name': user.name,
-            'email': user.email,
-            'phone': user.phone,
-            'address': user.address,
-            'image': user.image,
-            'role': user.role,
-            'status': user.status
-        }
-        users_list.append(user_dict)
+    users_list = USER_ADMIN_SERIALIZER.serialize_queryset(users, parse_fields())
     
     return jsonify({
         'success': True,
         'users': users_list,
-        'total': total,
-        'pages': (total + per_page - 1) // per_page,
-        'current_page': page
+        **pagination_meta(total, exact, page, per_page)
     }), 200
 
 @admin_bp.route('/users/<string:user_id>', methods=['PUT'])
@@ -416,16 +418,7 @@ def update_user(user_id):
         return jsonify({
             'success': True,
             'message': 'User updated',
-            'user': {
-                'id': str(user.id),
-                'name': user.name,
-                'email': user.email,
-                'phone': user.phone,
-                'address': user.address,
-                'image': user.image,
-                'role': user.role,
-                'status': user.status
-            }
+            'user': USER_ADMIN_SERIALIZER.serialize(user.to_mongo())
         }), 200
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -447,28 +440,86 @@ def get_all_orders():
     
     # Use MongoEngine syntax
     orders = Order.objects.skip((page - 1) * per_page).limit(per_page)
-    total = Order.objects.count()
+    total, exact = resolve_total(Order.objects)
     
-    orders_list = [order.to_dict() for order in orders]
+    orders_list = ORDER_SERIALIZER.serialize_queryset(orders, parse_fields())
     
     return jsonify({
         'success': True,
         'orders': orders_list,
-        'total': total,
-        'pages': (total + per_page - 1) // per_page,
-        'current_page': page
+        **pagination_meta(total, exact, page, per_page)
     }), 200
 
+@admin_bp.route('/orders/export', methods=['GET'])
+@admin_required
+def export_orders():
+    """
+    Stream orders as CSV or NDJSON, newest first.
+    
+    Query: format (csv|ndjson), status (comma-separated), since/until (ISO
+    dates), fields, archived=1 to append archived orders, gzip=1|0
+    (default: gzip when the client accepts it).
+    """
+    try:
+        params = parse_export_args(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    gzip_arg = request.args.get('gzip')
+    if gzip_arg is None:
+        compress = 'gzip' in (request.headers.get('Accept-Encoding') or '').lower()
+    else:
+        compress = gzip_arg.lower() in ('1', 'true', 'yes')
+    filename = f"orders-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{params['format']}"
+    headers = {
+        'Content-Disposition': f'attachment; filename={filename}',
+        'X-Accel-Buffering': 'no',  # Let proxies pass chunks through as they come
+        'Vary': 'Accept-Encoding'
+    }
+    if compress:
+        headers['Content-Encoding'] = 'gzip'
+    return Response(
+        stream_with_context(stream_order_export(
+            params['query'], params['format'], parse_fields(), compress, params['archived']
+        )),
+        mimetype=EXPORT_FORMATS[params['format']],
+        headers=headers
+    )
+
+@admin_bp.route('/orders/<string:order_id>', methods=['GET'])
+@admin_required
+def get_order(order_id):
+    """Get one order by id: queued, live or archived."""
+    try:
+        queued = find_queued_order(order_id)
+        if queued is not None:
+            return jsonify({'success': True, 'order': ORDER_SERIALIZER.serialize(queued), 'queued': True}), 200
+        order = Order.objects(id=order_id).first()
+        if order:
+            return jsonify({'success': True, 'order': order.to_dict()}), 200
+        archived = find_archived_order(order_id)
+        if archived is None:
+            return jsonify({'success': False, 'error': 'Order not found'}), 404
+        return jsonify({'success': True, 'order': ORDER_SERIALIZER.serialize(archived), 'archived': True}), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @admin_bp.route('/orders/<string:order_id>', methods=['PUT'])
 @admin_required
 def update_order(order_id):
     """Update order status."""
     data = request.get_json()
+    flush_order(order_id)  # A queued order must reach Mongo before it changes
     order = Order.objects(id=order_id).first()
     
     if not order:
+        if find_archived_order(order_id) is not None:
+            return jsonify({'success': False, 'error': 'Archived orders cannot be changed'}), 409
         return jsonify({'success': False, 'error': 'Order not found'}), 404
     
+    if 'status' in data and reopens_cancelled(order.status, data['status']):
+        # Cancelling gave the order's stock back; a new order must take it again
+        return jsonify({'success': False, 'error': 'Cancelled orders cannot be reopened'}), 409
+    
     try:
         if 'status' in data:
             order.status = data['status']  # pending, processing, shipped, delivered, cancelled
@@ -486,10 +537,16 @@ def update_order(order_id):
 @admin_required
 def delete_order(order_id):
     """Delete an order."""
+    flush_order(order_id)  # A queued order must reach Mongo before it changes
     order = Order.objects(id=order_id).first()
     
     if not order:
-        return jsonify({'success': False, 'error': 'Order not found'}), 404
+        archived = delete_archived_order(order_id)
+        if archived is None:
+            return jsonify({'success': False, 'error': 'Order not found'}), 404
+        # Raw delete: log it so the rollups stop counting the order
+        record_order_events([make_event(archived, 'deleted', archived.get('status'), None)])
+        return jsonify({'success': True, 'message': 'Order deleted'}), 200
     
     try:
         order.delete()
@@ -508,16 +565,14 @@ def get_all_forum_threads():
     
     # Use MongoEngine syntax
     threads = ForumThread.objects.skip((page - 1) * per_page).limit(per_page)
-    total = ForumThread.objects.count()
+    total, exact = resolve_total(ForumThread.objects)
     
-    threads_list = [thread.to_dict() for thread in threads]
+    threads_list = FORUM_THREAD_SERIALIZER.serialize_queryset(threads, parse_fields())
     
     return jsonify({
         'success': True,
         'threads': threads_list,
-        'total': total,
-        'pages': (total + per_page - 1) // per_page,
-        'current_page': page
+        **pagination_meta(total, exact, page, per_page)
     }), 200
 
 @admin_bp.route('/forum/threads/<string:thread_id>', methods=['PUT'])
@@ -570,13 +625,13 @@ def get_dashboard_stats():
     try:
         total_users = User.objects.count()
         total_products = Product.objects.count()
-        total_orders = Order.objects.count()
-        pending_orders = Order.objects(status='pending').count()
         total_forum_threads = ForumThread.objects.count()
         
-        # Revenue calculation
-        completed_orders = Order.objects(status='delivered')
-        total_revenue = sum(o.total_amount for o in completed_orders)
+        # Order counts and revenue come from the event-log rollups
+        status_counts = get_status_counts()
+        total_orders = sum(status_counts.values())
+        pending_orders = status_counts.get('pending', 0)
+        total_revenue = get_total_revenue()
         
         return jsonify({
             'success': True,
@@ -599,44 +654,31 @@ def get_dashboard_analytics():
     try:
         from datetime import datetime, timedelta
         
-        # Get all orders
-        all_orders = list(Order.objects.order_by('created_at'))
-        
-        # Revenue trend (last 6 months)
-        revenue_trend = []
+        # Revenue trend (last 6 months) from the daily rollups
+        months = []
         for i in range(6, -1, -1):
             month_date = datetime.utcnow() - timedelta(days=30*i)
             month_start = month_date.replace(day=1)
             month_end = (month_start + timedelta(days=32)).replace(day=1)
-            
-            month_revenue = sum(
-                o.total_amount for o in all_orders 
-                if o.created_at and month_start <= o.created_at < month_end and o.status == 'completed'
-            )
+            months.append((month_start.strftime('%Y-%m-%d'), month_end.strftime('%Y-%m-%d')))
+        daily = get_daily_stats(since=datetime.strptime(months[0][0], '%Y-%m-%d'))
+        revenue_trend = []
+        for month_start, month_end in months:
+            month_revenue = sum(d['revenue'] for d in daily if month_start <= d['_id'] < month_end)
             revenue_trend.append(max(0, int(month_revenue / 1000)))  # Convert to thousands
         
-        # Top products by order count
-        product_order_count = {}
-        for order in all_orders:
-            if order.status == 'completed' and order.items:
-                for item in order.items:
-                    product_id = str(item.get('id', 'unknown'))
-                    product_order_count[product_id] = product_order_count.get(product_id, 0) + item.get('cartQuantity', 1)
-        
-        top_products = sorted(
-            product_order_count.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:5]
-        
-        top_product_data = []
-        for prod_id, count in top_products:
-            product = Product.objects(id=prod_id).first()
-            if product:
-                top_product_data.append({
-                    'name': product.name,
-                    'orders': count
-                })
+        # Top products by units sold
+        top_products = get_top_products(5)
+        names = {
+            str(p['_id']): p.get('name')
+            for p in Product._get_collection().find(
+                {'_id': {'$in': [ObjectId(t['_id']) for t in top_products]}}, {'name': 1}
+            )
+        }
+        top_product_data = [
+            {'name': names[t['_id']], 'orders': t['units']}
+            for t in top_products if t['_id'] in names
+        ]
         
         # Category performance
         category_stats = {}
@@ -646,13 +688,16 @@ def get_dashboard_analytics():
                 category_stats[category] = 0
             category_stats[category] += 1
         
-        # Review stats
-        avg_rating = 0
-        total_reviews = Review.objects.count()
-        if total_reviews > 0:
-            reviews = Review.objects
-            total_rating = sum(r.rating for r in reviews)
-            avg_rating = round(total_rating / total_reviews, 1)
+        # Review stats from the per-product rating aggregates
+        rating_totals = next(Product._get_collection().aggregate([
+            {'$group': {
+                '_id': None,
+                'count': {'$sum': '$rating_count'},
+                'sum': {'$sum': '$rating_sum'}
+            }}
+        ]), {})
+        total_reviews = rating_totals.get('count', 0)
+        avg_rating = round(rating_totals.get('sum', 0) / total_reviews, 1) if total_reviews else 0
         
         # User growth trend (last 7 days)
         user_trend = []
@@ -681,6 +726,20 @@ def get_dashboard_analytics():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@admin_bp.route('/metrics', methods=['GET'])
+@admin_required
+def get_metrics():
+    """Get in-process cache metrics for this worker."""
+    return jsonify({
+        'success': True,
+        'metrics': {
+            'responseCache': get_response_cache().stats(),
+            'conditionalGet': conditional_get_stats(),
+            'idempotency': get_idempotency_store().stats(),
+            'orderQueue': get_order_queue().stats() if get_order_queue() else None
+        }
+    }), 200
+
 # ==================== PRODUCT CATEGORIES ====================
 
 @admin_bp.route('/categories', methods=['GET'])
@@ -828,15 +887,13 @@ def get_all_reviews():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
     
-    total = Review.objects.count()
+    total, exact = resolve_total(Review.objects)
     reviews = Review.objects.order_by('-created_at').skip((page - 1) * per_page).limit(per_page)
 
     return jsonify({
         'success': True,
-        'reviews': [r.to_dict() for r in reviews],
-        'total': total,
-        'pages': (total + per_page - 1) // per_page,
-        'current_page': page
+        'reviews': serialize_reviews(reviews),
+        **pagination_meta(total, exact, page, per_page)
     }), 200
 
 @admin_bp.route('/reviews', methods=['POST'])
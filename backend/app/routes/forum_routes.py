@@ -5,10 +5,15 @@ Handles forum threads and replies.
 
 import jwt
 import os
+from datetime import datetime
+from bson import ObjectId
 from flask import Blueprint, request, jsonify, current_app
 from werkzeug.utils import secure_filename
 from app.models import ForumThread, ForumReply, User
 from app.utils.helpers import upload_to_cloudinary
+from app.utils.counts import resolve_total, pagination_meta
+from app.utils.serializers import FORUM_THREAD_LIST_SERIALIZER, parse_fields
+from app.utils.conditional import conditional_get
 
 forum_bp = Blueprint('forum', __name__, url_prefix='/api/forum')
 
@@ -41,6 +46,27 @@ def get_user_from_token():
     
     return None
 
+def forum_threads_version(**view_kwargs):
+    """Conditional GET version for thread listings: newest update + thread count."""
+    latest = ForumThread.objects.order_by('-updated_at').only('updated_at').as_pymongo().first()
+    updated_at = latest.get('updated_at') if latest else None
+    count = ForumThread._get_collection().estimated_document_count()
+    return f"{count}:{updated_at.isoformat() if updated_at else ''}", updated_at
+
+def forum_thread_version(thread_id):
+    """Count the view and read the thread's version in one round trip."""
+    if not ObjectId.is_valid(thread_id):
+        return None
+    thread = ForumThread._get_collection().find_one_and_update(
+        {'_id': ObjectId(thread_id)},
+        {'$inc': {'views_count': 1}},
+        projection={'updated_at': 1}
+    )
+    if not thread:
+        return None
+    updated_at = thread.get('updated_at')
+    return (updated_at.isoformat() if updated_at else ''), updated_at
+
 # ==================== FORUM THREADS ====================
 
 @forum_bp.route('/test', methods=['GET'])
@@ -75,6 +101,7 @@ def test_forum():
         }), 500
 
 @forum_bp.route('/threads-all', methods=['GET'])
+@conditional_get('forum.threads_all', forum_threads_version)
 def list_all_forum_threads():
     """Fallback endpoint: Get ALL forum threads without status filter."""
     try:
@@ -87,7 +114,7 @@ def list_all_forum_threads():
         
         # Get ALL threads
         all_threads = ForumThread.objects()
-        total = all_threads.count()
+        total, exact = resolve_total(all_threads)
         print(f"Total threads in DB: {total}")
         
         # Get paginated threads
@@ -96,26 +123,16 @@ def list_all_forum_threads():
                     .skip((page - 1) * per_page)
                     .limit(per_page))
         
-        threads_list = []
-        for thread in paginated:
-            try:
-                thread_dict = thread.to_dict()
-                thread_dict['author'] = thread_dict.get('userName', 'Anonymous')
-                thread_dict['viewCount'] = thread_dict.get('viewsCount', 0)
-                thread_dict['commentCount'] = thread_dict.get('repliesCount', 0)
-                threads_list.append(thread_dict)
-            except Exception as e:
-                print(f"Error serializing thread: {str(e)}")
-                continue
+        threads_list = FORUM_THREAD_LIST_SERIALIZER.serialize_queryset(
+            paginated, parse_fields()
+        )
         
         print(f"Returning {len(threads_list)} threads")
         
         return jsonify({
             'success': True,
             'threads': threads_list,
-            'total': total,
-            'pages': (total + per_page - 1) // per_page if per_page > 0 else 0,
-            'current_page': page,
+            **pagination_meta(total, exact, page, per_page),
             'note': 'No status filter applied'
         }), 200
     except Exception as e:
@@ -129,6 +146,7 @@ def list_all_forum_threads():
         }), 500
 
 @forum_bp.route('/threads', methods=['GET'])
+@conditional_get('forum.threads', forum_threads_version)
 def list_forum_threads():
     """Get all forum threads with pagination."""
     try:
@@ -141,46 +159,25 @@ def list_forum_threads():
         
         # Simplified: Get ALL threads without status filter to avoid MongoEngine issues
         all_threads = ForumThread.objects()
-        print(f"Total threads in DB: {all_threads.count()}")
         
         # Get pagination values
-        total = all_threads.count()
+        total, exact = resolve_total(all_threads)
+        print(f"Total threads in DB: {total}")
         skip_count = (page - 1) * per_page
         
         print(f"Skip: {skip_count}, Limit: {per_page}")
         
         # Get paginated threads - use simple skip/limit
-        paginated_list = list(all_threads.skip(skip_count).limit(per_page))
-        
-        print(f"Got {len(paginated_list)} threads from paginated query")
-        
-        # Convert to list and serialize
-        threads_list = []
-        for idx, thread in enumerate(paginated_list):
-            try:
-                print(f"Processing thread {idx}: {thread.title}")
-                thread_dict = thread.to_dict()
-                print(f"  Serialized successfully: {thread_dict.get('id')}")
-                
-                # Add additional fields for frontend
-                thread_dict['author'] = thread_dict.get('userName', 'Anonymous')
-                thread_dict['viewCount'] = thread_dict.get('viewsCount', 0)
-                thread_dict['commentCount'] = thread_dict.get('repliesCount', 0)
-                threads_list.append(thread_dict)
-            except Exception as thread_err:
-                print(f"  ERROR serializing thread {thread.id}: {str(thread_err)}")
-                import traceback
-                traceback.print_exc()
-                continue
+        threads_list = FORUM_THREAD_LIST_SERIALIZER.serialize_queryset(
+            all_threads.skip(skip_count).limit(per_page), parse_fields()
+        )
         
         print(f"Successfully processed {len(threads_list)} threads")
         
         response = {
             'success': True,
             'threads': threads_list,
-            'total': total,
-            'pages': (total + per_page - 1) // per_page if per_page > 0 else 0,
-            'current_page': page
+            **pagination_meta(total, exact, page, per_page)
         }
         
         print(f"Returning response with {len(threads_list)} threads")
@@ -203,17 +200,15 @@ def list_forum_threads():
         return jsonify(error_response), 500
 
 @forum_bp.route('/threads/<string:thread_id>', methods=['GET'])
+@conditional_get('forum.thread', forum_thread_version)
 def get_forum_thread(thread_id):
     """Get a specific forum thread with all replies."""
     try:
+        # Views count was already incremented by forum_thread_version
         thread = ForumThread.objects(id=thread_id).first()
         if not thread:
             return jsonify({'success': False, 'error': 'Thread not found'}), 404
         
-        # Increment views count
-        thread.views_count += 1
-        thread.save()
-        
         # Get all replies for this thread
         replies = ForumReply.objects(thread_id=thread).order_by('created_at')
         
@@ -512,6 +507,9 @@ def update_forum_reply(reply_id):
         
         reply.save()
         
+        # Touch the thread so cached thread pages revalidate
+        ForumThread.objects(id=reply.thread_id.id).update_one(set__updated_at=datetime.utcnow())
+        
         return jsonify({
             'success': True,
             'message': 'Reply updated successfully',
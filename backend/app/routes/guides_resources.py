@@ -1,14 +1,21 @@
 from flask import Blueprint, jsonify
+from app.utils.conditional import conditional_get
 
 guides_bp = Blueprint('guides', __name__)
 
+# Placeholder: guides/resources
+GUIDES = [
+    'Planting Cauliflower Step-by-Step',
+    'Fertilization Schedule',
+    'Disease Prevention Guide'
+]
+
+# Static content only changes on deploy
+GUIDES_VERSION = '|'.join(GUIDES)
+
 @guides_bp.route('/get', methods=['GET'])
+@conditional_get('guides.list', lambda: (GUIDES_VERSION, None))
 def get_guides():
-    # Placeholder: fetch guides/resources
     return jsonify({
-        'guides': [
-            'Planting Cauliflower Step-by-Step',
-            'Fertilization Schedule',
-            'Disease Prevention Guide'
-        ]
+        'guides': GUIDES
     })
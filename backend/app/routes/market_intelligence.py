@@ -1,62 +1,65 @@
 from flask import Blueprint, jsonify, request
 from app.models import Product, ProductCategory
+from app.utils.counts import resolve_total, pagination_meta
+from app.utils.serializers import PRODUCT_MARKET_SERIALIZER, parse_fields
+from app.utils.response_cache import cached_json_response
+from app.utils.conditional import conditional_get
+from app.utils.catalog import catalog_validators
+from app.utils.market_rollups import get_market_rollup, ALL
+from app.utils.price_analytics import ensure_fresh_trends, trends_computed_at, WINDOWS
+from app.utils.catalog_search import (
+    SearchFilters, faceted_search, filter_products, PRODUCT_SORTS, DEFAULT_SORT
+)
+from app.models import PriceTrend
 
 market_bp = Blueprint('market', __name__)
 
 @market_bp.route('/products', methods=['GET'])
+@conditional_get('market.products', catalog_validators)
+@cached_json_response('market.products', {
+    'category': 'all', 'page': '1', 'per_page': '20', 'min_price': '',
+    'max_price': '', 'sort': DEFAULT_SORT, 'count': '', 'fields': ''
+})
 def get_products():
-    """Get all products with optional category filtering."""
+    """Get all products with optional category, price filtering and sorting."""
     try:
         base_url = request.host_url.rstrip('/')
         # Get query parameters
         category = request.args.get('category')
         region = request.args.get('region', 'Luzon')
+        min_price = request.args.get('min_price', type=float)
+        max_price = request.args.get('max_price', type=float)
+        sort = request.args.get('sort') or DEFAULT_SORT
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         
-        # Build base query using MongoEngine
-        query = Product.objects
+        if sort not in PRODUCT_SORTS:
+            return jsonify({
+                'success': False,
+                'error': f"sort must be one of {', '.join(PRODUCT_SORTS)}"
+            }), 400
         
-        # Filter by category if provided
-        if category and category != 'all':
-            query = query.filter(category=category)
+        query = filter_products(Product.objects, category, min_price, max_price, sort=sort)
         
         # Get products for analysis with pagination
         skip = (page - 1) * per_page
         products = query.skip(skip).limit(per_page)
-        total = query.count()
+        total, exact = resolve_total(query)
+        
+        products_list = PRODUCT_MARKET_SERIALIZER.serialize_queryset(
+            products, parse_fields(), base_url=base_url
+        )
         
-        if not products:
+        if not products_list:
             return jsonify({
                 'success': False,
                 'error': 'No products found for the specified criteria'
             }), 404
         
-        # Convert products to dict with proper ObjectId serialization
-        products_list = []
-        for product in products:
-            product_dict = {
-                'id': str(product.id),
-                'name': product.name,
-                'category': product.category,
-                'price': product.price,
-                'original_price': product.original_price,
-                'description': product.description,
-                'image': product.get_image_urls(base_url),
-                'quantity': product.quantity,
-                'benefits': product.benefits,
-                'uses': product.uses,
-                'how_to_use': product.how_to_use,
-                'reviews': product.reviews
-            }
-            products_list.append(product_dict)
-        
         return jsonify({
             'success': True,
             'products': products_list,
-            'total': total,
-            'pages': (total + per_page - 1) // per_page,
-            'current_page': page
+            **pagination_meta(total, exact, page, per_page)
         }), 200
         
     except Exception as e:
@@ -66,6 +69,8 @@ def get_products():
         }), 500
 
 @market_bp.route('/categories', methods=['GET'])
+@conditional_get('market.categories', catalog_validators)
+@cached_json_response('market.categories', {})
 def get_categories():
     """Get all available categories for frontend use."""
     try:
@@ -94,73 +99,146 @@ def get_categories():
             'error': str(e)
         }), 500
 
+@market_bp.route('/search', methods=['GET'])
+def search_products():
+    """Search products and return category, price and rating facets."""
+    try:
+        base_url = request.host_url.rstrip('/')
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+        fields = parse_fields()
+
+        filters = SearchFilters.from_args(request.args)
+        rows, total, facets = faceted_search(
+            filters, page, per_page, PRODUCT_MARKET_SERIALIZER.projection(fields)
+        )
+
+        products_list = PRODUCT_MARKET_SERIALIZER.serialize_many(rows, fields, base_url=base_url)
+
+        return jsonify({
+            'success': True,
+            'products': products_list,
+            'facets': facets,
+            **pagination_meta(total, True, page, per_page)
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def _track_validators(**view_kwargs):
+    """
+    Conditional GET version for /track: the catalog version plus the time
+    the price trends behind ``demandTrend`` were computed, which changes
+    as the windows slide without any catalog write.
+    """
+    ensure_fresh_trends()
+    version, updated_at = catalog_validators()
+    computed_at = trends_computed_at()
+    token = f"{version}:{computed_at.isoformat() if computed_at else ''}"
+    return token, max(filter(None, (updated_at, computed_at)), default=None)
+
+def _demand_trend(category):
+    """Classify the 30-day price movement of a category (or the catalog)."""
+    if category == ALL:
+        trend = PriceTrend.objects(scope='overall', key='all').first()
+    else:
+        trend = PriceTrend.objects(scope='category', key=category).first()
+    change = ((trend.windows.get('30d') or {}).get('percentChange') if trend else None) or 0
+    if change > 2:
+        return 'increasing'
+    if change < -2:
+        return 'decreasing'
+    return 'stable'
+
+@market_bp.route('/trends', methods=['GET'])
+def get_trends():
+    """Get precomputed 7/30/90-day price trends per product and category."""
+    try:
+        product_id = request.args.get('product_id')
+        category = request.args.get('category')
+        window = request.args.get('window')
+        
+        if window and window.rstrip('d') not in {str(w) for w in WINDOWS}:
+            return jsonify({
+                'success': False,
+                'error': f"window must be one of {', '.join(f'{w}d' for w in WINDOWS)}"
+            }), 400
+        
+        ensure_fresh_trends()
+        
+        if product_id:
+            query = PriceTrend.objects(scope='product', key=product_id)
+        elif category and category != 'all':
+            query = PriceTrend.objects(scope__in=['category', 'product'], category=category)
+        else:
+            query = PriceTrend.objects(scope__in=['category', 'overall'])
+        
+        label = f"{window.rstrip('d')}d" if window else None
+        trends = []
+        for trend in query.as_pymongo():
+            windows = trend.get('windows') or {}
+            trends.append({
+                'scope': trend['scope'],
+                'key': trend['key'],
+                'category': trend.get('category'),
+                'windows': {label: windows.get(label)} if label else windows,
+                'computedAt': trend['computed_at'].isoformat() if trend.get('computed_at') else None
+            })
+        
+        if product_id and not trends:
+            return jsonify({'success': False, 'error': 'Product not found'}), 404
+        
+        return jsonify({
+            'success': True,
+            'trends': trends
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @market_bp.route('/track', methods=['GET'])
+@conditional_get('market.track', _track_validators)
 def track_market():
-    """Get market intelligence with optional category filtering."""
+    """Get market intelligence with optional category and region filtering."""
     try:
         # Get query parameters
         category = request.args.get('category')
         region = request.args.get('region', 'Luzon')
         
-        # Build base query using MongoEngine
-        query = Product.objects
-        
-        # Filter by category if provided
-        if category and category != 'all':
-            query = query.filter(category=category)
-        
-        # Get products for analysis
-        products = query.all()
+        # Single indexed read of the precomputed (category, region) rollup
+        rollup = get_market_rollup(category, region)
         
-        if not products:
+        if not rollup or not rollup.count:
             return jsonify({
                 'success': False,
                 'error': 'No products found for the specified criteria'
             }), 404
         
-        # Calculate market intelligence
-        total_products = len(products)
-        avg_price = sum(p.price for p in products) / total_products
-        min_price = min(p.price for p in products)
-        max_price = max(p.price for p in products)
-        
-        # Determine demand trend (mock logic based on price distribution)
-        if avg_price > 500:
-            demand_trend = 'high'
-        elif avg_price > 300:
-            demand_trend = 'moderate'
+        avg_price = rollup.price_sum / rollup.count
+        demand_trend = _demand_trend(rollup.category)
+        
+        if rollup.category == ALL:
+            category_breakdown = rollup.category_breakdown
         else:
-            demand_trend = 'increasing'
-        
-        # Get category breakdown
-        category_breakdown = {}
-        for product in products:
-            cat = product.category
-            if cat not in category_breakdown:
-                category_breakdown[cat] = {
-                    'count': 0,
-                    'avg_price': 0,
-                    'total_price': 0
-                }
-            category_breakdown[cat]['count'] += 1
-            category_breakdown[cat]['total_price'] += product.price
-        
-        # Calculate averages for each category
-        for cat in category_breakdown:
-            category_breakdown[cat]['avg_price'] = (
-                category_breakdown[cat]['total_price'] / category_breakdown[cat]['count']
-            )
-            del category_breakdown[cat]['total_price']  # Remove temporary field
+            category_breakdown = {
+                rollup.category: {'count': rollup.count, 'avg_price': avg_price}
+            }
         
         return jsonify({
             'success': True,
             'market_data': {
                 'region': region,
-                'total_products': total_products,
+                'total_products': rollup.count,
                 'average_price': round(avg_price, 2),
                 'price_range': {
-                    'min': min_price,
-                    'max': max_price
+                    'min': rollup.min_price,
+                    'max': rollup.max_price
                 },
                 'demand_trend': demand_trend,
                 'category_breakdown': category_breakdown,
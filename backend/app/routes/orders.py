@@ -3,8 +3,19 @@ Order API routes - saves checkout orders to MongoDB
 """
 
 import jwt
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from bson import ObjectId
 from app.models import Order, User
+from app.utils.catalog import record_popularity
+from app.utils.idempotency import idempotent
+from app.utils.order_listing import order_list_filter, parse_order_list_args, stream_orders
+from app.utils.order_queue import find_queued_order, flush_order, get_order_queue
+from app.utils.order_archive import find_archived_order
+from app.utils.pricing import parse_cart, price_cart
+from app.utils.stock import (
+    InsufficientStock, checkout_stock, release_reservation, reserve_stock, reopens_cancelled
+)
+from app.utils.serializers import ORDER_SERIALIZER, parse_fields
 from datetime import datetime
 
 orders_bp = Blueprint('orders', __name__)
@@ -29,97 +40,209 @@ def get_user_from_token():
     
     return None
 
+@orders_bp.route('/quote', methods=['POST'])
+def quote_order():
+    """
+    Price a cart from the catalog without placing an order.
+    
+    Request body: {"items": [{"id": "<productId>", "cartQuantity": 2}]}
+    """
+    try:
+        data = request.get_json() or {}
+        try:
+            quote = price_cart(data.get('items'), request.url_root.rstrip('/'))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        return jsonify({'success': True, 'quote': quote}), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@orders_bp.route('/reserve', methods=['POST'])
+def reserve_cart():
+    """
+    Hold stock for a cart during checkout (released automatically on expiry).
+    
+    Request body: {"items": [...], "reservationId": "<previous hold to replace>"}
+    """
+    try:
+        data = request.get_json() or {}
+        try:
+            cart = parse_cart(data.get('items'))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        if data.get('reservationId'):
+            release_reservation(data['reservationId'])
+        try:
+            reservation_id = reserve_stock(cart)
+        except InsufficientStock as e:
+            return jsonify({'success': False, 'error': 'Insufficient stock', 'outOfStock': e.product_ids}), 409
+        return jsonify({
+            'success': True,
+            'reservationId': reservation_id,
+            'ttlSeconds': current_app.config.get('STOCK_RESERVATION_TTL_SECONDS', 900)
+        }), 201
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@orders_bp.route('/reserve/<string:reservation_id>', methods=['DELETE'])
+def release_cart(reservation_id):
+    """Release a checkout stock hold early."""
+    try:
+        return jsonify({'success': True, 'released': release_reservation(reservation_id)}), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @orders_bp.route('/create', methods=['POST'])
+@idempotent('orders.create')
 def create_order():
     """
     Create a new order from cart checkout.
     
+    Item prices and the total are computed server-side from the catalog;
+    client-sent prices and totalAmount are ignored.
+    
+    Retries that send the same Idempotency-Key header get the original
+    response back instead of creating another order.
+    
     Request body:
     {
         "userName": "John Doe",
         "userPhone": "+63912345678",
         "deliveryAddress": "123 Manila St, QC",
         "paymentMethod": "cod|gcash|card",
-        "totalAmount": 948.00,
         "items": [
-            {"id": 1, "name": "Product", "price": 100, "cartQuantity": 2}
-        ]
+            {"id": "<productId>", "cartQuantity": 2}
+        ],
+        "reservationId": "<optional id from /reserve>"
     }
     """
     try:
         data = request.get_json()
         
         # Validate required fields
-        required = ['userName', 'userPhone', 'deliveryAddress', 'paymentMethod', 'totalAmount', 'items']
+        required = ['userName', 'userPhone', 'deliveryAddress', 'paymentMethod', 'items']
         if not all(k in data for k in required):
             return jsonify({'error': 'Missing required fields'}), 400
         
+        try:
+            quote = price_cart(data['items'], request.url_root.rstrip('/'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if quote['unavailable']:
+            return jsonify({
+                'error': 'Some products are no longer available',
+                'unavailable': quote['unavailable']
+            }), 400
+        
         # Get authenticated user ID
         user = get_user_from_token()
         user_id = str(user.id) if user else None
         
         # Create order
         order = Order(
+            id=ObjectId(),
             user_id=user_id,
             user_name=data['userName'],
             user_phone=data['userPhone'],
             delivery_address=data['deliveryAddress'],
             payment_method=data['paymentMethod'],
-            total_amount=data['totalAmount'],
-            items=data['items'],
+            total_amount=quote['total'],
+            items=quote['lines'],
             status='pending'
         )
         
-        order.save()
+        # Take stock all-or-nothing before the order is written
+        cart = [(line['id'], line['cartQuantity']) for line in quote['lines']]
+        try:
+            reservation_id = checkout_stock(cart, str(order.id), data.get('reservationId'))
+        except InsufficientStock as e:
+            return jsonify({'error': 'Insufficient stock', 'outOfStock': e.product_ids}), 409
+        
+        # In queue mode the order is acknowledged once it is durably queued;
+        # the flusher writes it to Mongo and records popularity
+        queue = get_order_queue()
+        try:
+            if queue:
+                order.validate()
+                queue.enqueue(order.to_mongo().to_dict())
+            else:
+                order.save()
+        except Exception:
+            if reservation_id:
+                release_reservation(reservation_id, committed=True)
+            raise
+        if not queue:
+            # Best effort: the order is saved and its stock taken, so a
+            # failure here must not turn into a 5xx the client retries
+            try:
+                record_popularity(order.items)
+            except Exception as e:
+                print(f"Popularity update for order {order.id} failed: {str(e)}")
         
         return jsonify({
             'success': True,
             'orderId': str(order.id),
-            'order': order.to_dict()
-        }), 201
+            'order': order.to_dict(),
+            'queued': queue is not None,
+            'pricing': {k: quote[k] for k in ('itemCount', 'subtotal', 'discount', 'total')}
+        }), 202 if queue else 201
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _order_listing(user_id=None):
+    """Stream a filtered, keyset-paginated order list as a JSON array."""
+    try:
+        params = parse_order_list_args(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    query = order_list_filter(
+        user_id, params['statuses'], params['since'], params['until'], params['after']
+    )
+    return Response(
+        # A customer's own history includes their archived orders
+        stream_with_context(stream_orders(
+            query, parse_fields(), params['limit'], include_archived=user_id is not None
+        )),
+        mimetype='application/json'
+    )
+
 @orders_bp.route('/my', methods=['GET'])
 def my_orders():
-    """Get orders for the logged-in user."""
+    """
+    Get orders for the logged-in user, newest first.
+    
+    Query: status (comma-separated), since/until (ISO dates), limit, cursor, fields.
+    """
     try:
         user = get_user_from_token()
         if not user:
             return jsonify({'error': 'Unauthorized'}), 401
-        
-        # Fetch orders for this user
-        orders = Order.objects(user_id=str(user.id)).order_by('-created_at')
-        
-        return jsonify({
-            'success': True,
-            'count': orders.count(),
-            'orders': [o.to_dict() for o in orders]
-        }), 200
+        return _order_listing(str(user.id))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @orders_bp.route('/list', methods=['GET'])
 def list_orders():
-    """Get all orders."""
+    """Get all orders, newest first (same query parameters as /my)."""
     try:
-        orders = Order.objects.order_by('-created_at')
-        return jsonify({
-            'success': True,
-            'count': orders.count(),
-            'orders': [o.to_dict() for o in orders]
-        }), 200
+        return _order_listing()
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @orders_bp.route('/<string:order_id>', methods=['GET'])
 def get_order(order_id):
-    """Get a specific order by ID."""
+    """Get a specific order by ID (including queued and archived orders)."""
     try:
+        queued = find_queued_order(order_id)
+        if queued is not None:
+            return jsonify({'success': True, 'order': ORDER_SERIALIZER.serialize(queued), 'queued': True}), 200
         order = Order.objects(id=order_id).first()
         if not order:
-            return jsonify({'error': 'Order not found'}), 404
+            archived = find_archived_order(order_id)
+            if archived is None:
+                return jsonify({'error': 'Order not found'}), 404
+            return jsonify({'success': True, 'order': ORDER_SERIALIZER.serialize(archived), 'archived': True}), 200
         return jsonify({'success': True, 'order': order.to_dict()}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -128,12 +251,15 @@ def get_order(order_id):
 def update_order_status(order_id):
     """Update order status."""
     try:
+        flush_order(order_id)
         order = Order.objects(id=order_id).first()
         if not order:
             return jsonify({'error': 'Order not found'}), 404
         
         data = request.get_json()
         if 'status' in data:
+            if reopens_cancelled(order.status, data['status']):
+                return jsonify({'error': 'Cancelled orders cannot be reopened'}), 409
             order.status = data['status']
             order.save()
         
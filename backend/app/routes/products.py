@@ -5,32 +5,48 @@ Accessible to all users for browsing products
 
 from flask import Blueprint, request, jsonify
 from app.models import Product, ProductCategory
+from app.utils.counts import resolve_total, pagination_meta
+from app.utils.serializers import PRODUCT_SERIALIZER, parse_fields
+from app.utils.response_cache import cached_json_response
+from app.utils.conditional import conditional_get
+from app.utils.catalog import catalog_validators, get_products_by_ids
+from app.utils.reviews import product_review_page, product_reviews_version
+from app.utils.recommendations import get_recommendations, TOP_K
+from app.utils.catalog_search import filter_products, PRODUCT_SORTS, DEFAULT_SORT
 
 products_bp = Blueprint('products', __name__, url_prefix='/api/products')
 
 @products_bp.route('/', methods=['GET'])
 @products_bp.route('', methods=['GET'])
+@conditional_get('products.list', catalog_validators)
+@cached_json_response('products.list', {
+    'category': 'all', 'search': '', 'page': '1', 'per_page': '20',
+    'min_price': '', 'max_price': '', 'sort': DEFAULT_SORT,
+    'count': '', 'fields': ''
+})
 def get_products():
-    """Get all products with optional filtering."""
+    """Get all products with optional filtering and sorting."""
     try:
         # Query parameters
         category = request.args.get('category')
         search = request.args.get('search')
+        min_price = request.args.get('min_price', type=float)
+        max_price = request.args.get('max_price', type=float)
+        sort = request.args.get('sort') or DEFAULT_SORT
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
 
-        # Build query
-        query = Product.objects
+        if sort not in PRODUCT_SORTS:
+            return jsonify({
+                'success': False,
+                'error': f"sort must be one of {', '.join(PRODUCT_SORTS)}"
+            }), 400
 
-        # Filter by category
-        if category and category != 'all':
-            query = query.filter(category=category)
+        query = filter_products(
+            Product.objects, category, min_price, max_price, search, sort
+        )
 
-        # Search functionality
-        if search:
-            query = query.filter(name__icontains=search)
-
-        total = query.count()
+        total, exact = resolve_total(query)
         products = query.skip((page - 1) * per_page).limit(per_page)
 
         # Construct base URL for image URLs
@@ -38,16 +54,18 @@ def get_products():
 
         return jsonify({
             'success': True,
-            'products': [p.to_dict(base_url) for p in products],
-            'total': total,
-            'pages': (total + per_page - 1) // per_page,
-            'current_page': page
+            'products': PRODUCT_SERIALIZER.serialize_queryset(
+                products, parse_fields(), base_url=base_url
+            ),
+            **pagination_meta(total, exact, page, per_page)
         }), 200
 
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @products_bp.route('/categories', methods=['GET'])
+@conditional_get('products.categories', catalog_validators)
+@cached_json_response('products.categories', {})
 def get_categories():
     """Get all product categories for filtering."""
     try:
@@ -61,7 +79,49 @@ def get_categories():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+MAX_BATCH_IDS = 300
+
+def _batch_response(ids):
+    ids = [str(i).strip() for i in ids if str(i).strip()]
+    if not ids:
+        return jsonify({'success': False, 'error': 'ids is required'}), 400
+    if len(ids) > MAX_BATCH_IDS:
+        return jsonify({
+            'success': False,
+            'error': f'At most {MAX_BATCH_IDS} ids per request'
+        }), 400
+
+    base_url = request.url_root.rstrip('/') if request.url_root else 'https://nutrilea-backend.onrender.com'
+    products, missing = get_products_by_ids(ids, base_url)
+    return jsonify({
+        'success': True,
+        'products': products,
+        'missing': missing
+    }), 200
+
+@products_bp.route('/batch', methods=['GET'])
+@conditional_get('products.batch', catalog_validators)
+def get_products_batch():
+    """Get several products by ID: /api/products/batch?ids=a,b,c"""
+    try:
+        return _batch_response((request.args.get('ids') or '').split(','))
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@products_bp.route('/batch', methods=['POST'])
+def post_products_batch():
+    """Get several products by ID from a JSON body: {"ids": [...]}"""
+    try:
+        data = request.get_json(silent=True) or {}
+        ids = data.get('ids')
+        if not isinstance(ids, list):
+            return jsonify({'success': False, 'error': 'ids must be a list'}), 400
+        return _batch_response(ids)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @products_bp.route('/<string:product_id>', methods=['GET'])
+@conditional_get('products.detail', catalog_validators)
 def get_product(product_id):
     """Get a single product by ID."""
     try:
@@ -77,3 +137,54 @@ def get_product(product_id):
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
+
+@products_bp.route('/<string:product_id>/detail', methods=['GET'])
+@conditional_get('products.detail_bundle', product_reviews_version)
+def get_product_detail(product_id):
+    """Get a product with its rating summary and first page of reviews."""
+    try:
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 10, type=int), 1), 50)
+        base_url = request.url_root.rstrip('/') if request.url_root else 'https://nutrilea-backend.onrender.com'
+
+        products, _ = get_products_by_ids([product_id], base_url)
+        product = products.get(product_id)
+        if not product:
+            return jsonify({'success': False, 'error': 'Product not found'}), 404
+
+        summary, reviews = product_review_page(product_id, product['name'], page, per_page)
+
+        return jsonify({
+            'success': True,
+            'product': product,
+            'rating': summary,
+            'reviews': reviews,
+            **pagination_meta(summary['count'], True, page, per_page)
+        }), 200
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@products_bp.route('/<string:product_id>/recommendations', methods=['GET'])
+def get_product_recommendations(product_id):
+    """Get products frequently bought together with this one."""
+    try:
+        limit = min(max(request.args.get('limit', TOP_K, type=int), 1), TOP_K)
+        base_url = request.url_root.rstrip('/') if request.url_root else 'https://nutrilea-backend.onrender.com'
+
+        neighbours = get_recommendations(product_id, limit)
+        products, _ = get_products_by_ids([n['productId'] for n in neighbours], base_url)
+
+        recommendations = [
+            dict(products[n['productId']], score=n['score'], coPurchases=n['count'])
+            for n in neighbours if n['productId'] in products
+        ]
+
+        return jsonify({
+            'success': True,
+            'productId': product_id,
+            'recommendations': recommendations
+        }), 200
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
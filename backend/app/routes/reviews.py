@@ -4,7 +4,10 @@ Review API routes - handle review submission and retrieval
 
 import jwt
 from flask import Blueprint, request, jsonify, current_app
-from app.models import Review, Product, User, Order
+from app.models import Review, Product, User
+from app.utils.conditional import conditional_get
+from app.utils.purchases import has_purchased
+from app.utils.reviews import product_reviews_version, serialize_reviews
 from datetime import datetime
 
 reviews_bp = Blueprint('reviews', __name__)
@@ -32,19 +35,8 @@ def get_user_from_token():
 def user_has_purchased_product(user_id, product_id):
     """Check if user has completed an order containing this product."""
     try:
-        # Find all orders for this user
-        orders = Order.objects(user_id=user_id, status='completed')
-        
-        for order in orders:
-            # Check if any item in the order matches this product
-            if order.items:
-                for item in order.items:
-                    # item.id might be string or int
-                    if str(item.get('id')) == str(product_id):
-                        return True
-        
-        return False
-    except:
+        return has_purchased(user_id, product_id)
+    except Exception:
         return False
 
 @reviews_bp.route('/submit', methods=['POST'])
@@ -119,6 +111,7 @@ def submit_review():
         return jsonify({'error': str(e)}), 500
 
 @reviews_bp.route('/product/<string:product_id>', methods=['GET'])
+@conditional_get('reviews.product', product_reviews_version)
 def get_product_reviews(product_id):
     """Get all active reviews for a product."""
     try:
@@ -136,7 +129,7 @@ def get_product_reviews(product_id):
             'success': True,
             'productId': product_id,
             'count': reviews.count(),
-            'reviews': [r.to_dict() for r in reviews]
+            'reviews': serialize_reviews(reviews)
         }), 200
     
     except Exception as e:
@@ -0,0 +1,191 @@
+"""
+Catalog version tracking.
+
+Every product or category write bumps a version counter persisted in the
+``data_versions`` collection, so caches in any worker process can key on
+the current catalog version instead of being invalidated explicitly.
+Workers re-read the counter at most once per CATALOG_VERSION_TTL seconds.
+
+Bulk operations should wrap their writes in ``catalog_batch()`` so the
+version moves once per batch instead of once per document.
+
+Serialized products are also kept in a per-worker lookup cache tagged
+with the catalog version, so batch lookups only query for ids not seen
+since the last catalog write.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from bson import ObjectId
+from mongoengine import signals
+from pymongo import UpdateOne
+from app.models import DataVersion, Product, ProductCategory
+from app.utils.serializers import PRODUCT_SERIALIZER
+
+CATALOG_KEY = 'catalog'
+CATALOG_VERSION_TTL = 1.0  # seconds
+PRODUCT_CACHE_MAX_ENTRIES = 5000
+POPULARITY_VERSION_INTERVAL = 30.0  # seconds between popularity-driven bumps per worker
+
+_lock = threading.Lock()
+_local = threading.local()
+_state = {'version': None, 'updated_at': None, 'checked_at': 0.0}
+_products = {'version': None, 'entries': {}}  # (base_url, id) -> product dict
+_popularity = {'bumped_at': 0.0, 'timer': None}
+
+
+def _store(doc):
+    with _lock:
+        _state['version'] = doc.version if doc else 0
+        _state['updated_at'] = doc.updated_at if doc else None
+        _state['checked_at'] = time.monotonic()
+
+
+def _refresh():
+    _store(DataVersion.objects(key=CATALOG_KEY).first())
+
+
+def get_catalog_version():
+    """Current catalog version, re-read from MongoDB at most once per TTL."""
+    if time.monotonic() - _state['checked_at'] > CATALOG_VERSION_TTL:
+        _refresh()
+    return _state['version']
+
+
+def get_catalog_updated_at():
+    """Time of the last catalog write, if known."""
+    get_catalog_version()
+    return _state['updated_at']
+
+
+def bump_catalog_version():
+    """Advance the catalog version (no-op inside ``catalog_batch``)."""
+    if getattr(_local, 'batch_depth', 0):
+        _local.dirty = True
+        return
+    DataVersion.objects(key=CATALOG_KEY).update_one(
+        inc__version=1,
+        set__updated_at=datetime.utcnow(),
+        upsert=True
+    )
+    _refresh()
+
+
+def catalog_validators(**view_kwargs):
+    """Conditional GET version for views that only read catalog data."""
+    return get_catalog_version(), get_catalog_updated_at()
+
+
+def get_products_by_ids(ids, base_url=None):
+    """
+    Serialized products for ``ids``, served from the lookup cache where
+    possible and otherwise fetched with a single ``$in`` query.
+
+    Returns ``(products_by_id, missing_ids)``; malformed ids are missing.
+    """
+    version = get_catalog_version()
+    with _lock:
+        if _products['version'] != version:
+            _products['version'] = version
+            _products['entries'] = {}
+        entries = _products['entries']
+        found = {}
+        wanted = []
+        for product_id in dict.fromkeys(ids):
+            cached = entries.get((base_url, product_id))
+            if cached is not None:
+                found[product_id] = cached
+            elif ObjectId.is_valid(product_id):
+                wanted.append(product_id)
+
+    if wanted:
+        rows = Product.objects(id__in=wanted)
+        fetched = {
+            p['id']: p for p in PRODUCT_SERIALIZER.serialize_queryset(rows, base_url=base_url)
+        }
+        found.update(fetched)
+        with _lock:
+            if _products['version'] == version:
+                if len(_products['entries']) + len(fetched) > PRODUCT_CACHE_MAX_ENTRIES:
+                    _products['entries'] = {}
+                for product_id, product in fetched.items():
+                    _products['entries'][(base_url, product_id)] = product
+
+    missing = [i for i in dict.fromkeys(ids) if i not in found]
+    return found, missing
+
+
+def _bump_for_popularity():
+    """
+    Bump the version after a popularity change, at most once per
+    POPULARITY_VERSION_INTERVAL: changes inside the interval are folded
+    into one trailing bump, so order bursts do not thrash the caches.
+    """
+    with _lock:
+        if _popularity['timer'] is not None:
+            return  # A trailing bump is already scheduled
+        wait = _popularity['bumped_at'] + POPULARITY_VERSION_INTERVAL - time.monotonic()
+        if wait > 0:
+            timer = threading.Timer(wait, _trailing_popularity_bump)
+            timer.daemon = True
+            _popularity['timer'] = timer
+            timer.start()
+            return
+        _popularity['bumped_at'] = time.monotonic()
+    bump_catalog_version()
+
+
+def _trailing_popularity_bump():
+    with _lock:
+        _popularity['timer'] = None
+        _popularity['bumped_at'] = time.monotonic()
+    try:
+        bump_catalog_version()
+    except Exception as e:
+        print(f"Catalog version bump for popularity failed: {str(e)}")
+
+
+def record_popularity(items):
+    """
+    Add ordered quantities to each product's denormalised popularity.
+
+    The raw ``$inc`` bypasses the product signals, so the catalog version
+    is bumped here (coalesced) for popularity-sorted cached listings.
+    """
+    units = {}
+    for item in items or []:
+        product_id = str(item.get('id', ''))
+        if ObjectId.is_valid(product_id):
+            units[product_id] = units.get(product_id, 0) + int(item.get('cartQuantity', 1) or 1)
+    if units:
+        Product._get_collection().bulk_write([
+            UpdateOne({'_id': ObjectId(pid)}, {'$inc': {'popularity': qty}})
+            for pid, qty in units.items()
+        ], ordered=False)
+        _bump_for_popularity()
+
+
+@contextmanager
+def catalog_batch():
+    """Coalesce all catalog writes in the block into one version bump."""
+    _local.batch_depth = getattr(_local, 'batch_depth', 0) + 1
+    try:
+        yield
+    finally:
+        _local.batch_depth -= 1
+        if not _local.batch_depth and getattr(_local, 'dirty', False):
+            _local.dirty = False
+            bump_catalog_version()
+
+
+def _on_catalog_write(sender, document, **kwargs):
+    bump_catalog_version()
+
+
+for _document_cls in (Product, ProductCategory):
+    signals.post_save.connect(_on_catalog_write, sender=_document_cls, weak=False)
+    signals.post_delete.connect(_on_catalog_write, sender=_document_cls, weak=False)
+
@@ -0,0 +1,221 @@
+"""
+Streaming NDJSON import/export of the product catalog.
+
+Export walks a projected cursor and yields one JSON line per product, so
+memory stays constant however large the catalog is.
+
+Import reads lines lazily, validates them in chunks and applies each
+chunk with one ``bulk_write`` of upserts keyed by product name. Image
+references are normalised and price changes are recorded in bulk as the
+single-product admin routes would. Each chunk bumps the catalog version
+once; cached totals and market rollups are refreshed once at the end.
+"""
+
+import json
+import time
+from datetime import datetime
+
+from pymongo import UpdateOne
+from app.models import Product
+from app.utils.catalog import catalog_batch, bump_catalog_version
+from app.utils.counts import invalidate_counts
+from app.utils.images import normalize_image_keys, precompute_image_urls
+from app.utils.market_rollups import refresh_market_rollups
+from app.utils.price_analytics import record_prices
+from app.utils.stock import parse_stock
+
+EXPORT_FIELDS = (
+    'name', 'category', 'price', 'original_price', 'description', 'image',
+    'quantity', 'benefits', 'uses', 'how_to_use', 'region', 'stock'
+)
+LIST_FIELDS = ('image', 'benefits', 'uses', 'how_to_use')
+STRING_FIELDS = ('description', 'quantity', 'region')
+DEFAULT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+
+
+def export_products_ndjson(category=None, batch_size=DEFAULT_CHUNK_SIZE):
+    """Yield the catalog as NDJSON lines."""
+    query = {'category': category} if category and category != 'all' else {}
+    projection = {field: 1 for field in EXPORT_FIELDS}
+    projection['_id'] = 0
+    cursor = Product._get_collection().find(query, projection).sort('name', 1).batch_size(batch_size)
+    for doc in cursor:
+        row = {field: doc.get(field) for field in EXPORT_FIELDS}
+        for field in LIST_FIELDS:
+            row[field] = row[field] or []
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def _validate(row):
+    """Return the fields to store for one import row, or raise ValueError."""
+    if not isinstance(row, dict):
+        raise ValueError('row must be a JSON object')
+    unknown = set(row) - set(EXPORT_FIELDS)
+    if unknown:
+        raise ValueError(f"unknown field(s): {', '.join(sorted(unknown))}")
+
+    name = row.get('name')
+    if not isinstance(name, str) or not name.strip() or len(name) > 255:
+        raise ValueError('name is required (max 255 characters)')
+    category = row.get('category')
+    if not isinstance(category, str) or not category.strip() or len(category) > 100:
+        raise ValueError('category is required (max 100 characters)')
+
+    values = {'name': name.strip(), 'category': category.strip()}
+    if row.get('price') is None:
+        raise ValueError('price is required')
+    for field in ('price', 'original_price'):
+        if field not in row:
+            continue
+        value = row[field]
+        if value is None:
+            values[field] = None
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            raise ValueError(f'{field} must be a non-negative number')
+        values[field] = float(value)
+
+    for field in LIST_FIELDS:
+        if field not in row:
+            continue
+        value = row[field] or []
+        if isinstance(value, str):
+            value = [value]
+        if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+            raise ValueError(f'{field} must be a list of strings')
+        values[field] = value
+    for field in STRING_FIELDS:
+        if field in row:
+            if row[field] is not None and not isinstance(row[field], str):
+                raise ValueError(f'{field} must be a string')
+            values[field] = row[field] or None
+
+    if 'stock' in row:
+        values['stock'] = parse_stock(row['stock'])
+
+    if 'image' in values:
+        values['image'] = normalize_image_keys(values['image'])
+        values['image_urls'] = precompute_image_urls(values['image'])
+    return values
+
+
+class ImportReport:
+    """Counters and per-row errors for one import run."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.processed = 0
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.error_count = 0
+        self.errors = []
+        self.categories = set()
+
+    def error(self, line, message, name=None):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'name': name, 'error': message})
+
+    def to_dict(self):
+        seconds = time.perf_counter() - self.started
+        return {
+            'processed': self.processed,
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'errorCount': self.error_count,
+            'errors': self.errors,
+            'seconds': round(seconds, 3),
+            'rowsPerSecond': round(self.processed / seconds, 1) if seconds else None
+        }
+
+
+def _apply_chunk(chunk, report, dry_run):
+    """Upsert one chunk of validated rows (``{name: (line, values)}``)."""
+    collection = Product._get_collection()
+    existing = {
+        doc['name']: doc for doc in collection.find(
+            {'name': {'$in': list(chunk)}},
+            {'name': 1, 'category': 1, 'region': 1, 'price': 1, 'original_price': 1}
+        )
+    }
+    now = datetime.utcnow()
+    ops = []
+    for name, (_, values) in chunk.items():
+        report.categories.add(values['category'])
+        previous = existing.get(name)
+        if previous:
+            report.categories.add(previous.get('category'))
+        ops.append(UpdateOne(
+            {'name': name},
+            {'$set': values, '$setOnInsert': {'created_at': now}},
+            upsert=True
+        ))
+    if dry_run:
+        report.inserted += len(chunk) - len(existing)
+        report.updated += len(existing)
+        return
+
+    with catalog_batch():
+        result = collection.bulk_write(ops, ordered=False)
+        bump_catalog_version()
+    report.inserted += result.upserted_count
+    report.updated += result.modified_count
+    report.unchanged += result.matched_count - result.modified_count
+
+    # Price history for new products and changed prices
+    changed = [
+        name for name, (_, values) in chunk.items()
+        if name not in existing or (existing[name].get('price'), existing[name].get('original_price'))
+        != (values['price'], values.get('original_price', existing[name].get('original_price')))
+    ]
+    if changed:
+        rows = collection.find(
+            {'name': {'$in': changed}},
+            {'_id': 1, 'category': 1, 'price': 1, 'original_price': 1}
+        )
+        record_prices([
+            {'product_id': r['_id'], 'category': r.get('category'),
+             'price': r['price'], 'original_price': r.get('original_price')}
+            for r in rows
+        ], now)
+
+
+def import_products_ndjson(lines, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False):
+    """
+    Import NDJSON lines (str or bytes). Later rows for the same name win.
+
+    Returns a report dict with counts, per-row errors and throughput.
+    """
+    report = ImportReport()
+    chunk = {}
+    for number, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line.strip():
+            continue
+        report.processed += 1
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            report.error(number, f'invalid JSON: {str(e)}')
+            continue
+        try:
+            values = _validate(row)
+        except ValueError as e:
+            report.error(number, str(e), row.get('name') if isinstance(row, dict) else None)
+            continue
+        chunk.pop(values['name'], None)
+        chunk[values['name']] = (number, values)
+        if len(chunk) >= chunk_size:
+            _apply_chunk(chunk, report, dry_run)
+            chunk = {}
+    if chunk:
+        _apply_chunk(chunk, report, dry_run)
+
+    if not dry_run and (report.inserted or report.updated):
+        invalidate_counts(Product._get_collection_name())
+        refresh_market_rollups(report.categories - {None})
+    return report.to_dict()
@@ -0,0 +1,183 @@
+"""
+Product listing filters and faceted catalog search.
+
+Listings support price ranges and a fixed set of sort orders, each backed
+by one of the indexes declared on ``Product``.
+
+A single ``$facet`` aggregation returns the requested page of products
+together with category counts, a price histogram and rating buckets.
+Each facet is computed with every active filter except its own, so the
+counts show what selecting another value would return (the usual
+"drill-sideways" behaviour of faceted navigation).
+"""
+
+import re
+
+from app.models import Product
+
+PRICE_BOUNDARIES = [0, 100, 250, 500, 1000]
+RATING_BOUNDARIES = [1, 2, 3, 4, 5, 6]
+ABOVE = 'above'
+UNRATED = 'unrated'
+
+PRODUCT_SORTS = {
+    'newest': ('-created_at',),
+    'price': ('price',),
+    '-price': ('-price',),
+    'rating': ('-rating_average',),
+    'popularity': ('-popularity',),
+}
+DEFAULT_SORT = 'newest'
+
+
+def filter_products(query, category=None, min_price=None, max_price=None,
+                    search=None, sort=DEFAULT_SORT):
+    """Apply the listing filters and sort order to a Product queryset."""
+    if category and category != 'all':
+        query = query.filter(category=category)
+    if min_price is not None:
+        query = query.filter(price__gte=min_price)
+    if max_price is not None:
+        query = query.filter(price__lte=max_price)
+    if search:
+        query = query.filter(name__icontains=search)
+    return query.order_by(*PRODUCT_SORTS[sort])
+
+
+class SearchFilters:
+    """Parsed search filters; each one is a separate ``$match`` clause."""
+
+    def __init__(self, categories=None, min_price=None, max_price=None,
+                 min_rating=None, search=None):
+        self.categories = [c for c in (categories or []) if c and c != 'all']
+        self.min_price = min_price
+        self.max_price = max_price
+        self.min_rating = min_rating
+        self.search = (search or '').strip()
+
+    @classmethod
+    def from_args(cls, args):
+        category = args.get('category') or ''
+        return cls(
+            categories=[c.strip() for c in category.split(',')],
+            min_price=args.get('min_price', type=float),
+            max_price=args.get('max_price', type=float),
+            min_rating=args.get('min_rating', type=float),
+            search=args.get('search')
+        )
+
+    def base_match(self):
+        """Filters applied before the facets (never a facet themselves)."""
+        if not self.search:
+            return {}
+        return {'name': {'$regex': re.escape(self.search), '$options': 'i'}}
+
+    def clauses(self):
+        """Facet-able filters keyed by the facet that owns them."""
+        clauses = {}
+        if self.categories:
+            clauses['category'] = {'category': {'$in': self.categories}}
+        price = {}
+        if self.min_price is not None:
+            price['$gte'] = self.min_price
+        if self.max_price is not None:
+            price['$lte'] = self.max_price
+        if price:
+            clauses['price'] = {'price': price}
+        if self.min_rating is not None:
+            clauses['rating'] = {'rating_average': {'$gte': self.min_rating},
+                                 'rating_count': {'$gt': 0}}
+        return clauses
+
+
+def _match(clauses, exclude=None):
+    selected = [c for name, c in clauses.items() if name != exclude]
+    if not selected:
+        return []
+    return [{'$match': {'$and': selected}}]
+
+
+def build_search_pipeline(filters, page, per_page, projection=None):
+    clauses = filters.clauses()
+    pipeline = []
+    base = filters.base_match()
+    if base:
+        pipeline.append({'$match': base})
+
+    page_stages = [{'$sort': {'created_at': -1, '_id': -1}},
+                   {'$skip': (page - 1) * per_page},
+                   {'$limit': per_page}]
+    if projection:
+        page_stages.append({'$project': projection})
+
+    pipeline.append({'$facet': {
+        'products': _match(clauses) + page_stages,
+        'total': _match(clauses) + [{'$count': 'count'}],
+        'categories': _match(clauses, 'category') + [
+            {'$group': {'_id': '$category', 'count': {'$sum': 1}}},
+            {'$sort': {'count': -1, '_id': 1}}
+        ],
+        'price': _match(clauses, 'price') + [
+            {'$bucket': {
+                'groupBy': '$price',
+                'boundaries': PRICE_BOUNDARIES,
+                'default': ABOVE,
+                'output': {'count': {'$sum': 1}}
+            }}
+        ],
+        'rating': _match(clauses, 'rating') + [
+            {'$bucket': {
+                # Unreviewed products fall below the first boundary
+                'groupBy': {'$cond': [
+                    {'$gt': [{'$ifNull': ['$rating_count', 0]}, 0]},
+                    '$rating_average',
+                    0
+                ]},
+                'boundaries': RATING_BOUNDARIES,
+                'default': UNRATED,
+                'output': {'count': {'$sum': 1}}
+            }}
+        ]
+    }})
+    return pipeline
+
+
+def _price_buckets(rows):
+    counts = {row['_id']: row['count'] for row in rows}
+    buckets = []
+    for low, high in zip(PRICE_BOUNDARIES, PRICE_BOUNDARIES[1:]):
+        buckets.append({'min': low, 'max': high, 'count': counts.get(low, 0)})
+    buckets.append({'min': PRICE_BOUNDARIES[-1], 'max': None, 'count': counts.get(ABOVE, 0)})
+    return buckets
+
+
+def _rating_buckets(rows):
+    counts = {row['_id']: row['count'] for row in rows}
+    buckets = [
+        {'rating': low, 'count': counts.get(low, 0)}
+        for low in RATING_BOUNDARIES[:-1]
+    ]
+    buckets.append({'rating': None, 'count': counts.get(UNRATED, 0)})
+    return buckets
+
+
+def faceted_search(filters, page=1, per_page=20, projection=None):
+    """
+    Run the search in one round trip.
+
+    Returns ``(products, total, facets)`` where ``products`` are raw
+    documents.
+    """
+    result = next(Product._get_collection().aggregate(
+        build_search_pipeline(filters, page, per_page, projection)
+    ))
+    total = result['total'][0]['count'] if result['total'] else 0
+    facets = {
+        'categories': [
+            {'value': row['_id'] or 'Uncategorized', 'count': row['count']}
+            for row in result['categories']
+        ],
+        'price': _price_buckets(result['price']),
+        'rating': _rating_buckets(result['rating'])
+    }
+    return result['products'], total, facets
@@ -0,0 +1,92 @@
+"""
+Conditional GET support (ETag / If-None-Match / Last-Modified).
+
+ETags are derived from data versions (catalog version, thread
+``updated_at``, review counts) rather than from hashing the response body,
+so a view's version function runs first and a 304 is returned before the
+view's own query runs.
+
+Version functions receive the view's URL arguments and return
+``(token, last_modified)``, or None to skip conditional handling (for
+example when the resource does not exist and the view should 404).
+"""
+
+import hashlib
+import threading
+from functools import wraps
+
+from flask import request, current_app, Response
+
+MAX_TRACKED_SIZES = 4096
+
+_lock = threading.Lock()
+_stats = {}  # route -> {'requests', 'notModified', 'bytesSaved'}
+_sizes = {}  # (route, etag) -> last full body size
+
+
+def _route_stats(route):
+    return _stats.setdefault(route, {'requests': 0, 'notModified': 0, 'bytesSaved': 0})
+
+
+def make_etag(route, token):
+    return hashlib.sha1(f"{route}:{token}".encode('utf-8')).hexdigest()[:20]
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+
+def _set_validators(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'no-cache'
+
+
+def conditional_get(route, version_fn):
+    """Answer 304 from a data version before running the wrapped view."""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            version = version_fn(**kwargs)
+            if version is None:
+                return f(*args, **kwargs)
+            token, last_modified = version
+            etag = make_etag(route, token)
+
+            if _not_modified(etag, last_modified):
+                with _lock:
+                    stats = _route_stats(route)
+                    stats['requests'] += 1
+                    stats['notModified'] += 1
+                    stats['bytesSaved'] += _sizes.get((route, etag), 0)
+                response = Response(status=304)
+                _set_validators(response, etag, last_modified)
+                return response
+
+            response = current_app.make_response(f(*args, **kwargs))
+            with _lock:
+                _route_stats(route)['requests'] += 1
+                if response.status_code == 200 and response.content_length:
+                    if len(_sizes) >= MAX_TRACKED_SIZES:
+                        _sizes.clear()
+                    _sizes[(route, etag)] = response.content_length
+            if response.status_code == 200:
+                _set_validators(response, etag, last_modified)
+            return response
+        return decorated_function
+    return decorator
+
+
+def conditional_get_stats():
+    """Per-route 304 ratio and estimated bytes saved for this worker."""
+    with _lock:
+        routes = {}
+        for route, s in _stats.items():
+            ratio = s['notModified'] / s['requests'] if s['requests'] else 0.0
+            routes[route] = dict(s, notModifiedRatio=round(ratio, 3))
+        return routes
@@ -0,0 +1,114 @@
+"""
+Total-count service for paginated listings.
+
+Counting the filtered set on every request is often more expensive than
+fetching the page itself, so totals are resolved according to the
+``count`` query parameter:
+
+    exact     - run a fresh count() over the filtered queryset
+    estimate  - unfiltered: collection metadata (estimated_document_count)
+                filtered:   cached count per (collection, filter), short TTL
+    none      - skip counting entirely
+
+Cached totals are dropped whenever a document in the collection is saved
+or deleted through MongoEngine. Bulk writes that bypass the document
+signals must call ``invalidate_counts`` themselves.
+"""
+
+import threading
+import time
+
+from bson import json_util
+from flask import request
+from mongoengine import signals
+
+COUNT_MODES = ('exact', 'estimate', 'none')
+DEFAULT_COUNT_MODE = 'estimate'
+COUNT_CACHE_TTL = 30  # seconds
+COUNT_CACHE_MAX_ENTRIES = 1024
+
+_lock = threading.Lock()
+_cache = {}  # (collection, filter_key) -> (expires_at, total)
+_watched = set()
+
+
+def get_count_mode():
+    """Read the requested count mode from the query string."""
+    mode = (request.args.get('count') or DEFAULT_COUNT_MODE).lower()
+    return mode if mode in COUNT_MODES else DEFAULT_COUNT_MODE
+
+
+def invalidate_counts(collection=None):
+    """Drop cached totals for one collection, or for all of them."""
+    with _lock:
+        if collection is None:
+            _cache.clear()
+            return
+        for key in [k for k in _cache if k[0] == collection]:
+            del _cache[key]
+
+
+def _on_write(sender, document, **kwargs):
+    invalidate_counts(sender._get_collection_name())
+
+
+def _watch(document_cls):
+    """Invalidate a collection's cached totals on every save/delete."""
+    if document_cls in _watched:
+        return
+    signals.post_save.connect(_on_write, sender=document_cls, weak=False)
+    signals.post_delete.connect(_on_write, sender=document_cls, weak=False)
+    _watched.add(document_cls)
+
+
+def _filter_key(queryset):
+    return json_util.dumps(queryset._query, sort_keys=True)
+
+
+def resolve_total(queryset, mode=None):
+    """
+    Return ``(total, exact)`` for a queryset according to the count mode.
+
+    ``total`` is None when counting was skipped.
+    """
+    mode = mode or get_count_mode()
+    if mode == 'none':
+        return None, False
+    if mode == 'exact':
+        return queryset.count(), True
+
+    document_cls = queryset._document
+    collection = document_cls._get_collection_name()
+    _watch(document_cls)
+
+    query = queryset._query
+    if not query:
+        return document_cls._get_collection().estimated_document_count(), False
+
+    key = (collection, _filter_key(queryset))
+    now = time.monotonic()
+    with _lock:
+        cached = _cache.get(key)
+    if cached and cached[0] > now:
+        return cached[1], False
+
+    total = queryset.count()
+    with _lock:
+        if len(_cache) >= COUNT_CACHE_MAX_ENTRIES:
+            _cache.clear()
+        _cache[key] = (now + COUNT_CACHE_TTL, total)
+    return total, True
+
+
+def pagination_meta(total, exact, page, per_page):
+    """Build the pagination fields shared by list response envelopes."""
+    if total is None:
+        pages = None
+    else:
+        pages = (total + per_page - 1) // per_page if per_page > 0 else 0
+    return {
+        'total': total,
+        'totalExact': exact,
+        'pages': pages,
+        'current_page': page
+    }
@@ -0,0 +1,226 @@
+"""
+Idempotency-Key support for non-idempotent POST routes.
+
+A client that retries a request with the same ``Idempotency-Key`` header
+gets the original response back instead of running the view again.
+
+Keys are scoped by route and by the caller's Authorization header. The
+first request for a key claims it by inserting a pending document into
+``idempotency_keys`` (the unique ``_id`` makes the claim atomic across
+workers); the finished response is stored on that document, which a TTL
+index expires after ``IDEMPOTENCY_TTL_SECONDS``. Recent responses are
+also kept in a bounded in-memory LRU so replays usually skip Mongo; each
+entry carries the time its record was stored and is treated as a miss
+once it is older than the TTL, so every worker forgets a key when Mongo
+does (records the TTL monitor has not removed yet count as expired too).
+
+Concurrent duplicates are coalesced: within a worker they wait on the
+first request's event, across workers they poll the pending claim, so
+the view only ever runs once per key. Reusing a key with a different
+body is rejected with 422; 5xx responses are not stored, so the client
+can retry them.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import request, current_app, jsonify, Response
+from pymongo.errors import DuplicateKeyError
+from app.models import IdempotencyRecord
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+WAIT_SECONDS = 10  # how long a duplicate waits for the original request
+POLL_INTERVAL = 0.05
+STALE_CLAIM_SECONDS = 60  # pending claims older than this belong to a dead worker
+
+
+class IdempotencyStore:
+    """In-memory LRU of finished responses plus in-flight coalescing."""
+
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._responses = OrderedDict()  # key -> (fingerprint, status_code, body, mimetype, stored_at)
+        self._inflight = {}  # key -> threading.Event
+        self._lock = threading.Lock()
+        self._stats = {
+            'executed': 0, 'replayedFromMemory': 0, 'replayedFromStore': 0,
+            'coalesced': 0, 'conflicts': 0, 'mismatches': 0
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._responses[key] = entry
+            self._responses.move_to_end(key)
+            while len(self._responses) > self.max_entries:
+                self._responses.popitem(last=False)
+
+    def run(self, key, fingerprint, view):
+        """Return the stored response for ``key`` or run ``view`` once."""
+        while True:
+            with self._lock:
+                entry = self._responses.get(key)
+                if entry is not None and self._expired(entry[4]):
+                    del self._responses[key]
+                    entry = None
+                if entry is not None:
+                    self._responses.move_to_end(key)
+                event = self._inflight.get(key) if entry is None else None
+                owner = entry is None and event is None
+                if owner:
+                    event = self._inflight[key] = threading.Event()
+            if entry is not None:
+                if entry[0] != fingerprint:
+                    return self._mismatch()
+                self._count('replayedFromMemory')
+                return _replay(*entry[1:4])
+            if owner:
+                break
+            self._count('coalesced')
+            if not event.wait(WAIT_SECONDS):
+                return self._conflict()
+            # The first request finished (or failed with a 5xx): look again
+
+        try:
+            return self._execute(key, fingerprint, view)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def _execute(self, key, fingerprint, view):
+        collection = IdempotencyRecord._get_collection()
+        stored = self._claim(collection, key, fingerprint)
+        if stored is not None:
+            return stored
+
+        try:
+            response = view()
+        except Exception:
+            collection.delete_one({'_id': key, 'status': 'pending'})
+            raise
+        if response.status_code >= 500 or response.direct_passthrough:
+            collection.delete_one({'_id': key, 'status': 'pending'})
+            return response
+
+        body = response.get_data(as_text=True)
+        completed_at = datetime.utcnow()
+        # The TTL (Mongo's and the LRU's) runs from completion
+        collection.update_one({'_id': key}, {'$set': {
+            'status': 'complete', 'status_code': response.status_code,
+            'body': body, 'mimetype': response.mimetype, 'created_at': completed_at
+        }})
+        self._remember(key, (fingerprint, response.status_code, body, response.mimetype, completed_at))
+        self._count('executed')
+        return response
+
+    def _claim(self, collection, key, fingerprint):
+        """Claim ``key`` (returns None) or return the response to send instead."""
+        deadline = time.monotonic() + WAIT_SECONDS
+        while True:
+            now = datetime.utcnow()
+            try:
+                collection.insert_one({
+                    '_id': key, 'fingerprint': fingerprint, 'status': 'pending', 'created_at': now
+                })
+                return None
+            except DuplicateKeyError:
+                pass
+
+            doc = collection.find_one({'_id': key})
+            if doc is None:
+                continue  # expired or released since the insert failed
+            if doc['fingerprint'] != fingerprint:
+                return self._mismatch()
+            if doc['status'] == 'complete':
+                if self._expired(doc['created_at']):
+                    # Past its TTL but not yet removed by the TTL monitor
+                    collection.delete_one({'_id': key, 'created_at': doc['created_at']})
+                    continue
+                entry = (fingerprint, doc['status_code'], doc['body'], doc.get('mimetype'), doc['created_at'])
+                self._remember(key, entry)
+                self._count('replayedFromStore')
+                return _replay(*entry[1:4])
+            if doc['created_at'] < now - timedelta(seconds=STALE_CLAIM_SECONDS):
+                taken = collection.update_one(
+                    {'_id': key, 'status': 'pending', 'created_at': doc['created_at']},
+                    {'$set': {'created_at': now}}
+                )
+                if taken.modified_count:
+                    return None
+            if time.monotonic() > deadline:
+                return self._conflict()
+            time.sleep(POLL_INTERVAL)
+
+    def _expired(self, stored_at):
+        return stored_at < datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+
+    def _mismatch(self):
+        self._count('mismatches')
+        return jsonify({
+            'success': False,
+            'error': f'{HEADER} was already used with a different request body'
+        }), 422
+
+    def _conflict(self):
+        self._count('conflicts')
+        return jsonify({
+            'success': False,
+            'error': f'A request with this {HEADER} is still in progress'
+        }), 409
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._responses), maxEntries=self.max_entries)
+
+
+def _replay(status_code, body, mimetype):
+    response = Response(body, status=status_code, mimetype=mimetype or 'application/json')
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+_store = None
+
+
+def get_idempotency_store():
+    global _store
+    if _store is None:
+        _store = IdempotencyStore(
+            current_app.config.get('IDEMPOTENCY_CACHE_MAX_ENTRIES', 10000),
+            current_app.config.get('IDEMPOTENCY_TTL_SECONDS', 24 * 3600)
+        )
+    return _store
+
+
+def idempotent(scope):
+    """Honour the Idempotency-Key header on the wrapped view."""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            raw_key = request.headers.get(HEADER)
+            if not raw_key:
+                return f(*args, **kwargs)
+            if len(raw_key) > MAX_KEY_LENGTH:
+                return jsonify({
+                    'success': False,
+                    'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'
+                }), 400
+
+            client = hashlib.sha1((request.headers.get('Authorization') or '').encode('utf-8')).hexdigest()[:16]
+            key = f"{scope}:{client}:{raw_key}"
+            fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+            return get_idempotency_store().run(
+                key, fingerprint, lambda: current_app.make_response(f(*args, **kwargs))
+            )
+        return decorated_function
+    return decorator
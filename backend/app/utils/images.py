@@ -0,0 +1,78 @@
+"""
+Product image reference handling.
+
+Image references are normalised once when a product is written: local
+uploads become canonical ``uploads/<path>`` storage keys, and absolute URLs
+are precomputed for every host in ``Config.IMAGE_BASE_URLS``. Serializers
+then read the stored URLs instead of rebuilding them per request.
+"""
+
+from config import Config
+
+DEFAULT_IMAGE = '🌿'
+DEFAULT_BASE_URL = (Config.IMAGE_BASE_URLS or ['https://nutrilea-backend.onrender.com'])[0]
+
+
+def _is_emoji(img):
+    return len(img) <= 2
+
+
+def normalize_image_key(img):
+    """Return the canonical storage key for one image reference."""
+    img = (img or '').strip()
+    if not img or _is_emoji(img):
+        return img or None
+    if img.startswith('http'):
+        # Uploads served by one of our own hosts are stored host-independent
+        for base in Config.IMAGE_BASE_URLS:
+            prefix = f"{base}/uploads/"
+            if img.startswith(prefix):
+                return 'uploads/' + img[len(prefix):]
+        return img
+    path = img.lstrip('/')
+    return path if path.startswith('uploads/') else f"uploads/{path}"
+
+
+def normalize_image_keys(images):
+    keys = []
+    for img in images or []:
+        key = normalize_image_key(img)
+        if key:
+            keys.append(key)
+    return keys
+
+
+def build_image_urls(images, base_url=DEFAULT_BASE_URL):
+    """Convert stored image references to full URLs."""
+    urls = []
+    for img in images or []:
+        if not img:
+            continue
+        # Full URLs and emoji are used as-is
+        if img.startswith('http') or _is_emoji(img):
+            urls.append(img)
+        elif img.startswith('/uploads/'):
+            urls.append(f"{base_url}{img}")
+        elif img.startswith('uploads/'):
+            urls.append(f"{base_url}/{img}")
+        else:
+            urls.append(f"{base_url}/uploads/{img.lstrip('/')}")
+
+    return urls if urls else [DEFAULT_IMAGE]
+
+
+def precompute_image_urls(keys):
+    """Absolute URLs for each configured host, as stored on the product."""
+    return [
+        {'base': base, 'urls': build_image_urls(keys, base)}
+        for base in Config.IMAGE_BASE_URLS
+    ]
+
+
+def stored_image_urls(keys, precomputed, base_url=None):
+    """Pick the precomputed URLs for ``base_url``, building them if missing."""
+    base_url = base_url or DEFAULT_BASE_URL
+    for entry in precomputed or ():
+        if entry.get('base') == base_url:
+            return entry.get('urls') or [DEFAULT_IMAGE]
+    return build_image_urls(keys, base_url)
@@ -0,0 +1,140 @@
+"""
+Index audit for the MongoEngine models.
+
+``QUERY_SHAPES`` registers the query shapes the routes and jobs run on
+hot paths. ``audit_indexes`` explains each of them and flags winning
+plans that contain a COLLSCAN, and reports every declared collection's
+document count, index sizes and index usage (from ``$indexStats``) so
+unused indexes can be spotted.
+
+Plans are only meaningful against a populated database: an empty
+collection explains to an EOF plan whatever its indexes.
+"""
+
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from app.models import (
+    Product, Order, User, ForumThread, ForumReply, ProductCategory, Review,
+    DataVersion, MarketRollup, PriceHistory, PriceTrend, ProductCooccurrence,
+    ProductRecommendation, UserPurchase, IdempotencyRecord, StockReservation,
+    OrderEvent, OrderDailyStats, OrderStatusCount, ProductSales, ArchivedOrder,
+    COMPLETED_ORDER_STATUSES, TERMINAL_ORDER_STATUSES
+)
+from app.utils.catalog_search import filter_products, PRODUCT_SORTS
+from app.utils.order_archive import ensure_archive_collection
+
+MODELS = (
+    Product, Order, User, ForumThread, ForumReply, ProductCategory, Review,
+    DataVersion, MarketRollup, PriceHistory, PriceTrend, ProductCooccurrence,
+    ProductRecommendation, UserPurchase, IdempotencyRecord, StockReservation,
+    OrderEvent, OrderDailyStats, OrderStatusCount, ProductSales, ArchivedOrder
+)
+
+_ID = ObjectId('000000000000000000000000')
+_SINCE = datetime(2000, 1, 1)
+
+
+def _product_shapes():
+    for sort in PRODUCT_SORTS:
+        yield f'products.list sort={sort}', lambda s=sort: filter_products(Product.objects, sort=s)
+        yield f'products.list category sort={sort}', lambda s=sort: filter_products(
+            Product.objects, category='Tea', sort=s)
+        yield f'products.list price sort={sort}', lambda s=sort: filter_products(
+            Product.objects, min_price=100, max_price=500, sort=s)
+
+
+QUERY_SHAPES = [
+    *_product_shapes(),
+    ('products.by_name', lambda: Product.objects(name='Moringa Tea')),
+    ('orders.my', lambda: Order.objects(user_id=str(_ID)).order_by('-created_at', '-id')),
+    ('orders.my_status', lambda: Order.objects(user_id=str(_ID), status='pending').order_by('-created_at', '-id')),
+    ('orders.list', lambda: Order.objects.order_by('-created_at', '-id')),
+    ('orders.list_status', lambda: Order.objects(status='pending').order_by('-created_at', '-id')),
+    ('orders.pending_count', lambda: Order.objects(status='pending')),
+    ('orders.completed', lambda: Order.objects(status__in=COMPLETED_ORDER_STATUSES)),
+    ('orders.user_status', lambda: Order.objects(user_id=str(_ID), status='completed')),
+    ('purchases.verified', lambda: UserPurchase.objects(user_id=str(_ID), product_id=str(_ID), orders__gt=0)),
+    ('reviews.product_page', lambda: Review.objects(product_id=_ID, status='active').order_by('-created_at')),
+    ('reviews.existing', lambda: Review.objects(product_id=_ID, user_id=_ID)),
+    ('reviews.by_user', lambda: Review.objects(user_id=_ID)),
+    ('reviews.admin_list', lambda: Review.objects.order_by('-created_at')),
+    ('forum.threads', lambda: ForumThread.objects.order_by('-created_at')),
+    ('forum.threads_version', lambda: ForumThread.objects.order_by('-updated_at')),
+    ('forum.replies', lambda: ForumReply.objects(thread_id=_ID).order_by('created_at')),
+    ('categories.active', lambda: ProductCategory.objects(status='active')),
+    ('users.login', lambda: User.objects(email='user@example.com')),
+    ('users.growth', lambda: User.objects(created_at__gte=_SINCE, created_at__lt=_SINCE + timedelta(days=1))),
+    ('market.rollup', lambda: MarketRollup.objects(category='all', region='all')),
+    ('market.trend', lambda: PriceTrend.objects(scope='category', key='Tea')),
+    ('stock.expired_holds', lambda: StockReservation.objects(status='held', expires_at__lt=_SINCE)),
+    ('stock.order_reservation', lambda: StockReservation.objects(order_id=str(_ID), status='committed')),
+    ('orders_archive.my', lambda: ArchivedOrder.objects(user_id=str(_ID)).order_by('-created_at', '-id')),
+    ('orders.archivable', lambda: Order.objects(
+        status__in=TERMINAL_ORDER_STATUSES, created_at__lt=_SINCE).order_by('created_at')),
+    ('order_events.history', lambda: OrderEvent.objects(order_id=str(_ID)).order_by('at')),
+    ('product_sales.top', lambda: ProductSales.objects(units__gt=0).order_by('-units')),
+    ('price_history.window', lambda: PriceHistory.objects(recorded_at__gte=_SINCE)),
+]
+
+
+def plan_stages(node):
+    """Yield every stage name in an explain plan tree."""
+    if isinstance(node, dict):
+        if 'stage' in node:
+            yield node['stage']
+        for value in node.values():
+            yield from plan_stages(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from plan_stages(value)
+
+
+def explain_shapes(shapes=QUERY_SHAPES):
+    """``[{'shape', 'stages', 'collscan'}]`` for each registered query shape."""
+    results = []
+    for name, build in shapes:
+        plan = build().explain().get('queryPlanner', {}).get('winningPlan', {})
+        stages = sorted(set(plan_stages(plan)))
+        results.append({'shape': name, 'stages': stages, 'collscan': 'COLLSCAN' in stages})
+    return results
+
+
+def collection_report(document_cls):
+    """Document count, index sizes and index usage for one collection."""
+    collection = document_cls._get_collection()
+    stats = collection.database.command('collStats', collection.name)
+    usage = {
+        row['name']: row['accesses']['ops']
+        for row in collection.aggregate([{'$indexStats': {}}])
+    }
+    indexes = [
+        {
+            'name': name,
+            'sizeBytes': size,
+            'ops': usage.get(name),
+            'unused': name != '_id_' and usage.get(name) == 0
+        }
+        for name, size in sorted(stats.get('indexSizes', {}).items())
+    ]
+    return {
+        'collection': collection.name,
+        'documents': stats.get('count', 0),
+        'totalIndexBytes': stats.get('totalIndexSize', 0),
+        'indexes': indexes
+    }
+
+
+def ensure_all_indexes():
+    """Create every declared index (no-op for ones that already exist)."""
+    ensure_archive_collection()  # Before an index build creates it uncompressed
+    for document_cls in MODELS:
+        document_cls.ensure_indexes()
+
+
+def audit_indexes():
+    """Full audit: query plans plus per-collection index reports."""
+    return {
+        'queries': explain_shapes(),
+        'collections': [collection_report(document_cls) for document_cls in MODELS]
+    }
@@ -0,0 +1,175 @@
+"""
+Materialised market intelligence rollups.
+
+Price statistics are aggregated in MongoDB (``$group`` by category) and
+stored in the ``market_rollups`` collection keyed by (category, region),
+so ``/api/market/track`` is a single indexed read. Each region also has a
+``category='all'`` row with the per-category breakdown, derived from that
+region's category rows.
+
+Products without a region are sold nationwide and count towards every
+region. Rollups for the affected categories/regions are refreshed
+whenever a product is saved or deleted.
+"""
+
+from datetime import datetime
+
+from mongoengine import signals
+from pymongo import UpdateOne
+from config import Config
+from app.models import Product, MarketRollup
+
+ALL = 'all'
+
+
+def _regions_for(region):
+    """Rollup partitions a product in ``region`` contributes to."""
+    if region:
+        return {ALL, region}
+    return {ALL, *Config.MARKET_REGIONS}
+
+
+def _all_regions():
+    regions = {ALL, *Config.MARKET_REGIONS}
+    regions.update(r for r in Product.objects.distinct('region') if r)
+    return regions
+
+
+def _region_match(region):
+    if region == ALL:
+        return {}
+    # Nationwide products (no region) belong to every partition
+    return {'region': {'$in': [region, None]}}
+
+
+def _refresh_region(region, categories, now):
+    match = _region_match(region)
+    if categories is not None:
+        match['category'] = {'$in': list(categories)}
+
+    rows = Product._get_collection().aggregate([
+        {'$match': match},
+        {'$group': {
+            '_id': '$category',
+            'count': {'$sum': 1},
+            'price_sum': {'$sum': '$price'},
+            'min_price': {'$min': '$price'},
+            'max_price': {'$max': '$price'}
+        }}
+    ])
+
+    rollups = MarketRollup._get_collection()
+    seen = set()
+    ops = []
+    for row in rows:
+        category = row['_id'] or 'Uncategorized'
+        seen.add(category)
+        ops.append(UpdateOne(
+            {'category': category, 'region': region},
+            {'$set': {
+                'count': row['count'],
+                'price_sum': row['price_sum'],
+                'min_price': row['min_price'],
+                'max_price': row['max_price'],
+                'updated_at': now
+            }},
+            upsert=True
+        ))
+    if ops:
+        rollups.bulk_write(ops, ordered=False)
+
+    # Categories that no longer have products in this region
+    stale = {'region': region, 'category': {'$nin': list(seen) + [ALL]}}
+    if categories is not None:
+        stale['category']['$in'] = list(categories)
+    rollups.delete_many(stale)
+
+    _refresh_region_total(region, now)
+
+
+def _refresh_region_total(region, now):
+    """Derive the region's category='all' row from its category rows."""
+    rollups = MarketRollup._get_collection()
+    rows = list(rollups.find(
+        {'region': region, 'category': {'$ne': ALL}},
+        {'category': 1, 'count': 1, 'price_sum': 1, 'min_price': 1, 'max_price': 1}
+    ))
+    if not rows:
+        rollups.delete_many({'region': region, 'category': ALL})
+        return
+
+    rollups.update_one(
+        {'category': ALL, 'region': region},
+        {'$set': {
+            'count': sum(r['count'] for r in rows),
+            'price_sum': sum(r['price_sum'] for r in rows),
+            'min_price': min(r['min_price'] for r in rows),
+            'max_price': max(r['max_price'] for r in rows),
+            'category_breakdown': {
+                r['category']: {
+                    'count': r['count'],
+                    'avg_price': r['price_sum'] / r['count']
+                } for r in rows
+            },
+            'updated_at': now
+        }},
+        upsert=True
+    )
+
+
+def refresh_market_rollups(categories=None, regions=None):
+    """
+    Recompute rollups for the given categories and regions.
+
+    With no arguments every rollup is rebuilt and stale rows are removed.
+    """
+    now = datetime.utcnow()
+    for region in (regions or _all_regions()):
+        _refresh_region(region, categories, now)
+
+
+def get_market_rollup(category=None, region=ALL):
+    """Read one precomputed rollup, building all rollups on first use."""
+    category = category if category and category != 'all' else ALL
+    region = region or ALL
+    rollup = MarketRollup.objects(category=category, region=region).first()
+    if rollup is None and MarketRollup.objects.first() is None:
+        refresh_market_rollups()
+        rollup = MarketRollup.objects(category=category, region=region).first()
+    return rollup
+
+
+def _remember_previous(sender, document, created=False, **kwargs):
+    document._market_previous = None
+    if created or not document.pk:
+        return
+    changed = set(document._get_changed_fields())
+    if changed & {'category', 'region'}:
+        document._market_previous = Product._get_collection().find_one(
+            {'_id': document.pk}, {'category': 1, 'region': 1}
+        )
+
+
+def _on_product_save(sender, document, **kwargs):
+    categories = {document.category}
+    regions = _regions_for(document.region)
+    previous = getattr(document, '_market_previous', None)
+    if previous:
+        categories.add(previous.get('category'))
+        regions |= _regions_for(previous.get('region'))
+    try:
+        refresh_market_rollups(categories - {None}, regions)
+    except Exception as e:
+        print(f"Market rollup refresh failed: {str(e)}")
+
+
+def _on_product_delete(sender, document, **kwargs):
+    try:
+        refresh_market_rollups({document.category}, _regions_for(document.region))
+    except Exception as e:
+        print(f"Market rollup refresh failed: {str(e)}")
+
+
+signals.pre_save_post_validation.connect(_remember_previous, sender=Product, weak=False)
+signals.post_save.connect(_on_product_save, sender=Product, weak=False)
+signals.post_delete.connect(_on_product_delete, sender=Product, weak=False)
@@ -0,0 +1,120 @@
+"""
+Cold storage for old orders.
+
+``archive_orders`` moves orders in a terminal status (completed,
+delivered, cancelled) created more than ``ORDER_ARCHIVE_AFTER_DAYS`` ago
+from ``orders`` to ``orders_archive``, in batches. The archive collection
+is created with its own WiredTiger block compressor
+(``ORDER_ARCHIVE_COMPRESSOR``) and keeps every document whole under its
+original _id, so the hot collection and its indexes stop growing with
+history while nothing is lost.
+
+Each batch is copied with idempotent upserts before it is deleted, and
+only orders that are still terminal at delete time are removed; copies
+of orders that changed in between are dropped again. An interrupted run
+leaves every order in ``orders``, in the archive, or briefly in both,
+and lookups read ``orders`` first.
+
+Archiving is not a deletion: it bypasses the model signals, so no order
+events are logged and the rollups fed by the event log (status counts,
+daily stats, product sales, purchases) keep counting archived orders.
+Lookups by id fall through with ``find_archived_order``, a customer's
+order listing merges in their archived orders, and full rebuilds read
+both collections through ``iter_orders``.
+"""
+
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from flask import current_app
+from pymongo import ReplaceOne
+from pymongo.errors import CollectionInvalid
+from app.models import Order, ArchivedOrder, TERMINAL_ORDER_STATUSES
+from app.utils.counts import invalidate_counts
+
+
+def ensure_archive_collection():
+    """Create ``orders_archive`` with the configured compressor if it does not exist."""
+    db = ArchivedOrder._get_db()
+    name = ArchivedOrder._get_collection_name()
+    if name not in db.list_collection_names(filter={'name': name}):
+        compressor = current_app.config.get('ORDER_ARCHIVE_COMPRESSOR')
+        options = {}
+        if compressor:
+            options['storageEngine'] = {'wiredTiger': {'configString': f'block_compressor={compressor}'}}
+        try:
+            db.create_collection(name, **options)
+        except CollectionInvalid:
+            pass  # Created by a concurrent run
+    ArchivedOrder.ensure_indexes()
+
+
+def _archivable(older_than_days):
+    return {
+        'status': {'$in': list(TERMINAL_ORDER_STATUSES)},
+        'created_at': {'$lt': datetime.utcnow() - timedelta(days=older_than_days)}
+    }
+
+
+def _settings(older_than_days, batch_size):
+    config = current_app.config
+    if older_than_days is None:
+        older_than_days = config.get('ORDER_ARCHIVE_AFTER_DAYS', 365)
+    return older_than_days, batch_size or config.get('ORDER_ARCHIVE_BATCH_SIZE', 500)
+
+
+def count_archivable(older_than_days=None):
+    """Orders ``archive_orders`` would move now."""
+    older_than_days, _ = _settings(older_than_days, None)
+    return Order._get_collection().count_documents(_archivable(older_than_days))
+
+
+def archive_orders(older_than_days=None, batch_size=None, limit=None):
+    """Move old terminal orders to the archive, oldest first; returns how many moved."""
+    older_than_days, batch_size = _settings(older_than_days, batch_size)
+    ensure_archive_collection()
+    match = _archivable(older_than_days)
+    orders = Order._get_collection()
+    archive = ArchivedOrder._get_collection()
+    moved = 0
+    while limit is None or moved < limit:
+        size = batch_size if limit is None else min(batch_size, limit - moved)
+        docs = list(orders.find(match).sort('created_at', 1).limit(size))
+        if not docs:
+            break
+        now = datetime.utcnow()
+        archive.bulk_write([
+            ReplaceOne({'_id': doc['_id']}, dict(doc, archived_at=now), upsert=True)
+            for doc in docs
+        ], ordered=False)
+        ids = [doc['_id'] for doc in docs]
+        deleted = orders.delete_many(dict(match, _id={'$in': ids})).deleted_count
+        if deleted < len(ids):
+            # Changed since they were read: they stay live, drop the stale copies
+            kept = [doc['_id'] for doc in orders.find({'_id': {'$in': ids}}, {'_id': 1})]
+            archive.delete_many({'_id': {'$in': kept}})
+        invalidate_counts(Order._get_collection_name())
+        moved += deleted
+        if not deleted:
+            break
+    return moved
+
+
+def find_archived_order(order_id):
+    """Raw archived order document, or None."""
+    if not ObjectId.is_valid(str(order_id)):
+        return None
+    return ArchivedOrder._get_collection().find_one({'_id': ObjectId(str(order_id))})
+
+
+def delete_archived_order(order_id):
+    """Remove an order from the archive; returns the removed document or None."""
+    if not ObjectId.is_valid(str(order_id)):
+        return None
+    return ArchivedOrder._get_collection().find_one_and_delete({'_id': ObjectId(str(order_id))})
+
+
+def iter_orders(query, projection=None, batch_size=1000):
+    """Raw documents matching ``query`` from ``orders`` and then the archive."""
+    for model in (Order, ArchivedOrder):
+        yield from model._get_collection().find(query, projection).batch_size(batch_size)
@@ -0,0 +1,178 @@
+"""
+Order event log and its subscribers.
+
+Every order transition, whichever route or job made it, is appended to
+``order_events`` as an immutable record carrying a snapshot of the order
+(user, total, items, creation time): ``created`` when an order is first
+written, ``status_changed`` when its status moves and ``deleted`` when it
+is removed. Orders saved through MongoEngine are logged from signals;
+bulk writers (the ingestion queue) call ``record_order_events``.
+
+Subscribers registered with ``subscribe`` receive lists of events and
+keep derived state (status counts, daily revenue, product sales, the
+purchase index, recommendations) current with commutative ``$inc``-style
+updates. The live path hands them one event at a time; ``replay_events``
+resets every replayable subscriber and feeds it the whole log in batches,
+which yields the same state.
+"""
+
+from datetime import datetime
+
+from bson import ObjectId
+from mongoengine import signals
+from app.models import Order, OrderEvent, COMPLETED_ORDER_STATUSES
+from app.utils.order_archive import iter_orders
+
+REPLAY_BATCH_SIZE = 1000
+
+_subscribers = []  # (name, handler, reset); reset is None if not replayable
+
+
+def subscribe(name, reset=None):
+    """
+    Register ``handler(events)`` as a subscriber; usable as a decorator.
+
+    ``reset()`` clears the subscriber's derived state before a replay;
+    subscribers without one are skipped by ``replay_events``.
+    """
+    def decorator(handler):
+        _subscribers.append((name, handler, reset))
+        return handler
+    return decorator
+
+
+def completion_changes(events):
+    """``(event, sign)`` for events moving an order into (1) or out of (-1) completion."""
+    for event in events:
+        was_completed = event.get('from_status') in COMPLETED_ORDER_STATUSES
+        is_completed = event.get('to_status') in COMPLETED_ORDER_STATUSES
+        if was_completed != is_completed:
+            yield event, 1 if is_completed else -1
+
+
+def order_product_ids(items):
+    """Distinct catalog product ids in an order's items."""
+    ids = []
+    for item in items or []:
+        product_id = str(item.get('id', ''))
+        if ObjectId.is_valid(product_id) and product_id not in ids:
+            ids.append(product_id)
+    return ids
+
+
+def make_event(order, event_type, from_status, to_status, at=None):
+    """Event document for a raw order (``to_mongo()`` or pymongo dict)."""
+    return {
+        'order_id': str(order['_id']),
+        'type': event_type,
+        'from_status': from_status,
+        'to_status': to_status,
+        'user_id': order.get('user_id'),
+        'total_amount': order.get('total_amount'),
+        'items': [
+            {'id': item.get('id'), 'cartQuantity': item.get('cartQuantity', 1), 'price': item.get('price')}
+            for item in order.get('items') or []
+        ],
+        'order_created_at': order.get('created_at'),
+        'at': at or datetime.utcnow()
+    }
+
+
+def _dispatch(events):
+    for name, handler, _ in _subscribers:
+        try:
+            handler(events)
+        except Exception as e:
+            print(f"Order event subscriber {name} failed: {str(e)}")
+
+
+def record_order_events(events):
+    """Append events to the log, then update every subscriber."""
+    if not events:
+        return
+    OrderEvent._get_collection().insert_many(events, ordered=True)
+    _dispatch(events)
+
+
+def replay_events(batch_size=REPLAY_BATCH_SIZE):
+    """Rebuild all replayable derived state from the log; returns events read."""
+    replayable = [(name, handler, reset) for name, handler, reset in _subscribers if reset]
+    for _, _, reset in replayable:
+        reset()
+    count = 0
+    batch = []
+    cursor = OrderEvent._get_collection().find({}, {'_id': 0}).sort('_id', 1).batch_size(batch_size)
+    for event in cursor:
+        batch.append(event)
+        if len(batch) >= batch_size:
+            for _, handler, _ in replayable:
+                handler(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        for _, handler, _ in replayable:
+            handler(batch)
+        count += len(batch)
+    return count
+
+
+def seed_missing_events(batch_size=REPLAY_BATCH_SIZE):
+    """
+    Log a ``created`` event, in the order's current status, for every
+    order, live or archived, that has none (orders written before the log
+    existed or by tools that bypass it). Subscribers are not called; replay afterwards.
+    """
+    logged = set(OrderEvent._get_collection().distinct('order_id'))
+    collection = OrderEvent._get_collection()
+    batch = []
+    seeded = 0
+    cursor = iter_orders(
+        {}, {'user_id': 1, 'total_amount': 1, 'items': 1, 'created_at': 1, 'status': 1}, batch_size
+    )
+    for order in cursor:
+        if str(order['_id']) in logged:
+            continue
+        batch.append(make_event(order, 'created', None, order.get('status'), order.get('created_at')))
+        if len(batch) >= batch_size:
+            collection.insert_many(batch)
+            seeded += len(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch)
+        seeded += len(batch)
+    return seeded
+
+
+def _remember_status(sender, document, created=False, **kwargs):
+    document._previous_status = None
+    if not created and document.pk and 'status' in document._get_changed_fields():
+        previous = Order._get_collection().find_one({'_id': document.pk}, {'status': 1})
+        document._previous_status = (previous or {}).get('status')
+    elif not created:
+        document._previous_status = document.status
+
+
+def _on_order_save(sender, document, created=False, **kwargs):
+    previous = getattr(document, '_previous_status', None)
+    if created:
+        event = make_event(document.to_mongo(), 'created', None, document.status)
+    elif previous != document.status:
+        event = make_event(document.to_mongo(), 'status_changed', previous, document.status)
+    else:
+        return
+    try:
+        record_order_events([event])
+    except Exception as e:
+        print(f"Order event for {document.pk} not recorded: {str(e)}")
+
+
+def _on_order_delete(sender, document, **kwargs):
+    try:
+        record_order_events([make_event(document.to_mongo(), 'deleted', document.status, None)])
+    except Exception as e:
+        print(f"Order event for {document.pk} not recorded: {str(e)}")
+
+
+signals.pre_save_post_validation.connect(_remember_status, sender=Order, weak=False)
+signals.post_save.connect(_on_order_save, sender=Order, weak=False)
+signals.post_delete.connect(_on_order_delete, sender=Order, weak=False)
@@ -0,0 +1,149 @@
+"""
+Streamed, keyset-paginated order listings.
+
+Orders are read from a server-side cursor in ``STREAM_BATCH_SIZE``
+batches and written out as a JSON array chunk by chunk, so a response
+never holds more than one batch in memory however many orders match.
+
+Pages are ordered newest first on ``(created_at, _id)`` and continued
+with an opaque ``cursor`` token encoding the last row's sort key, which
+the compound order indexes serve without skipping or sorting in memory.
+Without ``limit`` the whole filtered result is streamed.
+
+Per-user listings also read ``orders_archive``: both cursors are sorted
+the same way and merged, so archived orders keep their place in the
+history and the keyset token works across the two collections.
+"""
+
+import base64
+import heapq
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from app.models import Order, ArchivedOrder
+from app.utils.serializers import ORDER_SERIALIZER
+
+STREAM_BATCH_SIZE = 500
+MAX_ORDER_PAGE = 1000
+ORDER_SORT = [('created_at', -1), ('_id', -1)]
+
+
+def encode_cursor(doc):
+    """Opaque continuation token for the row after ``doc``."""
+    key = f"{doc['created_at'].isoformat()}|{doc['_id']}"
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """``(created_at, _id)`` from a token; raises ValueError if malformed."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        created_at, order_id = base64.urlsafe_b64decode(padded).decode().split('|')
+        return datetime.fromisoformat(created_at), ObjectId(order_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def _parse_date(value, name):
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an ISO 8601 date')
+
+
+def parse_order_list_args(args):
+    """Validate listing query args; raises ValueError with a client message."""
+    statuses = [s.strip() for s in (args.get('status') or '').split(',') if s.strip()]
+    since = _parse_date(args['since'], 'since') if args.get('since') else None
+    until = _parse_date(args['until'], 'until') if args.get('until') else None
+    after = decode_cursor(args['cursor']) if args.get('cursor') else None
+    limit = args.get('limit')
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError('limit must be an integer')
+        if not 1 <= limit <= MAX_ORDER_PAGE:
+            raise ValueError(f'limit must be between 1 and {MAX_ORDER_PAGE}')
+    return {'statuses': statuses, 'since': since, 'until': until, 'after': after, 'limit': limit}
+
+
+def order_list_filter(user_id=None, statuses=None, since=None, until=None, after=None):
+    """Raw filter for a listing page."""
+    query = {}
+    if user_id is not None:
+        query['user_id'] = user_id
+    if statuses:
+        query['status'] = statuses[0] if len(statuses) == 1 else {'$in': statuses}
+    created = {}
+    if since:
+        created['$gte'] = since
+    if until:
+        created['$lt'] = until
+    if created:
+        query['created_at'] = created
+    if after:
+        created_at, order_id = after
+        query['$or'] = [
+            {'created_at': {'$lt': created_at}},
+            {'created_at': created_at, '_id': {'$lt': order_id}}
+        ]
+    return query
+
+
+def write_orders_json(rows, fields=None, limit=None, batch_size=STREAM_BATCH_SIZE):
+    """
+    Yield a ``{"success", "orders", "count", "nextCursor"}`` JSON body
+    from an iterable of raw order documents, one chunk per batch.
+
+    ``count`` is the number of orders in this response; ``nextCursor`` is
+    set when ``limit`` cut the page short (``rows`` may hold one extra).
+    """
+    yield '{"success": true, "orders": ['
+    count = 0
+    last = None
+    has_more = False
+    chunk = []
+    for raw in rows:
+        if limit and count == limit:
+            has_more = True
+            break
+        row = json.dumps(ORDER_SERIALIZER.serialize(raw, fields), default=str)
+        chunk.append(row if count == 0 else ',' + row)
+        count += 1
+        last = raw
+        if len(chunk) >= batch_size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+    next_cursor = encode_cursor(last) if has_more else None
+    yield f'], "count": {count}, "nextCursor": {json.dumps(next_cursor)}}}'
+
+
+def _sort_key(raw):
+    return raw['created_at'], raw['_id']
+
+
+def _merge(cursors):
+    """Merge cursors sorted on ORDER_SORT, skipping an order seen in both mid-archive."""
+    last_id = None
+    for raw in heapq.merge(*cursors, key=_sort_key, reverse=True):
+        if raw['_id'] != last_id:
+            last_id = raw['_id']
+            yield raw
+
+
+def stream_orders(query, fields=None, limit=None, batch_size=STREAM_BATCH_SIZE, include_archived=False):
+    """Stream the orders matching a raw filter (and, optionally, archived ones) as a JSON body."""
+    projection = ORDER_SERIALIZER.projection(fields)
+    projection['created_at'] = 1
+    models = (Order, ArchivedOrder) if include_archived else (Order,)
+    cursors = []
+    for model in models:
+        cursor = model._get_collection().find(query, projection).sort(ORDER_SORT).batch_size(batch_size)
+        cursors.append(cursor.limit(limit + 1) if limit else cursor)
+    rows = _merge(cursors) if include_archived else cursors[0]
+    return write_orders_json(rows, fields, limit, batch_size)
@@ -0,0 +1,225 @@
+"""
+Write-behind order ingestion (``ORDER_INGEST_MODE = 'queue'``).
+
+Checkout appends the validated order document, with its pre-generated
+ObjectId, to a local SQLite queue in WAL mode and answers straight away;
+the commit is fsynced, so an acknowledged order survives a crash of the
+process. A background thread per worker drains the queue into Mongo with
+batched ``insert_many`` calls and deletes rows only after Mongo has them.
+
+Recovery needs no special step: rows left by a crashed process are
+flushed when the queue starts again, and duplicate-key errors from a
+batch that was inserted but not yet deleted count as flushed. If Mongo
+is unreachable everything stays queued; an order Mongo itself rejects
+is retried ``MAX_ATTEMPTS`` times and then reported as stuck. Inserted
+orders are logged as ``created`` order events by the flusher, since the
+raw insert bypasses the model signals.
+
+Reads go queue first, then Mongo (``find_queued_order``): a row is only
+deleted once inserted, so an acknowledged order is always found in one
+of the two. Status changes flush the queue first (``flush_order``).
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from bson import json_util
+from flask import current_app
+from pymongo.errors import BulkWriteError
+from app.models import Order
+from app.utils.catalog import record_popularity
+from app.utils.counts import invalidate_counts
+from app.utils.order_events import make_event, record_order_events
+
+DUPLICATE_KEY = 11000
+MAX_ATTEMPTS = 5  # rows Mongo rejects this often are left for an operator
+
+
+class OrderQueue:
+    """Durable local FIFO of order documents with a Mongo flusher thread."""
+
+    def __init__(self, path, batch_size=500, flush_interval=0.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pid = os.getpid()
+        self._local = threading.local()
+        self._wake = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'enqueued': 0, 'flushed': 0, 'batches': 0, 'failedBatches': 0, 'lastFlushMs': None}
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._write() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS queued_orders ('
+                ' id TEXT PRIMARY KEY, doc TEXT NOT NULL, enqueued_at REAL NOT NULL,'
+                ' attempts INTEGER NOT NULL DEFAULT 0, last_error TEXT)'
+            )
+        self._thread = None
+
+    def _conn(self):
+        """This thread's connection (autocommit; reads need no transaction)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=FULL')
+            self._local.conn = conn
+        return conn
+
+    def _write(self):
+        return _Transaction(self._conn())
+
+    def _count(self, **deltas):
+        with self._stats_lock:
+            for name, value in deltas.items():
+                self._stats[name] = value if name == 'lastFlushMs' else self._stats[name] + value
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='order-queue-flusher', daemon=True)
+        self._thread.start()
+
+    def enqueue(self, doc):
+        """Durably queue an order document (must carry its ``_id``)."""
+        with self._write() as conn:
+            conn.execute(
+                'INSERT INTO queued_orders (id, doc, enqueued_at) VALUES (?, ?, ?)',
+                (str(doc['_id']), json_util.dumps(doc), time.time())
+            )
+        self._count(enqueued=1)
+        self._wake.set()
+
+    def get(self, order_id):
+        """The queued order document, or None if it is not (or no longer) queued."""
+        row = self._conn().execute('SELECT doc FROM queued_orders WHERE id = ?', (str(order_id),)).fetchone()
+        return json_util.loads(row[0]) if row else None
+
+    def flush(self):
+        """Drain the queue into Mongo; returns orders flushed."""
+        flushed = 0
+        with self._flush_lock:
+            while True:
+                rows = self._conn().execute(
+                    'SELECT id, doc FROM queued_orders WHERE attempts < ?'
+                    ' ORDER BY enqueued_at LIMIT ?', (MAX_ATTEMPTS, self.batch_size)
+                ).fetchall()
+                if not rows:
+                    return flushed
+                done, complete = self._flush_batch(rows)
+                flushed += done
+                if not complete:
+                    return flushed
+
+    def _flush_batch(self, rows):
+        """Insert one batch; returns ``(orders flushed, whether all were)``."""
+        docs = [json_util.loads(doc) for _, doc in rows]
+        start = time.perf_counter()
+        failed = {}
+        duplicates = set()
+        try:
+            Order._get_collection().insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for err in e.details.get('writeErrors', []):
+                if err.get('code') == DUPLICATE_KEY:
+                    duplicates.add(err['index'])
+                else:
+                    failed[rows[err['index']][0]] = err.get('errmsg')
+        except Exception as e:
+            # Mongo unreachable: keep everything queued, retry on the next pass
+            print(f"Order queue flush failed ({len(rows)} orders): {str(e)}")
+            self._count(failedBatches=1)
+            return 0, False
+
+        done = [order_id for order_id, _ in rows if order_id not in failed]
+        with self._write() as conn:
+            conn.executemany('DELETE FROM queued_orders WHERE id = ?', [(order_id,) for order_id in done])
+            conn.executemany(
+                'UPDATE queued_orders SET attempts = attempts + 1, last_error = ? WHERE id = ?',
+                [(error, order_id) for order_id, error in failed.items()]
+            )
+        for order_id, error in failed.items():
+            print(f"Order queue could not insert order {order_id}: {error}")
+        self._count(flushed=len(done), batches=1, failedBatches=1 if failed else 0,
+                    lastFlushMs=round((time.perf_counter() - start) * 1000, 1))
+
+        inserted = [
+            doc for index, doc in enumerate(docs)
+            if index not in duplicates and str(doc['_id']) not in failed
+        ]
+        if inserted:
+            invalidate_counts(Order._get_collection_name())
+            try:
+                record_popularity([item for doc in inserted for item in doc.get('items') or []])
+            except Exception as e:
+                print(f"Order queue popularity update failed: {str(e)}")
+            try:
+                record_order_events([make_event(doc, 'created', None, doc.get('status')) for doc in inserted])
+            except Exception as e:
+                print(f"Order queue events not recorded: {str(e)}")
+        return len(done), not failed
+
+    def _run(self):
+        while True:
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Order queue flusher error: {str(e)}")
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['depth'], stats['stuck'] = self._conn().execute(
+            'SELECT COUNT(*), COALESCE(SUM(attempts >= ?), 0) FROM queued_orders', (MAX_ATTEMPTS,)
+        ).fetchone()
+        return stats
+
+
+class _Transaction:
+    """``with`` block that runs statements in one immediate transaction."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_order_queue():
+    """This worker's queue (started on first use), or None in sync mode."""
+    global _queue
+    if current_app.config.get('ORDER_INGEST_MODE', 'sync') != 'queue':
+        return None
+    with _queue_lock:
+        if _queue is None or _queue.pid != os.getpid():
+            _queue = OrderQueue(
+                current_app.config['ORDER_QUEUE_PATH'],
+                current_app.config.get('ORDER_QUEUE_BATCH_SIZE', 500),
+                current_app.config.get('ORDER_QUEUE_FLUSH_INTERVAL', 0.5)
+            )
+            _queue.start()
+        return _queue
+
+
+def find_queued_order(order_id):
+    """Raw order document from the queue, if it has not been flushed yet."""
+    queue = get_order_queue()
+    return queue.get(order_id) if queue else None
+
+
+def flush_order(order_id):
+    """Make sure a queued order is in Mongo before it is modified."""
+    queue = get_order_queue()
+    if queue and queue.get(order_id) is not None:
+        queue.flush()
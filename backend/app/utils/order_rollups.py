@@ -0,0 +1,114 @@
+"""
+Order rollups maintained from the order event log.
+
+Three subscribers of ``order_events`` keep the counters the admin
+dashboard reads, each with commutative ``$inc`` updates batched per
+event list:
+
+- ``order_status_counts``: orders currently in each status;
+- ``order_daily_stats``: orders placed, completed orders and revenue per
+  order creation day (revenue counts orders in a completed status);
+- ``product_sales``: units, completed orders and revenue per product.
+
+All three are reset and rebuilt by ``replay_events``.
+"""
+
+from pymongo import UpdateOne
+from app.models import OrderDailyStats, OrderStatusCount, ProductSales
+from app.utils.order_events import subscribe, completion_changes, order_product_ids
+
+
+def _apply(model, increments):
+    """``$inc`` ``{key: {field: delta}}`` into a rollup collection, upserting keys."""
+    ops = [
+        UpdateOne({'_id': key}, {'$inc': fields}, upsert=True)
+        for key, fields in increments.items()
+        if any(fields.values())
+    ]
+    if ops:
+        model._get_collection().bulk_write(ops, ordered=False)
+
+
+def _add(increments, key, **deltas):
+    fields = increments.setdefault(key, {})
+    for name, delta in deltas.items():
+        fields[name] = fields.get(name, 0) + delta
+
+
+def _day(event):
+    return (event.get('order_created_at') or event['at']).strftime('%Y-%m-%d')
+
+
+def _reset(model):
+    return lambda: model._get_collection().delete_many({})
+
+
+@subscribe('status_counts', reset=_reset(OrderStatusCount))
+def _count_statuses(events):
+    increments = {}
+    for event in events:
+        if event.get('from_status'):
+            _add(increments, event['from_status'], count=-1)
+        if event.get('to_status'):
+            _add(increments, event['to_status'], count=1)
+    _apply(OrderStatusCount, increments)
+
+
+@subscribe('daily_stats', reset=_reset(OrderDailyStats))
+def _count_days(events):
+    increments = {}
+    for event in events:
+        if event['type'] == 'created':
+            _add(increments, _day(event), orders=1)
+        elif event['type'] == 'deleted':
+            _add(increments, _day(event), orders=-1)
+    for event, sign in completion_changes(events):
+        _add(increments, _day(event), completed_orders=sign,
+             revenue=sign * (event.get('total_amount') or 0))
+    _apply(OrderDailyStats, increments)
+
+
+@subscribe('product_sales', reset=_reset(ProductSales))
+def _count_sales(events):
+    increments = {}
+    for event, sign in completion_changes(events):
+        for item in event.get('items') or []:
+            if not order_product_ids([item]):
+                continue
+            quantity = item.get('cartQuantity') or 1
+            _add(increments, str(item['id']), units=sign * quantity,
+                 revenue=sign * quantity * (item.get('price') or 0))
+        for product_id in order_product_ids(event.get('items')):
+            _add(increments, product_id, orders=sign)
+    _apply(ProductSales, increments)
+
+
+def get_status_counts():
+    """``{status: orders}`` for every status with orders in it."""
+    return {
+        doc['_id']: doc['count']
+        for doc in OrderStatusCount._get_collection().find({'count': {'$gt': 0}})
+    }
+
+
+def get_daily_stats(since=None, until=None):
+    """Daily rollup documents for creation days in ``[since, until)``, oldest first."""
+    query = {}
+    if since:
+        query.setdefault('_id', {})['$gte'] = since.strftime('%Y-%m-%d')
+    if until:
+        query.setdefault('_id', {})['$lt'] = until.strftime('%Y-%m-%d')
+    return list(OrderDailyStats._get_collection().find(query).sort('_id', 1))
+
+
+def get_total_revenue():
+    """Revenue of all orders in a completed status."""
+    totals = next(OrderDailyStats._get_collection().aggregate([
+        {'$group': {'_id': None, 'revenue': {'$sum': '$revenue'}}}
+    ]), {})
+    return round(totals.get('revenue', 0), 2)
+
+
+def get_top_products(limit=5):
+    """Product sales rows with the most units sold."""
+    return list(ProductSales._get_collection().find({'units': {'$gt': 0}}).sort('units', -1).limit(limit))
@@ -0,0 +1,321 @@
+"""
+Product price history and rolling-window price analytics.
+
+Every admin price change appends a row to ``price_history``. The analytics
+engine loads the history as compact per-product NumPy arrays, samples each
+product's step-function price on a daily grid, and computes rolling
+average, volatility (std of daily log returns, in percent) and percent
+change over 7/30/90-day windows for every product, every category and the
+whole catalog at once.
+
+Results are stored in ``price_trends`` and served as-is. When the history
+changes or they are older than TRENDS_MAX_AGE, a read starts one
+background recompute and keeps serving the stored windows meanwhile.
+Recomputes are single-flight across workers: a refresher must hold a
+lease in ``data_versions`` (its ``version`` is the lease token,
+``updated_at`` the time taken), so two runs never interleave their
+upserts and stale-row cleanup.
+"""
+
+import threading
+import warnings
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.models import Product, PriceHistory, PriceTrend, DataVersion
+
+WINDOWS = (7, 30, 90)
+DAY = 86400.0
+HISTORY_KEY = 'price_history'
+TRENDS_MAX_AGE = timedelta(hours=1)
+REFRESH_LEASE_KEY = 'price_trends_refresh'
+REFRESH_LEASE = timedelta(minutes=10)  # longer than any recompute; a dead holder's lease lapses
+
+_refresh = {'running': False}
+_refresh_lock = threading.Lock()
+
+
+def _epoch(dt):
+    """Seconds since the epoch for a naive UTC datetime."""
+    return dt.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _history_version():
+    doc = DataVersion.objects(key=HISTORY_KEY).first()
+    return doc.version if doc else 0
+
+
+def record_price(product, recorded_at=None):
+    """Append the product's current price to its history."""
+    record_prices([{
+        'product_id': product.id,
+        'category': product.category,
+        'price': product.price,
+        'original_price': product.original_price
+    }], recorded_at)
+
+
+def record_prices(entries, recorded_at=None):
+    """
+    Append several price observations at once.
+
+    ``entries`` are dicts with product_id, category, price, original_price.
+    """
+    if not entries:
+        return
+    recorded_at = recorded_at or datetime.utcnow()
+    PriceHistory._get_collection().insert_many([
+        {
+            'product_id': e['product_id'],
+            'category': e.get('category'),
+            'price': e['price'],
+            'original_price': e.get('original_price'),
+            'recorded_at': recorded_at
+        } for e in entries
+    ], ordered=False)
+    DataVersion.objects(key=HISTORY_KEY).update_one(
+        inc__version=1,
+        set__updated_at=datetime.utcnow(),
+        upsert=True
+    )
+
+
+def _load_series(now):
+    """
+    Load every product's price series as flat arrays sorted by
+    (product index, time): ``(ids, categories, pidx, ts, prices)``.
+    """
+    start = now - timedelta(days=max(WINDOWS))
+    products = list(Product.objects.only('id', 'category', 'price').as_pymongo())
+    index = {p['_id']: i for i, p in enumerate(products)}
+    ids = [str(p['_id']) for p in products]
+    categories = [p.get('category') or 'Uncategorized' for p in products]
+
+    collection = PriceHistory._get_collection()
+    # Last observation before the window so prices can be carried forward
+    baselines = collection.aggregate([
+        {'$match': {'recorded_at': {'$lt': start}}},
+        {'$sort': {'recorded_at': 1}},
+        {'$group': {'_id': '$product_id', 'price': {'$last': '$price'},
+                    'recorded_at': {'$last': '$recorded_at'}}}
+    ])
+    recent = collection.find(
+        {'recorded_at': {'$gte': start}},
+        {'product_id': 1, 'price': 1, 'recorded_at': 1}
+    )
+
+    pidx, ts, prices = [], [], []
+    seen = set()
+
+    def add(product_id, recorded_at, price):
+        i = index.get(product_id)
+        if i is not None:
+            seen.add(i)
+            pidx.append(i)
+            ts.append(_epoch(recorded_at))
+            prices.append(price)
+
+    for row in baselines:
+        add(row['_id'], row['recorded_at'], row['price'])
+    for row in recent:
+        add(row['product_id'], row['recorded_at'], row['price'])
+
+    # Products without history have held their current price all along
+    for i, p in enumerate(products):
+        if i not in seen and p.get('price') is not None:
+            pidx.append(i)
+            ts.append(_epoch(start))
+            prices.append(p['price'])
+
+    pidx = np.asarray(pidx, dtype=np.int64)
+    ts = np.asarray(ts, dtype=np.float64)
+    prices = np.asarray(prices, dtype=np.float64)
+    order = np.lexsort((ts, pidx))
+    return ids, categories, pidx[order], ts[order], prices[order]
+
+
+def sample_daily(pidx, ts, prices, n_products, days, now_ts):
+    """
+    Price of every product at each of the last ``days`` daily grid points
+    (oldest first), carrying the last observation forward. Shape is
+    ``(n_products, days + 1)``; NaN before a product's first observation.
+    """
+    grid = now_ts - DAY * np.arange(days, -1, -1)
+    if not len(ts):
+        return np.full((n_products, days + 1), np.nan)
+    base = min(ts.min(), grid[0])
+    scale = now_ts - base + 1.0
+    keys = pidx * scale + (ts - base)
+    rows = np.arange(n_products)[:, None]
+    grid_keys = rows * scale + (grid - base)[None, :]
+    idx = np.searchsorted(keys, grid_keys.ravel(), side='right') - 1
+    idx = idx.reshape(grid_keys.shape)
+    safe = idx.clip(0)
+    valid = (idx >= 0) & (pidx[safe] == rows)
+    return np.where(valid, prices[safe], np.nan)
+
+
+def window_stats(matrix):
+    """Rolling average, volatility and percent change for each row."""
+    with np.errstate(all='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        avg = np.nanmean(matrix, axis=1)
+        returns = np.diff(np.log(matrix), axis=1)
+        volatility = np.nanstd(returns, axis=1) * 100
+        has_value = ~np.isnan(matrix)
+        first_idx = has_value.argmax(axis=1)
+        first = matrix[np.arange(len(matrix)), first_idx]
+        last = matrix[:, -1]
+        change = (last - first) / first * 100
+    return avg, volatility, change
+
+
+def _category_matrix(matrix, category_index, n_categories):
+    """Mean price per category at each grid point, ignoring missing products."""
+    present = ~np.isnan(matrix)
+    sums = np.zeros((n_categories, matrix.shape[1]))
+    counts = np.zeros((n_categories, matrix.shape[1]))
+    np.add.at(sums, category_index, np.where(present, matrix, 0.0))
+    np.add.at(counts, category_index, present)
+    with np.errstate(all='ignore'):
+        return sums / counts
+
+
+def _clean(value, digits=2):
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def compute_price_trends(now=None):
+    """
+    Compute all windows for every product, category and the catalog.
+
+    Returns ``{(scope, key): {'category': ..., 'windows': {...}}}``.
+    """
+    now = now or datetime.utcnow()
+    ids, categories, pidx, ts, prices = _load_series(now)
+    names = sorted(set(categories))
+    positions = {c: i for i, c in enumerate(names)}
+    category_index = np.asarray([positions[c] for c in categories], dtype=np.int64)
+
+    results = {('product', pid): {'category': cat, 'windows': {}} for pid, cat in zip(ids, categories)}
+    results.update({('category', c): {'category': c, 'windows': {}} for c in names})
+    results[('overall', 'all')] = {'category': None, 'windows': {}}
+
+    for days in WINDOWS:
+        label = f"{days}d"
+        matrix = sample_daily(pidx, ts, prices, len(ids), days, _epoch(now))
+        scopes = [('product', pid) for pid in ids]
+        stacked = [matrix]
+        if len(ids):
+            stacked.append(_category_matrix(matrix, category_index, len(names)))
+            with np.errstate(all='ignore'), warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                stacked.append(np.nanmean(matrix, axis=0)[None, :])
+            scopes += [('category', c) for c in names] + [('overall', 'all')]
+        avg, volatility, change = window_stats(np.vstack(stacked))
+        for row, key in enumerate(scopes):
+            results[key]['windows'][label] = {
+                'averagePrice': _clean(avg[row]),
+                'volatility': _clean(volatility[row], 3),
+                'percentChange': _clean(change[row])
+            }
+    return results
+
+
+def refresh_price_trends():
+    """Recompute and store all trends; returns the number of rows written."""
+    now = datetime.utcnow()
+    version = _history_version()
+    results = compute_price_trends(now)
+    collection = PriceTrend._get_collection()
+    ops = [
+        UpdateOne(
+            {'scope': scope, 'key': key},
+            {'$set': {
+                'category': value['category'],
+                'windows': value['windows'],
+                'source_version': version,
+                'computed_at': now
+            }},
+            upsert=True
+        )
+        for (scope, key), value in results.items()
+    ]
+    if ops:
+        collection.bulk_write(ops, ordered=False)
+    collection.delete_many({'computed_at': {'$lt': now}})
+    return len(ops)
+
+
+def _acquire_lease():
+    """Take the refresh lease; returns its token, or None while another run holds it."""
+    now = datetime.utcnow()
+    try:
+        doc = DataVersion._get_collection().find_one_and_update(
+            {'_id': REFRESH_LEASE_KEY, 'updated_at': {'$lt': now - REFRESH_LEASE}},
+            {'$inc': {'version': 1}, '$set': {'updated_at': now}},
+            upsert=True, return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        return None  # Held: the filter missed and the upsert hit the existing key
+    return doc['version']
+
+
+def _release_lease(token):
+    DataVersion._get_collection().update_one(
+        {'_id': REFRESH_LEASE_KEY, 'version': token}, {'$set': {'updated_at': datetime(1970, 1, 1)}}
+    )
+
+
+def refresh_trends_once():
+    """Recompute trends under the lease; False if another refresher holds it."""
+    token = _acquire_lease()
+    if token is None:
+        return False
+    try:
+        refresh_price_trends()
+    finally:
+        _release_lease(token)
+    return True
+
+
+def _refresh_in_background():
+    with _refresh_lock:
+        if _refresh['running']:
+            return
+        _refresh['running'] = True
+
+    def run():
+        try:
+            refresh_trends_once()
+        except Exception as e:
+            print(f"Price trend refresh failed: {str(e)}")
+        finally:
+            with _refresh_lock:
+                _refresh['running'] = False
+
+    threading.Thread(target=run, name='price-trend-refresh', daemon=True).start()
+
+
+def trends_computed_at():
+    """When the stored trends were last computed (None if never)."""
+    doc = PriceTrend._get_collection().find_one({'scope': 'overall', 'key': 'all'}, {'computed_at': 1})
+    return (doc or {}).get('computed_at')
+
+
+def ensure_fresh_trends():
+    """
+    Start a recompute if the history changed or trends have aged out.
+
+    Stored trends keep being served while it runs; only when none exist
+    yet does the caller wait for (or skip, if another worker holds the
+    lease) the first computation.
+    """
+    latest = PriceTrend.objects(scope='overall', key='all').first()
+    if latest is None:
+        refresh_trends_once()
+    elif (latest.source_version != _history_version()
+            or datetime.utcnow() - latest.computed_at > TRENDS_MAX_AGE):
+        _refresh_in_background()
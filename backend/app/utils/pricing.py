@@ -0,0 +1,90 @@
+"""
+Server-side cart pricing.
+
+Carts are priced from the catalog, never from client-sent prices: all
+product ids are resolved in one batch through ``get_products_by_ids``
+(served from the per-worker product cache when it is warm, otherwise one
+``$in`` query for the misses) and every line is priced in integer cents.
+
+A line's discount is what the customer saves against ``original_price``
+when the product is on sale. Duplicate lines for the same product are
+merged.
+"""
+
+from app.utils.catalog import get_products_by_ids
+
+MAX_CART_LINES = 100
+MAX_LINE_QUANTITY = 999
+
+
+def _cents(value):
+    return int(round(float(value or 0) * 100))
+
+
+def parse_cart(items):
+    """``[(product_id, quantity)]`` from request items; raises ValueError."""
+    if not isinstance(items, list) or not items:
+        raise ValueError('items must be a non-empty list')
+    quantities = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not item.get('id'):
+            raise ValueError(f'items[{index}] needs a product id')
+        quantity = item.get('cartQuantity', 1)
+        if isinstance(quantity, bool) or not isinstance(quantity, int) or not 1 <= quantity <= MAX_LINE_QUANTITY:
+            raise ValueError(f'items[{index}].cartQuantity must be between 1 and {MAX_LINE_QUANTITY}')
+        product_id = str(item['id'])
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+        if quantities[product_id] > MAX_LINE_QUANTITY:
+            raise ValueError(f'At most {MAX_LINE_QUANTITY} of one product can be ordered')
+    if len(quantities) > MAX_CART_LINES:
+        raise ValueError(f'A cart can hold at most {MAX_CART_LINES} products')
+    return list(quantities.items())
+
+
+def price_lines(cart, products):
+    """
+    Price ``[(product_id, quantity)]`` against serialized products.
+
+    Lines use the order item keys (``price``, ``cartQuantity``) so priced
+    lines can be stored on the order as-is.
+    """
+    lines = []
+    unavailable = []
+    total = list_total = 0
+    for product_id, quantity in cart:
+        product = products.get(product_id)
+        if product is None:
+            unavailable.append(product_id)
+            continue
+        price = _cents(product.get('price'))
+        original = _cents(product.get('originalPrice'))
+        list_price = original if original > price else price
+        line_total = price * quantity
+        lines.append({
+            'id': product_id,
+            'name': product.get('name'),
+            'category': product.get('category'),
+            'image': product.get('image'),
+            'price': price / 100,
+            'originalPrice': list_price / 100,
+            'cartQuantity': quantity,
+            'lineTotal': line_total / 100,
+            'discount': (list_price - price) * quantity / 100
+        })
+        total += line_total
+        list_total += list_price * quantity
+    return {
+        'lines': lines,
+        'unavailable': unavailable,
+        'itemCount': sum(line['cartQuantity'] for line in lines),
+        'subtotal': list_total / 100,
+        'discount': (list_total - total) / 100,
+        'total': total / 100
+    }
+
+
+def price_cart(items, base_url=None):
+    """Validate and price request items with one batched product lookup."""
+    cart = parse_cart(items)
+    products, _ = get_products_by_ids([product_id for product_id, _ in cart], base_url)
+    return price_lines(cart, products)
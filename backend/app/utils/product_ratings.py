@@ -0,0 +1,144 @@
+"""
+Denormalised rating aggregates on products.
+
+Each product stores ``rating_count``, ``rating_sum``, a 1-5
+``rating_histogram`` and the derived ``rating_average`` over its active
+reviews. Review saves and deletes adjust these with a single atomic
+``$inc``; the average is then set only if the counters have not moved
+since, so concurrent writers cannot leave it stale.
+
+``reconcile_product_ratings`` rebuilds every product's aggregates from
+one aggregation over the reviews collection and fixes any drift.
+"""
+
+from mongoengine import signals
+from pymongo import UpdateOne, ReturnDocument
+from app.models import Product, Review
+from app.utils.catalog import bump_catalog_version
+
+RATINGS = (1, 2, 3, 4, 5)
+
+
+def _average(rating_sum, rating_count):
+    return round(rating_sum / rating_count, 2) if rating_count else 0
+
+
+def _contribution(raw):
+    """(product_id, rating) a raw review counts towards, or None."""
+    if not raw or raw.get('status', 'active') != 'active':
+        return None
+    if raw.get('rating') not in RATINGS or not raw.get('product_id'):
+        return None
+    return raw['product_id'], raw['rating']
+
+
+def apply_rating_change(old=None, new=None):
+    """
+    Move a review's contribution from ``old`` to ``new``.
+
+    Both are ``(product_id, rating)`` pairs or None (not counted).
+    """
+    if old == new:
+        return
+    deltas = {}
+    for contribution, sign in ((old, -1), (new, 1)):
+        if contribution is None:
+            continue
+        product_id, rating = contribution
+        inc = deltas.setdefault(product_id, {})
+        inc['rating_count'] = inc.get('rating_count', 0) + sign
+        inc['rating_sum'] = inc.get('rating_sum', 0) + sign * rating
+        key = f'rating_histogram.{rating}'
+        inc[key] = inc.get(key, 0) + sign
+
+    collection = Product._get_collection()
+    for product_id, inc in deltas.items():
+        doc = collection.find_one_and_update(
+            {'_id': product_id},
+            {'$inc': inc},
+            projection={'rating_count': 1, 'rating_sum': 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if doc is None:
+            continue
+        count, total = doc.get('rating_count', 0), doc.get('rating_sum', 0)
+        collection.update_one(
+            {'_id': product_id, 'rating_count': count, 'rating_sum': total},
+            {'$set': {'rating_average': _average(total, count)}}
+        )
+    bump_catalog_version()
+
+
+def reconcile_product_ratings(dry_run=False):
+    """Recompute every product's rating aggregates; returns products fixed."""
+    rows = Review._get_collection().aggregate([
+        {'$match': {'status': 'active', 'rating': {'$in': list(RATINGS)}}},
+        {'$group': {
+            '_id': {'product': '$product_id', 'rating': '$rating'},
+            'count': {'$sum': 1}
+        }}
+    ])
+    expected = {}
+    for row in rows:
+        histogram = expected.setdefault(row['_id']['product'], {})
+        histogram[str(row['_id']['rating'])] = row['count']
+
+    collection = Product._get_collection()
+    ops = []
+    current = collection.find({}, {
+        'rating_count': 1, 'rating_sum': 1, 'rating_histogram': 1, 'rating_average': 1
+    })
+    for doc in current:
+        histogram = {str(r): expected.get(doc['_id'], {}).get(str(r), 0) for r in RATINGS}
+        count = sum(histogram.values())
+        total = sum(r * histogram[str(r)] for r in RATINGS)
+        values = {
+            'rating_count': count,
+            'rating_sum': total,
+            'rating_histogram': histogram,
+            'rating_average': _average(total, count)
+        }
+        stored_histogram = {str(r): (doc.get('rating_histogram') or {}).get(str(r), 0) for r in RATINGS}
+        if (doc.get('rating_count', 0), doc.get('rating_sum', 0), stored_histogram,
+                doc.get('rating_average', 0)) != (count, total, histogram, values['rating_average']):
+            ops.append(UpdateOne({'_id': doc['_id']}, {'$set': values}))
+
+    if ops and not dry_run:
+        collection.bulk_write(ops, ordered=False)
+        bump_catalog_version()
+    return len(ops)
+
+
+def _remember_previous(sender, document, created=False, **kwargs):
+    document._rating_previous = None
+    if created or not document.pk:
+        return
+    changed = set(document._get_changed_fields())
+    if changed & {'product_id', 'rating', 'status'}:
+        document._rating_previous = _contribution(Review._get_collection().find_one(
+            {'_id': document.pk}, {'product_id': 1, 'rating': 1, 'status': 1}
+        ))
+    else:
+        document._rating_previous = _contribution(document.to_mongo())
+
+
+def _on_review_save(sender, document, **kwargs):
+    try:
+        apply_rating_change(
+            getattr(document, '_rating_previous', None),
+            _contribution(document.to_mongo())
+        )
+    except Exception as e:
+        print(f"Rating aggregate update failed: {str(e)}")
+
+
+def _on_review_delete(sender, document, **kwargs):
+    try:
+        apply_rating_change(_contribution(document.to_mongo()), None)
+    except Exception as e:
+        print(f"Rating aggregate update failed: {str(e)}")
+
+
+signals.pre_save_post_validation.connect(_remember_previous, sender=Review, weak=False)
+signals.post_save.connect(_on_review_save, sender=Review, weak=False)
+signals.post_delete.connect(_on_review_delete, sender=Review, weak=False)
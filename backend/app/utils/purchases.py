@@ -0,0 +1,113 @@
+"""
+Materialised purchase index for verified-purchase checks.
+
+``user_purchases`` holds one document per (user, product) pair with the
+number of completed orders that contain it. It is a subscriber of the
+order event log, so every status change keeps it current (and
+``replay_events`` can rebuild it), and ``has_purchased`` is a single lookup on the unique
+(user_id, product_id) index instead of a scan of the user's orders.
+
+``backfill_purchases`` rebuilds the collection from existing orders.
+"""
+
+from datetime import datetime
+
+from pymongo import UpdateOne
+from app.models import UserPurchase, COMPLETED_ORDER_STATUSES
+from app.utils.order_archive import iter_orders
+from app.utils.order_events import subscribe, completion_changes, order_product_ids
+
+WRITE_BATCH_SIZE = 1000
+
+
+def has_purchased(user_id, product_id):
+    """True if the user has a completed order containing the product."""
+    return UserPurchase._get_collection().find_one(
+        {'user_id': str(user_id), 'product_id': str(product_id), 'orders': {'$gt': 0}},
+        {'_id': 1}
+    ) is not None
+
+
+def apply_purchases(events):
+    """Add or remove the purchases of orders entering or leaving completion."""
+    pairs = {}  # (user_id, product_id) -> [orders delta, first, last]
+    now = datetime.utcnow()
+    for event, sign in completion_changes(events):
+        if not event.get('user_id'):
+            continue
+        purchased_at = event.get('order_created_at') or now
+        for product_id in order_product_ids(event.get('items')):
+            entry = pairs.setdefault((str(event['user_id']), product_id), [0, purchased_at, purchased_at])
+            entry[0] += sign
+            entry[1] = min(entry[1], purchased_at)
+            entry[2] = max(entry[2], purchased_at)
+    ops = []
+    removed = False
+    for (user_id, product_id), (delta, first, last) in pairs.items():
+        if delta == 0:
+            continue
+        removed = removed or delta < 0
+        update = {'$inc': {'orders': delta}, '$set': {'updated_at': now}}
+        if delta > 0:
+            update['$min'] = {'first_purchased_at': first}
+            update['$max'] = {'last_purchased_at': last}
+        ops.append(UpdateOne({'user_id': user_id, 'product_id': product_id}, update, upsert=delta > 0))
+    if not ops:
+        return
+    collection = UserPurchase._get_collection()
+    collection.bulk_write(ops, ordered=False)
+    if removed:
+        collection.delete_many({
+            'user_id': {'$in': list({user_id for user_id, _ in pairs})}, 'orders': {'$lte': 0}
+        })
+
+
+def _flush(collection, ops):
+    if ops:
+        collection.bulk_write(ops, ordered=False)
+        ops.clear()
+
+
+def backfill_purchases(batch_size=WRITE_BATCH_SIZE):
+    """
+    Rebuild ``user_purchases`` from completed (and archived) orders; returns pairs written.
+
+    Pairs no longer backed by a completed order are removed. Run it while
+    order status changes are quiet: a transition landing mid-run may be
+    overwritten by the backfill's counts.
+    """
+    now = datetime.utcnow()
+    pairs = {}
+    cursor = iter_orders(
+        {'status': {'$in': list(COMPLETED_ORDER_STATUSES)}, 'user_id': {'$nin': [None, '']}},
+        {'user_id': 1, 'items.id': 1, 'created_at': 1}, batch_size
+    )
+    for order in cursor:
+        purchased_at = order.get('created_at') or now
+        for product_id in order_product_ids(order.get('items')):
+            key = (str(order['user_id']), product_id)
+            entry = pairs.get(key)
+            if entry is None:
+                pairs[key] = [1, purchased_at, purchased_at]
+            else:
+                entry[0] += 1
+                entry[1] = min(entry[1], purchased_at)
+                entry[2] = max(entry[2], purchased_at)
+
+    collection = UserPurchase._get_collection()
+    ops = []
+    for (user_id, product_id), (orders, first, last) in pairs.items():
+        ops.append(UpdateOne({'user_id': user_id, 'product_id': product_id}, {'$set': {
+            'orders': orders, 'first_purchased_at': first,
+            'last_purchased_at': last, 'updated_at': now
+        }}, upsert=True))
+        if len(ops) >= batch_size:
+            _flush(collection, ops)
+    _flush(collection, ops)
+    collection.delete_many({'updated_at': {'$lt': now}})
+    return len(pairs)
+
+
+@subscribe('purchase_index', reset=lambda: UserPurchase._get_collection().delete_many({}))
+def _on_order_events(events):
+    apply_purchases(events)
@@ -0,0 +1,188 @@
+"""
+Co-purchase ("frequently bought together") recommendations.
+
+Completed orders are reduced to sets of product indices and the sparse
+item-item co-occurrence counts are built with NumPy: for every group of
+orders with the same basket size, all item pairs are generated at once
+and counted with ``np.unique``. Pairs are scored by cosine similarity,
+
+    score(i, j) = orders(i and j) / sqrt(orders(i) * orders(j))
+
+and the top-k neighbours of every product are stored in
+``product_recommendations`` so serving is a single primary-key read.
+
+The raw counts are kept in ``product_cooccurrence``. When an order moves
+into (or out of) a completed status the counts are adjusted with ``$inc``
+and only the products in that order are re-ranked; neighbours' scores
+drift slightly until the next full rebuild.
+"""
+
+import heapq
+import math
+from datetime import datetime
+
+import numpy as np
+from pymongo import UpdateOne
+from app.models import ProductCooccurrence, ProductRecommendation, COMPLETED_ORDER_STATUSES
+from app.utils.order_archive import iter_orders
+from app.utils.order_events import subscribe, completion_changes, order_product_ids
+
+TOP_K = 10
+WRITE_BATCH_SIZE = 500
+
+
+def cooccurrence_counts(indptr, indices, n_items):
+    """
+    Sparse co-occurrence from baskets in CSR form (``indptr``/``indices``,
+    items distinct within a basket).
+
+    Returns ``(rows, cols, counts, item_counts)`` with both (i, j) and
+    (j, i) present for every co-purchased pair.
+    """
+    sizes = np.diff(indptr)
+    item_counts = np.bincount(indices, minlength=n_items)
+    keys = []
+    for size in np.unique(sizes):
+        if size < 2:
+            continue
+        baskets = np.flatnonzero(sizes == size)
+        block = indices[indptr[baskets][:, None] + np.arange(size)]
+        a, b = np.triu_indices(size, 1)
+        left = block[:, a].ravel().astype(np.int64)
+        right = block[:, b].ravel().astype(np.int64)
+        keys.append(left * n_items + right)
+        keys.append(right * n_items + left)
+    if not keys:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, item_counts
+    pairs, counts = np.unique(np.concatenate(keys), return_counts=True)
+    return pairs // n_items, pairs % n_items, counts, item_counts
+
+
+def top_k_neighbours(rows, cols, counts, item_counts, k=TOP_K):
+    """Keep the ``k`` best-scoring neighbours of every row."""
+    scores = counts / np.sqrt(item_counts[rows].astype(np.float64) * item_counts[cols])
+    order = np.lexsort((-counts, -scores, rows))
+    sorted_rows = rows[order]
+    starts = np.flatnonzero(np.r_[True, sorted_rows[1:] != sorted_rows[:-1]])
+    lengths = np.diff(np.r_[starts, len(sorted_rows)])
+    rank = np.arange(len(sorted_rows)) - np.repeat(starts, lengths)
+    keep = order[rank < k]
+    return rows[keep], cols[keep], scores[keep], counts[keep]
+
+
+def _load_baskets(batch_size=2000):
+    """Completed orders, archived ones included, as CSR baskets over a product id index."""
+    index = {}
+    indptr = [0]
+    indices = []
+    cursor = iter_orders(
+        {'status': {'$in': list(COMPLETED_ORDER_STATUSES)}}, {'items.id': 1}, batch_size
+    )
+    for order in cursor:
+        for product_id in order_product_ids(order.get('items')):
+            indices.append(index.setdefault(product_id, len(index)))
+        indptr.append(len(indices))
+    ids = [None] * len(index)
+    for product_id, i in index.items():
+        ids[i] = product_id
+    return ids, np.asarray(indptr, dtype=np.int64), np.asarray(indices, dtype=np.int64)
+
+
+def _flush(collection, ops):
+    if ops:
+        collection.bulk_write(ops, ordered=False)
+        ops.clear()
+
+
+def rebuild_recommendations(k=TOP_K):
+    """Recompute all counts and neighbour tables; returns products written."""
+    now = datetime.utcnow()
+    ids, indptr, indices = _load_baskets()
+    rows, cols, counts, item_counts = cooccurrence_counts(indptr, indices, len(ids))
+
+    pairs = {}
+    for i, j, c in zip(rows.tolist(), cols.tolist(), counts.tolist()):
+        pairs.setdefault(i, {})[ids[j]] = c
+
+    top_rows, top_cols, top_scores, top_counts = top_k_neighbours(rows, cols, counts, item_counts, k)
+    neighbours = {}
+    for i, j, score, c in zip(top_rows.tolist(), top_cols.tolist(), top_scores.tolist(), top_counts.tolist()):
+        neighbours.setdefault(i, []).append({'productId': ids[j], 'score': round(score, 4), 'count': c})
+
+    cooccurrence = ProductCooccurrence._get_collection()
+    recommendations = ProductRecommendation._get_collection()
+    co_ops, rec_ops = [], []
+    for i, product_id in enumerate(ids):
+        co_ops.append(UpdateOne({'_id': product_id}, {'$set': {
+            'orders': int(item_counts[i]), 'pairs': pairs.get(i, {}), 'updated_at': now
+        }}, upsert=True))
+        ranked = sorted(neighbours.get(i, []), key=lambda n: (-n['score'], -n['count']))
+        rec_ops.append(UpdateOne({'_id': product_id}, {'$set': {
+            'neighbours': ranked, 'computed_at': now
+        }}, upsert=True))
+        if len(co_ops) >= WRITE_BATCH_SIZE:
+            _flush(cooccurrence, co_ops)
+            _flush(recommendations, rec_ops)
+    _flush(cooccurrence, co_ops)
+    _flush(recommendations, rec_ops)
+
+    cooccurrence.delete_many({'updated_at': {'$lt': now}})
+    recommendations.delete_many({'computed_at': {'$lt': now}})
+    return len(ids)
+
+
+def _rank_product(product_id, k=TOP_K):
+    """Neighbour list for one product from its stored counts."""
+    doc = ProductCooccurrence._get_collection().find_one({'_id': product_id})
+    if not doc or not doc.get('orders'):
+        return []
+    pairs = {other: c for other, c in (doc.get('pairs') or {}).items() if c > 0}
+    totals = {
+        d['_id']: d.get('orders', 0)
+        for d in ProductCooccurrence._get_collection().find(
+            {'_id': {'$in': list(pairs)}}, {'orders': 1}
+        )
+    }
+    scored = [
+        {'productId': other, 'score': round(c / math.sqrt(doc['orders'] * totals[other]), 4), 'count': c}
+        for other, c in pairs.items() if totals.get(other)
+    ]
+    return heapq.nlargest(k, scored, key=lambda n: (n['score'], n['count']))
+
+
+def apply_order(items, sign=1, k=TOP_K):
+    """Add (sign=1) or remove (sign=-1) one completed order's baskets."""
+    product_ids = order_product_ids(items)
+    if not product_ids:
+        return
+    now = datetime.utcnow()
+    ops = []
+    for product_id in product_ids:
+        inc = {'orders': sign}
+        for other in product_ids:
+            if other != product_id:
+                inc[f'pairs.{other}'] = sign
+        ops.append(UpdateOne(
+            {'_id': product_id}, {'$inc': inc, '$set': {'updated_at': now}}, upsert=True
+        ))
+    ProductCooccurrence._get_collection().bulk_write(ops, ordered=False)
+
+    ProductRecommendation._get_collection().bulk_write([
+        UpdateOne({'_id': product_id}, {'$set': {
+            'neighbours': _rank_product(product_id, k), 'computed_at': now
+        }}, upsert=True)
+        for product_id in product_ids
+    ], ordered=False)
+
+
+def get_recommendations(product_id, limit=TOP_K):
+    """Stored neighbours for a product (empty if it has none)."""
+    doc = ProductRecommendation._get_collection().find_one({'_id': product_id}, {'neighbours': 1})
+    return (doc or {}).get('neighbours', [])[:limit]
+
+
+@subscribe('recommendations')
+def _on_order_events(events):
+    for event, sign in completion_changes(events):
+        apply_order(event['items'], sign)
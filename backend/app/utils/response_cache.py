@@ -0,0 +1,146 @@
+"""
+Pre-serialized JSON byte cache for hot catalog responses.
+
+Successful responses from decorated views are stored as final body bytes,
+both plain and gzip-compressed, keyed by (route, host, normalised query
+args, catalog version). Hits are served straight from memory with the
+right Content-Length/Content-Encoding, so neither the query nor jsonify
+runs again until the catalog changes.
+
+Eviction is LRU, bounded by the total number of cached bytes.
+"""
+
+import gzip
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, current_app, Response
+from app.utils.catalog import get_catalog_version
+
+GZIP_MIN_BYTES = 512
+
+
+class ResponseCache:
+    """LRU of encoded response bodies bounded by total byte size."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # key -> (body, gzipped, mimetype)
+        self._lock = threading.Lock()
+        self._stats = {}  # route -> {'hits', 'misses', 'bytesServed'}
+
+    def _route_stats(self, route):
+        return self._stats.setdefault(route, {'hits': 0, 'misses': 0, 'bytesServed': 0})
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, body, mimetype):
+        gzipped = gzip.compress(body, 6) if len(body) >= GZIP_MIN_BYTES else None
+        size = len(body) + (len(gzipped) if gzipped else 0)
+        if size > self.max_bytes:
+            return gzipped
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= self._entry_size(old)
+            self._entries[key] = (body, gzipped, mimetype)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= self._entry_size(evicted)
+        return gzipped
+
+    @staticmethod
+    def _entry_size(entry):
+        return len(entry[0]) + (len(entry[1]) if entry[1] else 0)
+
+    def record(self, route, hit, nbytes=0):
+        with self._lock:
+            stats = self._route_stats(route)
+            stats['hits' if hit else 'misses'] += 1
+            stats['bytesServed'] += nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            routes = {}
+            for route, s in self._stats.items():
+                lookups = s['hits'] + s['misses']
+                routes[route] = dict(s, hitRatio=round(s['hits'] / lookups, 3) if lookups else 0.0)
+            return {
+                'entries': len(self._entries),
+                'totalBytes': self.total_bytes,
+                'maxBytes': self.max_bytes,
+                'routes': routes
+            }
+
+
+_cache = None
+
+
+def get_response_cache():
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache(current_app.config.get('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    return _cache
+
+
+def _accepts_gzip():
+    return 'gzip' in (request.headers.get('Accept-Encoding') or '').lower()
+
+
+def _build_response(body, gzipped, mimetype):
+    use_gzip = gzipped is not None and _accepts_gzip()
+    response = Response(gzipped if use_gzip else body, status=200, mimetype=mimetype)
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Content-Length'] = str(response.content_length)
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def cached_json_response(route, args):
+    """
+    Cache a catalog view's successful JSON body.
+
+    ``args`` maps each query parameter the view reads to its default;
+    anything else in the query string (cache busters, tracking params)
+    is ignored when building the key.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*view_args, **view_kwargs):
+            cache = get_response_cache()
+            normalised = tuple(
+                (name, (request.args.get(name) or default or '').strip())
+                for name, default in sorted(args.items())
+            )
+            key = (route, request.host, tuple(sorted(view_kwargs.items())),
+                   normalised, get_catalog_version())
+
+            entry = cache.get(key)
+            if entry is not None:
+                response = _build_response(*entry)
+                cache.record(route, True, response.content_length)
+                return response
+
+            response = current_app.make_response(f(*view_args, **view_kwargs))
+            cache.record(route, False)
+            if response.status_code != 200 or response.direct_passthrough:
+                return response
+            body = response.get_data()
+            gzipped = cache.put(key, body, response.mimetype)
+            return _build_response(body, gzipped, response.mimetype)
+        return decorated_function
+    return decorator
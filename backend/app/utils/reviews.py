@@ -0,0 +1,152 @@
+"""
+Review serialisation, summaries and review pages.
+
+Reviews carry ``product_name``/``user_name`` snapshots, kept in sync when
+a product or user is renamed, so pages of reviews serialise without
+dereferencing. Older reviews without snapshots get their names from one
+``$in`` query per collection for the whole page.
+
+A product's rating histogram and a page of its reviews come from one
+``$facet`` aggregation, so the cost does not grow with the number of
+reviews shown.
+"""
+
+from bson import ObjectId
+from mongoengine import signals
+from pymongo import UpdateOne
+from app.models import Review, Product, User
+from app.utils.catalog import get_catalog_version
+from app.utils.serializers import REVIEW_SERIALIZER
+
+RATINGS = (1, 2, 3, 4, 5)
+SNAPSHOTS = (('product_id', 'product_name', Product), ('user_id', 'user_name', User))
+
+
+def fill_review_names(raws):
+    """Fill missing name snapshots on raw reviews with one query per collection."""
+    for ref, snapshot, document_cls in SNAPSHOTS:
+        ids = {r[ref] for r in raws if not r.get(snapshot) and r.get(ref)}
+        if not ids:
+            continue
+        names = {
+            d['_id']: d.get('name')
+            for d in document_cls._get_collection().find({'_id': {'$in': list(ids)}}, {'name': 1})
+        }
+        for raw in raws:
+            if not raw.get(snapshot):
+                raw[snapshot] = names.get(raw.get(ref))
+    return raws
+
+
+def serialize_reviews(queryset_or_raws, fields=None):
+    """Serialise a page of reviews without per-review dereferencing."""
+    if hasattr(queryset_or_raws, 'as_pymongo'):
+        queryset_or_raws = list(queryset_or_raws.as_pymongo())
+    return REVIEW_SERIALIZER.serialize_many(fill_review_names(queryset_or_raws), fields)
+
+
+def backfill_review_names(batch_size=500):
+    """Store name snapshots on reviews missing them; returns reviews updated."""
+    collection = Review._get_collection()
+    cursor = collection.find(
+        {'$or': [{'product_name': None}, {'user_name': None}]},
+        {'product_id': 1, 'user_id': 1, 'product_name': 1, 'user_name': 1}
+    ).batch_size(batch_size)
+
+    updated = 0
+    batch = []
+
+    def flush():
+        nonlocal updated
+        fill_review_names(batch)
+        ops = [
+            UpdateOne({'_id': r['_id']}, {'$set': {
+                'product_name': r.get('product_name'), 'user_name': r.get('user_name')
+            }})
+            for r in batch
+        ]
+        if ops:
+            collection.bulk_write(ops, ordered=False)
+        updated += len(ops)
+        batch.clear()
+
+    for raw in cursor:
+        batch.append(raw)
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    return updated
+
+
+def product_reviews_version(product_id):
+    """Conditional GET version: active review count + newest review update."""
+    if not ObjectId.is_valid(product_id):
+        return None
+    summary = next(Review._get_collection().aggregate([
+        {'$match': {'product_id': ObjectId(product_id), 'status': 'active'}},
+        {'$group': {'_id': None, 'count': {'$sum': 1}, 'updated_at': {'$max': '$updated_at'}}}
+    ]), {})
+    updated_at = summary.get('updated_at')
+    stamp = updated_at.isoformat() if updated_at else ''
+    # Catalog version covers product renames shown in productName
+    return f"{summary.get('count', 0)}:{stamp}:{get_catalog_version()}", updated_at
+
+
+def rating_summary(histogram):
+    """Average, count and 1-5 histogram from ``{rating: count}``."""
+    counts = {str(k): v for k, v in histogram.items()}
+    histogram = {str(r): int(counts.get(str(r)) or 0) for r in RATINGS}
+    count = sum(histogram.values())
+    total = sum(r * histogram[str(r)] for r in RATINGS)
+    return {
+        'average': round(total / count, 2) if count else 0,
+        'count': count,
+        'histogram': histogram
+    }
+
+
+def product_review_page(product_id, product_name=None, page=1, per_page=10):
+    """
+    Rating summary and one page of active reviews for a product.
+
+    Returns ``(summary, reviews)`` with reviews serialized for the API.
+    """
+    result = next(Review._get_collection().aggregate([
+        {'$match': {'product_id': ObjectId(product_id), 'status': 'active'}},
+        {'$facet': {
+            'histogram': [
+                {'$group': {'_id': '$rating', 'count': {'$sum': 1}}}
+            ],
+            'reviews': [
+                {'$sort': {'created_at': -1, '_id': -1}},
+                {'$skip': (page - 1) * per_page},
+                {'$limit': per_page}
+            ]
+        }}
+    ]))
+    summary = rating_summary({row['_id']: row['count'] for row in result['histogram']})
+    rows = result['reviews']
+    for row in rows:
+        row['product_name'] = row.get('product_name') or product_name
+    return summary, serialize_reviews(rows)
+
+
+def _remember_rename(sender, document, created=False, **kwargs):
+    document._renamed = not created and 'name' in document._get_changed_fields()
+
+
+def _on_rename(sender, document, **kwargs):
+    if not getattr(document, '_renamed', False):
+        return
+    ref, snapshot = ('product_id', 'product_name') if sender is Product else ('user_id', 'user_name')
+    try:
+        Review._get_collection().update_many(
+            {ref: document.pk}, {'$set': {snapshot: document.name}}
+        )
+    except Exception as e:
+        print(f"Review name snapshot update failed: {str(e)}")
+
+
+for _document_cls in (Product, User):
+    signals.pre_save_post_validation.connect(_remember_rename, sender=_document_cls, weak=False)
+    signals.post_save.connect(_on_rename, sender=_document_cls, weak=False)
@@ -0,0 +1,221 @@
+"""
+Projection-aware serializers that map raw BSON straight to response dicts.
+
+List endpoints query with ``.only()`` + ``.as_pymongo()`` so MongoEngine
+never hydrates full documents, then run each raw document through a
+precompiled list of field mappers. The same mappers back the models'
+``to_dict`` methods, so single-document and list responses stay identical.
+
+Clients can request a sparse fieldset with ``?fields=id,name,price``.
+"""
+
+from flask import request
+from app.utils.images import stored_image_urls
+
+def _to_str(value, doc, ctx):
+    return str(value) if value is not None else None
+
+
+def _to_iso(value, doc, ctx):
+    return value.isoformat() if value else None
+
+
+def _image_urls(value, doc, ctx):
+    return stored_image_urls(value, doc.get('image_urls'), ctx.get('base_url'))
+
+
+class Field:
+    """Maps one raw document field to one response key."""
+
+    __slots__ = ('key', 'source', 'transform', 'default', 'requires')
+
+    def __init__(self, key, source, transform=None, default=None, requires=()):
+        self.key = key
+        self.source = source
+        self.transform = transform
+        self.default = default
+        self.requires = requires  # extra raw fields the transform reads
+
+    @property
+    def attrs(self):
+        """MongoEngine attribute names used for ``.only()`` projections."""
+        return tuple('id' if s == '_id' else s for s in (self.source,) + self.requires)
+
+
+class Serializer:
+    """Ordered set of field mappers with per-fieldset compiled plans."""
+
+    def __init__(self, *fields):
+        self.fields = fields
+        self._by_key = {f.key: f for f in fields}
+        self._plans = {}
+
+    def extend(self, *fields):
+        return Serializer(*(self.fields + fields))
+
+    def rename(self, **renames):
+        return Serializer(*(
+            Field(renames.get(f.key, f.key), f.source, f.transform, f.default, f.requires)
+            for f in self.fields
+        ))
+
+    def subset(self, *keys):
+        return Serializer(*(self._by_key[k] for k in keys))
+
+    def _plan(self, keys=None):
+        selected = tuple(f.key for f in self.fields if f.key in keys) if keys else ()
+        plan = self._plans.get(selected)
+        if plan is None:
+            fields = [self._by_key[k] for k in selected] if selected else self.fields
+            mappers = tuple(
+                (f.key, f.source, f.transform, f.default) for f in fields
+            )
+            attrs = tuple(dict.fromkeys(a for f in fields for a in f.attrs))
+            plan = (mappers, attrs)
+            self._plans[selected] = plan
+        return plan
+
+    def serialize(self, raw, fields=None, **ctx):
+        """Map a single raw (or ``to_mongo()``) document to a response dict."""
+        mappers, _ = self._plan(fields)
+        return self._map(mappers, raw, ctx)
+
+    @staticmethod
+    def _map(mappers, raw, ctx):
+        out = {}
+        get = raw.get
+        for key, source, transform, default in mappers:
+            value = get(source)
+            if transform is not None:
+                value = transform(value, raw, ctx)
+            elif value is None:
+                value = default() if callable(default) else default
+            out[key] = value
+        return out
+
+    def serialize_queryset(self, queryset, fields=None, **ctx):
+        """Project and fetch a queryset as raw BSON, then map every row."""
+        mappers, attrs = self._plan(fields)
+        rows = queryset.only(*attrs).as_pymongo()
+        return [self._map(mappers, raw, ctx) for raw in rows]
+
+    def keys(self, fields=None):
+        """Response keys a fieldset produces, in serializer order."""
+        mappers, _ = self._plan(fields)
+        return [key for key, _, _, _ in mappers]
+
+    def projection(self, fields=None):
+        """Raw ``$project`` spec for the fields a fieldset reads."""
+        _, attrs = self._plan(fields)
+        return {('_id' if a == 'id' else a): 1 for a in attrs}
+
+    def serialize_many(self, raws, fields=None, **ctx):
+        mappers, _ = self._plan(fields)
+        return [self._map(mappers, raw, ctx) for raw in raws]
+
+
+def parse_fields():
+    """Read the ``?fields=`` sparse fieldset from the query string."""
+    raw = request.args.get('fields')
+    if not raw:
+        return None
+    keys = [k.strip() for k in raw.split(',') if k.strip()]
+    return keys or None
+
+
+PRODUCT_SERIALIZER = Serializer(
+    Field('id', '_id', _to_str),
+    Field('name', 'name'),
+    Field('category', 'category'),
+    Field('price', 'price'),
+    Field('originalPrice', 'original_price'),
+    Field('description', 'description'),
+    Field('image', 'image', _image_urls, requires=('image_urls',)),
+    Field('quantity', 'quantity'),
+    Field('benefits', 'benefits', default=list),
+    Field('uses', 'uses', default=list),
+    Field('howToUse', 'how_to_use', default=list),
+    Field('reviews', 'reviews', default=list),
+    Field('region', 'region'),
+    Field('rating', 'rating_average', default=0),
+    Field('ratingCount', 'rating_count', default=0),
+)
+
+# Market and admin screens consume snake_case product keys
+PRODUCT_MARKET_SERIALIZER = PRODUCT_SERIALIZER.rename(
+    originalPrice='original_price',
+    howToUse='how_to_use',
+    ratingCount='rating_count',
+)
+
+# Admin screens also see live stock (not on cached public responses,
+# since sales change it without bumping the catalog version)
+PRODUCT_ADMIN_SERIALIZER = PRODUCT_MARKET_SERIALIZER.extend(
+    Field('stock', 'stock'),
+)
+
+ORDER_SERIALIZER = Serializer(
+    Field('id', '_id', _to_str),
+    Field('userId', 'user_id'),
+    Field('userName', 'user_name'),
+    Field('userPhone', 'user_phone'),
+    Field('deliveryAddress', 'delivery_address'),
+    Field('paymentMethod', 'payment_method'),
+    Field('totalAmount', 'total_amount'),
+    Field('items', 'items', default=list),
+    Field('status', 'status'),
+    Field('createdAt', 'created_at', _to_iso),
+)
+
+USER_SERIALIZER = Serializer(
+    Field('id', '_id', _to_str),
+    Field('email', 'email'),
+    Field('name', 'name'),
+    Field('phone', 'phone'),
+    Field('address', 'address'),
+    Field('image', 'image'),
+    Field('role', 'role'),
+    Field('status', 'status'),
+    Field('createdAt', 'created_at', _to_iso),
+    Field('updatedAt', 'updated_at', _to_iso),
+)
+
+USER_ADMIN_SERIALIZER = USER_SERIALIZER.subset(
+    'id', 'name', 'email', 'phone', 'address', 'image', 'role', 'status'
+)
+
+FORUM_THREAD_SERIALIZER = Serializer(
+    Field('id', '_id', _to_str),
+    Field('title', 'title'),
+    Field('content', 'content'),
+    Field('userName', 'user_name'),
+    Field('viewsCount', 'views_count', default=0),
+    Field('repliesCount', 'replies_count', default=0),
+    Field('likeCount', 'likes_count', default=0),
+    Field('status', 'status'),
+    Field('attachments', 'attachments', default=list),
+    Field('createdAt', 'created_at', _to_iso),
+    Field('updatedAt', 'updated_at', _to_iso),
+)
+
+# Forum screen list aliases
+FORUM_THREAD_LIST_SERIALIZER = FORUM_THREAD_SERIALIZER.extend(
+    Field('author', 'user_name', default='Anonymous'),
+    Field('viewCount', 'views_count', default=0),
+    Field('commentCount', 'replies_count', default=0),
+)
+
+REVIEW_SERIALIZER = Serializer(
+    Field('id', '_id', _to_str),
+    Field('productId', 'product_id', _to_str),
+    Field('userId', 'user_id', _to_str),
+    Field('rating', 'rating'),
+    Field('title', 'title'),
+    Field('content', 'content'),
+    Field('verifiedPurchase', 'verified_purchase', default=False),
+    Field('status', 'status'),
+    Field('createdAt', 'created_at', _to_iso),
+    Field('updatedAt', 'updated_at', _to_iso),
+    Field('productName', 'product_name'),
+    Field('userName', 'user_name'),
+)
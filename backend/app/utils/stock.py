@@ -0,0 +1,215 @@
+"""
+Atomic stock counters and checkout reservations.
+
+``Product.stock`` is decremented only with a conditional update,
+``{_id, stock: {$gte: qty}}`` + ``$inc: {stock: -qty}``, so concurrent
+checkouts can never take more units than exist and no read-modify-write
+window is left open. Products whose stock is None are not tracked and
+always available.
+
+A reservation takes every line of a cart all-or-nothing: lines are
+decremented in product id order and, if one falls short, the lines
+already taken are given back with compensating increments. The units
+taken are recorded in ``stock_reservations``; a held reservation is
+either committed to an order or released (by the client, by a failed
+checkout, or by the expiry sweep after ``STOCK_RESERVATION_TTL_SECONDS``),
+and the held -> committed/released transition is a single atomic update
+so stock is returned at most once.
+
+Committed reservations stay with their order: when the order event log
+shows it cancelled or deleted before it shipped, the committed units
+are released the same way. A cancelled order no longer holds stock, so
+it cannot be reopened (``reopens_cancelled``).
+"""
+
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from flask import current_app
+from pymongo import UpdateOne
+from app.models import Product, StockReservation, COMPLETED_ORDER_STATUSES
+from app.utils.order_events import subscribe
+
+SWEEP_INTERVAL = 30.0  # seconds between opportunistic expiry sweeps per worker
+SWEEP_BATCH = 500
+# Cancelling or deleting an order in these statuses does not return its stock: the goods have left
+SHIPPED_ORDER_STATUSES = ('shipped',) + COMPLETED_ORDER_STATUSES
+
+_sweep = {'at': 0.0}
+
+
+class InsufficientStock(ValueError):
+    """Raised when a cart line cannot be covered by the available stock."""
+
+    def __init__(self, product_ids):
+        super().__init__('Insufficient stock')
+        self.product_ids = product_ids
+
+
+def parse_stock(value):
+    """Admin/import stock value: a non-negative int, or None to stop tracking."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        raise ValueError('stock must be a non-negative integer')
+    try:
+        stock = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('stock must be a non-negative integer')
+    if stock < 0 or stock != float(value):
+        raise ValueError('stock must be a non-negative integer')
+    return stock
+
+
+def _cart_key(cart):
+    return dict(sorted((str(product_id), quantity) for product_id, quantity in cart))
+
+
+def _take(collection, product_id, quantity):
+    """'taken', 'untracked' or 'short' for one line."""
+    if not ObjectId.is_valid(product_id):
+        return 'untracked'
+    oid = ObjectId(product_id)
+    result = collection.update_one(
+        {'_id': oid, 'stock': {'$gte': quantity}}, {'$inc': {'stock': -quantity}}
+    )
+    if result.modified_count:
+        return 'taken'
+    doc = collection.find_one({'_id': oid}, {'stock': 1})
+    if doc is None or doc.get('stock') is None:
+        return 'untracked'
+    return 'short'
+
+
+def _restore(items):
+    if items:
+        Product._get_collection().bulk_write([
+            UpdateOne(
+                {'_id': ObjectId(item['product_id']), 'stock': {'$ne': None}},
+                {'$inc': {'stock': item['quantity']}}
+            )
+            for item in items
+        ], ordered=False)
+
+
+def reserve_stock(cart, ttl=None):
+    """
+    Hold stock for ``[(product_id, quantity)]`` all-or-nothing.
+
+    Returns the reservation id, or None when no line is stock-tracked.
+    Raises InsufficientStock (after giving back what was taken).
+    """
+    _maybe_sweep()
+    collection = Product._get_collection()
+    taken = []
+    for product_id, quantity in sorted(cart):
+        outcome = _take(collection, product_id, quantity)
+        if outcome == 'short':
+            _restore(taken)
+            raise InsufficientStock([product_id])
+        if outcome == 'taken':
+            taken.append({'product_id': product_id, 'quantity': quantity})
+    if not taken:
+        return None
+
+    ttl = ttl or current_app.config.get('STOCK_RESERVATION_TTL_SECONDS', 900)
+    now = datetime.utcnow()
+    doc = {
+        'items': taken,
+        'cart': _cart_key(cart),
+        'status': 'held',
+        'expires_at': now + timedelta(seconds=ttl),
+        'created_at': now
+    }
+    try:
+        StockReservation._get_collection().insert_one(doc)
+    except Exception:
+        _restore(taken)
+        raise
+    return str(doc['_id'])
+
+
+def _close(reservation_id, from_status, to_status, match=None, fields=None):
+    """Atomically move a reservation between states; returns it or None."""
+    if not ObjectId.is_valid(str(reservation_id)):
+        return None
+    query = {'_id': ObjectId(str(reservation_id)), 'status': from_status}
+    query.update(match or {})
+    # Committed reservations are kept (no closed_at, so no TTL) until released
+    stamp = 'committed_at' if to_status == 'committed' else 'closed_at'
+    update = {'status': to_status, stamp: datetime.utcnow()}
+    update.update(fields or {})
+    return StockReservation._get_collection().find_one_and_update(query, {'$set': update})
+
+
+def release_reservation(reservation_id, committed=False):
+    """Give a held (or, to undo a failed checkout, committed) reservation back."""
+    doc = _close(reservation_id, 'committed' if committed else 'held', 'released')
+    if doc is None:
+        return False
+    _restore(doc['items'])
+    return True
+
+
+def release_order_stock(order_id):
+    """Give back the stock committed to an order; False if none is committed."""
+    doc = StockReservation._get_collection().find_one(
+        {'order_id': str(order_id), 'status': 'committed'}, {'_id': 1}
+    )
+    return doc is not None and release_reservation(doc['_id'], committed=True)
+
+
+def checkout_stock(cart, order_id, reservation_id=None):
+    """
+    Take stock for an order and commit it to ``order_id``.
+
+    A held, unexpired reservation for exactly this cart is consumed;
+    otherwise it is released and the cart is reserved afresh. Returns
+    the committed reservation id (None if nothing is tracked).
+    """
+    if reservation_id:
+        consumed = _close(reservation_id, 'held', 'committed', {
+            'cart': _cart_key(cart), 'expires_at': {'$gt': datetime.utcnow()}
+        }, {'order_id': order_id})
+        if consumed is not None:
+            return reservation_id
+        release_reservation(reservation_id)
+
+    reservation_id = reserve_stock(cart)
+    if reservation_id:
+        _close(reservation_id, 'held', 'committed', fields={'order_id': order_id})
+    return reservation_id
+
+
+def release_expired_reservations(limit=SWEEP_BATCH):
+    """Release held reservations past their expiry; returns how many."""
+    expired = StockReservation._get_collection().find(
+        {'status': 'held', 'expires_at': {'$lt': datetime.utcnow()}}, {'_id': 1}
+    ).limit(limit)
+    return sum(1 for doc in expired if release_reservation(doc['_id']))
+
+
+def _maybe_sweep():
+    now = time.monotonic()
+    if now - _sweep['at'] < SWEEP_INTERVAL:
+        return
+    _sweep['at'] = now
+    try:
+        release_expired_reservations()
+    except Exception as e:
+        print(f"Stock reservation sweep failed: {str(e)}")
+
+
+def reopens_cancelled(current_status, new_status):
+    """True if a status change would move an order out of ``cancelled``."""
+    return current_status == 'cancelled' and new_status != 'cancelled'
+
+
+@subscribe('stock_release')
+def _on_order_events(events):
+    for event in events:
+        if event.get('from_status') in SHIPPED_ORDER_STATUSES + ('cancelled',):
+            continue
+        if event.get('to_status') == 'cancelled' or event['type'] == 'deleted':
+            release_order_stock(event['order_id'])
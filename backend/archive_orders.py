@@ -0,0 +1,40 @@
+"""
+Move old terminal orders from orders to the compressed orders_archive.
+
+Orders that are completed, delivered or cancelled and were created more
+than ``--older-than-days`` ago (default ``ORDER_ARCHIVE_AFTER_DAYS``) are
+moved in batches, oldest first. Dashboards keep counting them through
+the order rollups, and lookups by id fall through to the archive. Safe to
+interrupt and re-run; schedule it (e.g. nightly cron) once the backlog
+has been moved.
+
+Usage:
+    python archive_orders.py [--older-than-days 365] [--batch-size 500] [--limit N] [--dry-run]
+"""
+
+import argparse
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.utils.order_archive import archive_orders, count_archivable
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--older-than-days', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=None)
+    parser.add_argument('--limit', type=int, default=None, help='stop after moving this many orders')
+    parser.add_argument('--dry-run', action='store_true', help='only count the orders that would move')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.dry_run:
+            print(f"{count_archivable(args.older_than_days)} orders would be archived")
+        else:
+            start = time.perf_counter()
+            moved = archive_orders(args.older_than_days, args.batch_size, args.limit)
+            print(f"Archived {moved} orders in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,33 @@
+"""
+Backfill the user purchase index from existing orders.
+
+The index is maintained as orders move into or out of a completed
+status; run this once after deploying it (or after bulk order imports)
+to rebuild every (user, product) pair from the orders collection.
+
+Usage:
+    python backfill_purchases.py [--batch-size 1000]
+"""
+
+import argparse
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.models import UserPurchase
+from app.utils.purchases import backfill_purchases, WRITE_BATCH_SIZE
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--batch-size', type=int, default=WRITE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        UserPurchase.ensure_indexes()
+        start = time.perf_counter()
+        count = backfill_purchases(args.batch_size)
+        print(f"Indexed {count} user/product purchases in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,54 @@
+"""
+Benchmark the admin order export writers: throughput and peak memory of
+CSV and NDJSON, plain and gzipped, over synthetic raw orders.
+
+Orders are generated lazily as a server-side cursor would yield them
+(no database needed), so peak memory should stay flat as the order count
+grows; compare with bench_order_listing.py's buffered path.
+
+Usage:
+    python benchmarks/bench_order_export.py [--orders 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_order_listing import make_orders
+from app.utils.order_export import write_orders_csv, write_orders_ndjson, gzip_chunks
+
+
+def export(writer, compress, n):
+    chunks = writer(make_orders(n))
+    if compress:
+        chunks = gzip_chunks(chunks)
+    return sum(len(chunk) for chunk in chunks)
+
+
+def measure(writer, compress, n):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = export(writer, compress, n)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, seconds, peak
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--orders', type=int, default=100_000)
+    args = parser.parse_args()
+
+    sizes = sorted({max(args.orders // 10, 1), args.orders})
+    print(f"{'orders':>9} {'format':>10} {'body MB':>9} {'rows/s':>10} {'peak MB':>9}")
+    for n in sizes:
+        for name, writer in (('csv', write_orders_csv), ('ndjson', write_orders_ndjson)):
+            for compress in (False, True):
+                size, seconds, peak = measure(writer, compress, n)
+                label = name + ('.gz' if compress else '')
+                print(f"{n:>9} {label:>10} {size / 1e6:>9.1f} {n / seconds:>10,.0f} {peak / 1e6:>9.1f}")
@@ -0,0 +1,85 @@
+"""
+Benchmark peak memory of order listings: the streamed JSON writer behind
+/api/orders/list and /api/orders/my versus building the whole response
+with one ``jsonify``-style dump.
+
+Synthetic raw order documents are generated lazily, as a server-side
+cursor would yield them, so the numbers isolate what the response path
+itself holds (no database needed). Streamed peak should stay flat as the
+order count grows; the buffered peak grows linearly.
+
+Usage:
+    python benchmarks/bench_order_listing.py [--orders 500000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+from app.utils.order_listing import write_orders_json
+from app.utils.serializers import ORDER_SERIALIZER
+
+STATUSES = ('pending', 'processing', 'shipped', 'delivered', 'completed', 'cancelled')
+
+
+def make_orders(n):
+    """Yield ``n`` raw orders, newest first."""
+    start = datetime(2026, 1, 1)
+    for i in range(n):
+        yield {
+            '_id': ObjectId(),
+            'user_id': str(ObjectId()),
+            'user_name': f'Customer {i}',
+            'user_phone': '+639120000000',
+            'delivery_address': f'{i} Moringa St, Quezon City',
+            'payment_method': ('cod', 'gcash', 'card')[i % 3],
+            'total_amount': 250.0 + i % 900,
+            'items': [
+                {'id': str(ObjectId()), 'name': 'Moringa Tea', 'price': 120.0, 'cartQuantity': 2},
+                {'id': str(ObjectId()), 'name': 'Moringa Powder', 'price': 130.0, 'cartQuantity': 1},
+            ],
+            'status': STATUSES[i % len(STATUSES)],
+            'created_at': start - timedelta(seconds=i),
+        }
+
+
+def streamed(n):
+    size = 0
+    for chunk in write_orders_json(make_orders(n)):
+        size += len(chunk)
+    return size
+
+
+def buffered(n):
+    orders = ORDER_SERIALIZER.serialize_many(make_orders(n))
+    return len(json.dumps({'success': True, 'count': len(orders), 'orders': orders}, default=str))
+
+
+def measure(fn, n):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = fn(n)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, seconds, peak
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--orders', type=int, default=500_000)
+    args = parser.parse_args()
+
+    sizes = sorted({max(args.orders // 100, 1), max(args.orders // 10, 1), args.orders})
+    print(f"{'orders':>9} {'path':>9} {'body MB':>9} {'seconds':>8} {'peak MB':>9}")
+    for n in sizes:
+        for name, fn in (('streamed', streamed), ('buffered', buffered)):
+            size, seconds, peak = measure(fn, n)
+            print(f"{n:>9} {name:>9} {size / 1e6:>9.1f} {seconds:>8.2f} {peak / 1e6:>9.1f}")
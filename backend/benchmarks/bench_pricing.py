@@ -0,0 +1,108 @@
+"""
+Benchmark cart pricing throughput for 1-100 line carts.
+
+By default only the pricing step is timed, against synthetic serialized
+products (no database needed). With ``--db`` the full ``price_cart`` path
+runs against the configured database, timed cold (one ``$in`` query per
+cart) and warm (served from the product cache), next to a naive lookup
+with one query per cart line.
+
+Usage:
+    python benchmarks/bench_pricing.py [--db] [--repeats 200]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+from app.utils.pricing import parse_cart, price_lines
+
+CART_SIZES = (1, 5, 10, 25, 50, 100)
+
+
+def make_products(n):
+    products = {}
+    for i in range(n):
+        product_id = str(ObjectId())
+        products[product_id] = {
+            'id': product_id,
+            'name': f'Moringa Product {i}',
+            'category': ('Tea', 'Powder', 'Capsules', 'Oil')[i % 4],
+            'price': 99.5 + i,
+            'originalPrice': 149.0 + i if i % 3 == 0 else None,
+            'image': [f'https://nutrilea-backend.onrender.com/uploads/products/{i}.jpg'],
+        }
+    return products
+
+
+def make_items(ids, size):
+    return [{'id': product_id, 'cartQuantity': 1 + i % 3} for i, product_id in enumerate(ids[:size])]
+
+
+def rate(fn, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    seconds = time.perf_counter() - start
+    return repeats / seconds
+
+
+def bench_pure(repeats):
+    products = make_products(max(CART_SIZES))
+    ids = list(products)
+    print(f"{'lines':>6} {'quotes/s':>12} {'lines/s':>12}")
+    for size in CART_SIZES:
+        items = make_items(ids, size)
+        per_second = rate(lambda: price_lines(parse_cart(items), products), repeats)
+        print(f"{size:>6} {per_second:>12,.0f} {per_second * size:>12,.0f}")
+
+
+def bench_db(repeats):
+    from app import create_app
+    from app.models import Product
+    from app.utils import catalog
+    from app.utils.pricing import price_cart
+    from app.utils.serializers import PRODUCT_SERIALIZER
+
+    def naive(items):
+        products = {}
+        for item in items:
+            product = Product.objects(id=item['id']).first()
+            if product:
+                products[item['id']] = PRODUCT_SERIALIZER.serialize(product.to_mongo())
+        return price_lines(parse_cart(items), products)
+
+    def cold(items):
+        catalog._products['entries'] = {}
+        return price_cart(items)
+
+    app = create_app()
+    with app.app_context():
+        ids = [str(p['_id']) for p in Product._get_collection().find({}, {'_id': 1}).limit(max(CART_SIZES))]
+        if not ids:
+            print("No products in the database")
+            return
+        print(f"{'lines':>6} {'naive/s':>10} {'cold/s':>10} {'warm/s':>10}")
+        for size in CART_SIZES:
+            if size > len(ids):
+                break
+            items = make_items(ids, size)
+            price_cart(items)
+            print(f"{size:>6} {rate(lambda: naive(items), repeats):>10,.0f} "
+                  f"{rate(lambda: cold(items), repeats):>10,.0f} "
+                  f"{rate(lambda: price_cart(items), repeats):>10,.0f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--db', action='store_true', help='time price_cart against the configured database')
+    parser.add_argument('--repeats', type=int, default=2000)
+    args = parser.parse_args()
+    if args.db:
+        bench_db(args.repeats)
+    else:
+        bench_pure(args.repeats)
@@ -0,0 +1,87 @@
+"""
+Benchmark the co-purchase recommender rebuild on synthetic order history.
+
+Generates completed-order baskets with a skewed product popularity, then
+times the NumPy co-occurrence count and top-k selection used by
+``rebuild_recommendations``. A pure-Python pair counter is timed on a
+subset for comparison (no database needed).
+
+Usage:
+    python benchmarks/bench_recommendations.py [--orders 1000000] [--products 500]
+"""
+
+import argparse
+import os
+import sys
+import time
+from itertools import combinations
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from app.utils.recommendations import cooccurrence_counts, top_k_neighbours, TOP_K
+
+PYTHON_SUBSET = 100_000
+
+
+def make_baskets(n_orders, n_products, seed=7):
+    """CSR baskets of 1-6 distinct products drawn with Zipf-like popularity."""
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, n_products + 1) ** 0.8
+    weights /= weights.sum()
+    sizes = rng.choice(np.arange(1, 7), size=n_orders, p=[.3, .25, .2, .12, .08, .05])
+    draws = rng.choice(n_products, size=(n_orders, 6), p=weights)
+    baskets = []
+    for row, size in zip(draws, sizes):
+        baskets.append(np.unique(row[:size]))
+    indptr = np.zeros(n_orders + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(b) for b in baskets])
+    return indptr, np.concatenate(baskets).astype(np.int64)
+
+
+def python_counts(indptr, indices):
+    counts = {}
+    for start, end in zip(indptr[:-1].tolist(), indptr[1:].tolist()):
+        for i, j in combinations(indices[start:end].tolist(), 2):
+            counts[(i, j)] = counts.get((i, j), 0) + 1
+            counts[(j, i)] = counts.get((j, i), 0) + 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--orders', type=int, default=1_000_000)
+    parser.add_argument('--products', type=int, default=500)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    indptr, indices = make_baskets(args.orders, args.products)
+    print(f"Generated {args.orders:,} orders / {len(indices):,} lines "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    rows, cols, counts, item_counts = cooccurrence_counts(indptr, indices, args.products)
+    count_t = time.perf_counter() - start
+
+    start = time.perf_counter()
+    top = top_k_neighbours(rows, cols, counts, item_counts, TOP_K)
+    top_t = time.perf_counter() - start
+
+    print(f"numpy co-occurrence: {count_t:.2f}s ({len(rows):,} non-zero pairs)")
+    print(f"numpy top-{TOP_K}:        {top_t:.2f}s ({len(top[0]):,} neighbours kept)")
+
+    subset = min(PYTHON_SUBSET, args.orders)
+    sub_indptr = indptr[:subset + 1]
+    sub_indices = indices[:sub_indptr[-1]]
+    start = time.perf_counter()
+    expected = python_counts(sub_indptr, sub_indices)
+    py_t = time.perf_counter() - start
+    start = time.perf_counter()
+    sub = cooccurrence_counts(sub_indptr, sub_indices, args.products)
+    np_t = time.perf_counter() - start
+    assert expected == dict(zip(zip(sub[0].tolist(), sub[1].tolist()), sub[2].tolist()))
+    print(f"{subset:,} orders: python {py_t:.2f}s, numpy {np_t:.2f}s ({py_t / np_t:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark list serialization: MongoEngine hydration + to_dict versus the
+raw BSON fast path in app.utils.serializers.
+
+Both paths start from the same raw documents a cursor would return, so the
+numbers isolate per-document CPU cost (no database needed).
+
+Usage:
+    python benchmarks/bench_serializers.py
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+from app.models import Product, Order
+from app.utils.serializers import PRODUCT_MARKET_SERIALIZER, ORDER_SERIALIZER
+
+PAGE_SIZES = (20, 200, 2000)
+REPEATS = 20
+BASE_URL = 'https://nutrilea-backend.onrender.com'
+
+
+def make_products(n):
+    return [{
+        '_id': ObjectId(),
+        'name': f'Moringa Product {i}',
+        'category': ('Tea', 'Powder', 'Capsules', 'Oil')[i % 4],
+        'price': 100.0 + i,
+        'original_price': 150.0 + i,
+        'description': 'Organic moringa product ' * 4,
+        'image': [f'uploads/products/{i}.jpg', 'https://cdn.example.com/x.jpg'],
+        'quantity': '100g',
+        'benefits': ['Rich in vitamins', 'Boosts immunity'],
+        'uses': ['Tea', 'Smoothies'],
+        'how_to_use': ['Steep for 5 minutes'],
+        'reviews': [],
+        'created_at': datetime.utcnow(),
+    } for i in range(n)]
+
+
+def make_orders(n):
+    return [{
+        '_id': ObjectId(),
+        'user_id': str(ObjectId()),
+        'user_name': 'Juan Dela Cruz',
+        'user_phone': '+63912345678',
+        'delivery_address': '123 Manila St, QC',
+        'payment_method': 'cod',
+        'total_amount': 948.0,
+        'items': [{'id': str(ObjectId()), 'name': 'Tea', 'price': 100, 'cartQuantity': 2}] * 3,
+        'status': 'pending',
+        'created_at': datetime.utcnow(),
+    } for _ in range(n)]
+
+
+def legacy_products(raws):
+    out = []
+    for raw in raws:
+        product = Product._from_son(raw)
+        out.append({
+            'id': str(product.id),
+            'name': product.name,
+            'category': product.category,
+            'price': product.price,
+            'original_price': product.original_price,
+            'description': product.description,
+            'image': product.get_image_urls(BASE_URL),
+            'quantity': product.quantity,
+            'benefits': product.benefits,
+            'uses': product.uses,
+            'how_to_use': product.how_to_use,
+            'reviews': product.reviews
+        })
+    return out
+
+
+def legacy_orders(raws):
+    return [Order._from_son(raw).to_dict() for raw in raws]
+
+
+def fast_products(raws):
+    return PRODUCT_MARKET_SERIALIZER.serialize_many(raws, base_url=BASE_URL)
+
+
+def fast_orders(raws):
+    return ORDER_SERIALIZER.serialize_many(raws)
+
+
+def timeit(fn, raws):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(raws)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'model':<10}{'items':>8}{'legacy ms':>12}{'raw ms':>10}{'speedup':>10}")
+    for label, make, legacy, fast in (
+        ('Product', make_products, legacy_products, fast_products),
+        ('Order', make_orders, legacy_orders, fast_orders),
+    ):
+        for size in PAGE_SIZES:
+            raws = make(size)
+            assert len(legacy(raws)) == len(fast(raws))
+            slow_t = timeit(legacy, raws)
+            fast_t = timeit(fast, raws)
+            print(f"{label:<10}{size:>8}{slow_t * 1000:>12.2f}{fast_t * 1000:>10.2f}"
+                  f"{slow_t / fast_t:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
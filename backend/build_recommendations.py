@@ -0,0 +1,31 @@
+"""
+Rebuild co-purchase recommendations from all completed orders.
+
+Recommendations are updated incrementally as orders complete; run this
+periodically (or after bulk order imports) to recompute every product's
+counts and neighbour scores from scratch.
+
+Usage:
+    python build_recommendations.py [--top-k 10]
+"""
+
+import argparse
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.utils.recommendations import rebuild_recommendations, TOP_K
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--top-k', type=int, default=TOP_K)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        start = time.perf_counter()
+        count = rebuild_recommendations(args.top_k)
+        print(f"Rebuilt recommendations for {count} products in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,66 @@
+"""
+Import or export the product catalog as NDJSON (one product per line).
+
+Import upserts products by name in chunks with one bulk write per chunk
+and prints a report with per-row errors and throughput.
+
+Usage:
+    python catalog_ndjson.py export products.ndjson [--category Tea]
+    python catalog_ndjson.py import products.ndjson [--chunk-size 500] [--dry-run]
+
+Use ``-`` as the file to read from stdin or write to stdout.
+"""
+
+import argparse
+import json
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.utils.catalog_io import export_products_ndjson, import_products_ndjson, DEFAULT_CHUNK_SIZE
+
+
+def export_catalog(path, category=None):
+    out = sys.stdout if path == '-' else open(path, 'w', encoding='utf-8')
+    try:
+        count = 0
+        for line in export_products_ndjson(category):
+            out.write(line)
+            count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return count
+
+
+def import_catalog(path, chunk_size, dry_run):
+    source = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        return import_products_ndjson(source, chunk_size, dry_run)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    sub = parser.add_subparsers(dest='command', required=True)
+    export_parser = sub.add_parser('export')
+    export_parser.add_argument('path')
+    export_parser.add_argument('--category')
+    import_parser = sub.add_parser('import')
+    import_parser.add_argument('path')
+    import_parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    import_parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.command == 'export':
+            count = export_catalog(args.path, args.category)
+            print(f"Exported {count} products", file=sys.stderr)
+        else:
+            report = import_catalog(args.path, args.chunk_size, args.dry_run)
+            print(json.dumps(report, indent=2), file=sys.stderr)
+            sys.exit(1 if report['errorCount'] else 0)
@@ -34,6 +34,48 @@ class Config:
     print(f"DEBUG: DATABASE_URL = {DATABASE_URL or 'NOT SET'}")
     print(f"DEBUG: MONGODB_URI = {MONGODB_URI[:50]}...")
     
+    # Public hosts that serve /uploads; product image URLs are precomputed
+    # for each of these when a product is written
+    IMAGE_BASE_URLS = [
+        u.strip().rstrip('/') for u in os.environ.get(
+            'IMAGE_BASE_URLS', 'https://nutrilea-backend.onrender.com'
+        ).split(',') if u.strip()
+    ]
+    
+    # Regions used to partition market intelligence rollups
+    MARKET_REGIONS = [
+        r.strip() for r in os.environ.get('MARKET_REGIONS', 'Luzon,Visayas,Mindanao').split(',')
+        if r.strip()
+    ]
+    
+    # Upper bound for the in-memory catalog response byte cache
+    RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    
+    # Idempotency-Key support for order creation: stored responses expire
+    # from Mongo after the TTL; recent ones are also kept in memory
+    IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', 24 * 3600))
+    IDEMPOTENCY_CACHE_MAX_ENTRIES = int(os.environ.get('IDEMPOTENCY_CACHE_MAX_ENTRIES', 10000))
+    
+    # How long checkout stock reservations hold units before they expire
+    STOCK_RESERVATION_TTL_SECONDS = int(os.environ.get('STOCK_RESERVATION_TTL_SECONDS', 15 * 60))
+    
+    # Order ingestion: 'sync' saves each order in the request; 'queue'
+    # acknowledges from a durable local SQLite queue and writes to Mongo
+    # in batches from a background thread
+    ORDER_INGEST_MODE = os.environ.get('ORDER_INGEST_MODE', 'sync')
+    ORDER_QUEUE_PATH = os.environ.get(
+        'ORDER_QUEUE_PATH', os.path.join(os.path.dirname(__file__), 'instance', 'order_queue.sqlite3')
+    )
+    ORDER_QUEUE_BATCH_SIZE = int(os.environ.get('ORDER_QUEUE_BATCH_SIZE', 500))
+    ORDER_QUEUE_FLUSH_INTERVAL = float(os.environ.get('ORDER_QUEUE_FLUSH_INTERVAL', 0.5))
+    
+    # Order archiving (archive_orders.py): terminal orders older than this
+    # move to the orders_archive collection, created with this WiredTiger
+    # block compressor (zstd needs MongoDB 4.2+; snappy and zlib also work)
+    ORDER_ARCHIVE_AFTER_DAYS = int(os.environ.get('ORDER_ARCHIVE_AFTER_DAYS', 365))
+    ORDER_ARCHIVE_BATCH_SIZE = int(os.environ.get('ORDER_ARCHIVE_BATCH_SIZE', 500))
+    ORDER_ARCHIVE_COMPRESSOR = os.environ.get('ORDER_ARCHIVE_COMPRESSOR', 'zstd')
+    
     # Model path (for future ML models)
     MODEL_PATH = os.path.join(os.path.dirname(__file__), 'models', 'moringa_model.h5')
     
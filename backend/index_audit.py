@@ -0,0 +1,71 @@
+"""
+Audit MongoDB indexes against the application's query shapes.
+
+Explains every registered query shape and flags COLLSCANs, then lists
+each collection's document count, index sizes and usage counters (since
+the last server restart) so unused indexes stand out.
+
+Usage:
+    python index_audit.py [--create] [--json]
+
+Exits non-zero if any query shape needs a collection scan.
+"""
+
+import argparse
+import json
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.utils.index_audit import audit_indexes, ensure_all_indexes
+
+
+def _size(nbytes):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if nbytes < 1024 or unit == 'GB':
+            return f"{nbytes:.0f}{unit}" if unit == 'B' else f"{nbytes:.1f}{unit}"
+        nbytes /= 1024
+
+
+def print_report(report):
+    print("=" * 60)
+    print("QUERY PLANS")
+    print("=" * 60)
+    for row in report['queries']:
+        mark = '✗' if row['collscan'] else '✓'
+        print(f"  {mark} {row['shape']:<40} {'/'.join(row['stages'])}")
+
+    print()
+    print("=" * 60)
+    print("COLLECTIONS")
+    print("=" * 60)
+    for coll in report['collections']:
+        print(f"  {coll['collection']}: {coll['documents']} documents, "
+              f"indexes {_size(coll['totalIndexBytes'])}")
+        for index in coll['indexes']:
+            usage = 'unused' if index['unused'] else f"{index['ops']} ops"
+            print(f"    └─ {index['name']:<36} {_size(index['sizeBytes']):>8}  {usage}")
+
+    collscans = [row['shape'] for row in report['queries'] if row['collscan']]
+    unused = sum(1 for c in report['collections'] for i in c['indexes'] if i['unused'])
+    print()
+    print(f"{len(collscans)} query shape(s) with COLLSCAN, {unused} unused index(es)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--create', action='store_true', help='create declared indexes first')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.create:
+            ensure_all_indexes()
+        report = audit_indexes()
+        if args.json:
+            print(json.dumps(report, indent=2, default=str))
+        else:
+            print_report(report)
+        sys.exit(1 if any(row['collscan'] for row in report['queries']) else 0)
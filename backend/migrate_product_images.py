@@ -0,0 +1,70 @@
+"""
+Backfill canonical image keys and precomputed image URLs on products.
+
+Products written before image normalisation store raw references
+(relative paths, /uploads/..., absolute URLs to our own host, broken
+placeholder URLs). This rewrites every document in batches so that
+serialisation only has to read the stored values.
+
+Usage:
+    python migrate_product_images.py [--batch-size 500] [--dry-run]
+"""
+
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pymongo import UpdateOne
+from app import create_app
+from app.models import Product
+from app.utils.images import normalize_image_keys, precompute_image_urls
+
+BROKEN_IMAGE_MARKERS = ('placeholder', 'via.')
+
+
+def migrate_product_images(batch_size=500, dry_run=False):
+    """Normalise product images in place; returns the number of updated documents."""
+    collection = Product._get_collection()
+    cursor = collection.find({}, {'image': 1, 'image_urls': 1}).batch_size(batch_size)
+
+    updated = 0
+    batch = []
+
+    def flush():
+        nonlocal updated
+        if batch and not dry_run:
+            collection.bulk_write(batch, ordered=False)
+        updated += len(batch)
+        batch.clear()
+
+    for doc in cursor:
+        images = [
+            img for img in (doc.get('image') or [])
+            if img and not any(marker in img for marker in BROKEN_IMAGE_MARKERS)
+        ]
+        keys = normalize_image_keys(images)
+        urls = precompute_image_urls(keys)
+        if keys == doc.get('image') and urls == doc.get('image_urls'):
+            continue
+        batch.append(UpdateOne(
+            {'_id': doc['_id']},
+            {'$set': {'image': keys, 'image_urls': urls}}
+        ))
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    return updated
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        count = migrate_product_images(args.batch_size, args.dry_run)
+        action = 'Would update' if args.dry_run else 'Updated'
+        print(f"{action} {count} products")
@@ -0,0 +1,29 @@
+"""
+Backfill product and user name snapshots on reviews.
+
+Reviews store ``product_name``/``user_name`` so they can be listed without
+dereferencing; this fills them in for reviews written before the
+snapshots existed.
+
+Usage:
+    python migrate_review_names.py [--batch-size 500]
+"""
+
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.utils.reviews import backfill_review_names
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        count = backfill_review_names(args.batch_size)
+        print(f"Updated {count} reviews")
@@ -0,0 +1,31 @@
+"""
+Recompute denormalised product rating aggregates from the reviews.
+
+Rating counts, sums and histograms on products are maintained
+incrementally on every review write; this rebuilds them from one
+aggregation over the reviews collection and fixes any drift (for
+example after reviews were edited directly in the database).
+
+Usage:
+    python reconcile_ratings.py [--dry-run]
+"""
+
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.utils.product_ratings import reconcile_product_ratings
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        count = reconcile_product_ratings(args.dry_run)
+        action = 'Would fix' if args.dry_run else 'Fixed'
+        print(f"{action} rating aggregates on {count} products")
@@ -0,0 +1,53 @@
+"""
+Verify that every product listing filter/sort combination is index-backed.
+
+Runs ``explain()`` for each combination offered by /api/products and
+/api/market/products and fails if any winning plan contains a COLLSCAN.
+
+Usage:
+    python test_product_indexes.py
+"""
+
+import itertools
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.models import Product
+from app.utils.catalog_search import filter_products, PRODUCT_SORTS
+from app.utils.index_audit import plan_stages
+
+CATEGORIES = [None, 'Herbal Tea']
+PRICE_RANGES = [(None, None), (100, None), (None, 500), (100, 500)]
+SEARCHES = [None, 'leaf']
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        Product.ensure_indexes()
+        failures = 0
+        combos = itertools.product(CATEGORIES, PRICE_RANGES, SEARCHES, PRODUCT_SORTS)
+        for category, (min_price, max_price), search, sort in combos:
+            query = filter_products(
+                Product.objects, category, min_price, max_price, search, sort
+            )
+            plan = query.explain().get('queryPlanner', {}).get('winningPlan', {})
+            stages = set(plan_stages(plan))
+            label = (f"category={category} price={min_price}-{max_price} "
+                     f"search={search} sort={sort}")
+            if 'COLLSCAN' in stages:
+                failures += 1
+                print(f"✗ COLLSCAN: {label}")
+            else:
+                print(f"✓ {'/'.join(sorted(stages))}: {label}")
+
+        if failures:
+            print(f"\n{failures} combination(s) are not index-backed")
+            sys.exit(1)
+        print("\nAll product listing queries use an index")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Stress the stock counters: many threads hammer one SKU at once.
+
+Creates a temporary product with ``--stock`` units and has ``--threads``
+workers each try ``--attempts`` one-unit reservations, committing or
+releasing some of them, plus a second tracked SKU that is always short
+so the all-or-nothing compensation path runs too. Fails (exit 1) if more
+units were sold than existed, stock went negative, or the compensated
+SKU lost units; prints reservation latency percentiles.
+
+Afterwards the order lifecycle is checked through the status routes:
+cancelling returns stock, a cancelled order cannot be reopened (409),
+and cancelling an order that has shipped keeps its stock taken.
+
+Usage:
+    python test_stock_concurrency.py [--stock 500] [--threads 32] [--attempts 50]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bson import ObjectId
+from app import create_app
+from app.models import Product, Order, StockReservation
+from app.utils.stock import (
+    InsufficientStock, reserve_stock, release_reservation, checkout_stock
+)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+def check_order_lifecycle(app, product_id):
+    """Cancel/reopen/shipped-cancel a real order via the routes; returns failures."""
+    client = app.test_client()
+    stock = lambda: Product._get_collection().find_one({'_id': ObjectId(product_id)})['stock']
+    body = {
+        'userName': 'Stock Test', 'userPhone': '0', 'deliveryAddress': '-', 'paymentMethod': 'cod',
+        'items': [{'id': product_id, 'cartQuantity': 2}]
+    }
+    failures = []
+    start = stock()
+
+    order_id = client.post('/api/orders/create', json=body).get_json()['orderId']
+    if stock() != start - 2:
+        failures.append('checkout did not take stock')
+    client.put(f'/api/orders/{order_id}/status', json={'status': 'cancelled'})
+    if stock() != start:
+        failures.append('cancelling did not return stock')
+    reopened = client.put(f'/api/orders/{order_id}/status', json={'status': 'pending'})
+    if reopened.status_code != 409 or stock() != start:
+        failures.append('a cancelled order was reopened without stock')
+
+    shipped_id = client.post('/api/orders/create', json=body).get_json()['orderId']
+    client.put(f'/api/orders/{shipped_id}/status', json={'status': 'shipped'})
+    client.put(f'/api/orders/{shipped_id}/status', json={'status': 'cancelled'})
+    if stock() != start - 2:
+        failures.append('cancelling a shipped order returned stock')
+
+    Order.objects(id__in=[order_id, shipped_id]).delete()
+    print(f"lifecycle: stock {start} -> {stock()} after cancel, reopen attempt and shipped cancel")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--stock', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--attempts', type=int, default=50)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        StockReservation.ensure_indexes()
+        hot = Product(name=f'__stock_test_hot_{os.getpid()}', category='__stock_test',
+                      price=1, stock=args.stock).save()
+        short = Product(name=f'__stock_test_short_{os.getpid()}', category='__stock_test',
+                        price=1, stock=1).save()
+        lifecycle = Product(name=f'__stock_test_lifecycle_{os.getpid()}', category='__stock_test',
+                            price=1, stock=10).save()
+        hot_id, short_id, lifecycle_id = str(hot.id), str(short.id), str(lifecycle.id)
+        sold = []
+        rejected = []
+        latencies = []
+        lock = threading.Lock()
+
+        def worker(n):
+            with app.app_context():
+                for attempt in range(args.attempts):
+                    # Every 5th attempt also asks for 2 of a 1-unit SKU and must roll back
+                    cart = [(hot_id, 1), (short_id, 2)] if attempt % 5 == 4 else [(hot_id, 1)]
+                    start = time.perf_counter()
+                    try:
+                        if attempt % 3 == 0:
+                            reservation_id = reserve_stock(cart)
+                            release_reservation(reservation_id)
+                            outcome = None
+                        else:
+                            outcome = checkout_stock(cart, f'stress-{n}-{attempt}')
+                    except InsufficientStock:
+                        outcome = False
+                    elapsed = time.perf_counter() - start
+                    with lock:
+                        latencies.append(elapsed)
+                        if outcome:
+                            sold.append(outcome)
+                        elif outcome is False:
+                            rejected.append(attempt)
+
+        try:
+            threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+            start = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            seconds = time.perf_counter() - start
+
+            hot_left = Product._get_collection().find_one({'_id': hot.id})['stock']
+            short_left = Product._get_collection().find_one({'_id': short.id})['stock']
+            committed = StockReservation.objects(status='committed', order_id__startswith='stress-').count()
+            print(f"{len(latencies)} reservations in {seconds:.2f}s "
+                  f"({len(latencies) / seconds:,.0f}/s) across {args.threads} threads")
+            print(f"sold {len(sold)} of {args.stock}, rejected {len(rejected)}, "
+                  f"hot stock left {hot_left}, short stock left {short_left}")
+            print(f"latency p50 {percentile(latencies, .5) * 1000:.1f}ms "
+                  f"p95 {percentile(latencies, .95) * 1000:.1f}ms "
+                  f"p99 {percentile(latencies, .99) * 1000:.1f}ms "
+                  f"max {max(latencies) * 1000:.1f}ms")
+
+            failures = []
+            if len(sold) + hot_left != args.stock or committed != len(sold):
+                failures.append('sold + remaining stock does not add up')
+            if hot_left < 0 or short_left < 0:
+                failures.append('stock went negative')
+            if short_left != 1:
+                failures.append('compensation lost units of the short SKU')
+            failures += check_order_lifecycle(app, lifecycle_id)
+            for failure in failures:
+                print(f"✗ {failure}")
+            if failures:
+                sys.exit(1)
+            print("✓ No oversell, stock follows the order lifecycle")
+        finally:
+            StockReservation.objects(order_id__startswith='stress-').delete()
+            StockReservation.objects(items__product_id__in=[hot_id, short_id, lifecycle_id]).delete()
+            hot.delete()
+            short.delete()
+            lifecycle.delete()
+
+
+if __name__ == '__main__':
+    main()